@@ -0,0 +1,77 @@
+"""
+Benchmark for group scheduling (availability.py).
+
+Measures, for growing attendee counts over a multi-week horizon:
+- fetching busy times with sequential vs concurrent freebusy queries against the fake API
+- ranking slots with the sweep-line conflict profile vs checking every attendee per slot
+
+Usage:
+    python benchmarks/bench_availability.py [--attendees 50,100,200] [--weeks 4] [--latency 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [BENCH_DIR, os.path.join(BENCH_DIR, '..', 'openai_sdk_agent')]
+
+from fake_calendar import FakeCalendar
+import availability
+
+
+BASE = datetime(2025, 1, 6, tzinfo=timezone.utc)
+DURATION = 3600
+
+
+def naive_rank(busy, start, end):
+    """Count busy attendees for every candidate by scanning all of their intervals."""
+    results = []
+    for t in availability.candidate_starts(start, end, DURATION, 'UTC', step=300):
+        busy_count = sum(1 for intervals in busy.values() if any(s < t + DURATION and e > t for s, e in intervals))
+        results.append((busy_count, t))
+    return sorted(results)[:5]
+
+
+def run(attendee_count, weeks, latency):
+    fake = FakeCalendar(latency=latency)
+    people = [f'person{i}@example.com' for i in range(attendee_count)]
+    for i, person in enumerate(people):
+        fake.add_calendar(person)
+        fake.seed_events(person, 8 * weeks * 5, BASE + timedelta(days=i % 3), days=7 * weeks)
+    start = int(BASE.timestamp())
+    end = start + weeks * 7 * 86400
+
+    timings = {}
+    for workers in (1, 8):
+        began = time.perf_counter()
+        busy, _ = availability.fetch_busy(fake.service, people, start, end, max_workers=workers)
+        timings[f'fetch_w{workers}'] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    availability.find_slots(busy, start, end, DURATION, 'UTC', step=300)
+    timings['sweep'] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    naive_rank(busy, start, end)
+    timings['naive'] = time.perf_counter() - began
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--attendees', default='50,100,200')
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake freebusy latency in seconds')
+    args = parser.parse_args(argv)
+
+    print(f'{"attendees":>10}{"fetch 1 worker":>16}{"fetch 8 workers":>17}{"rank sweep":>12}{"rank naive":>12}')
+    for count in (int(n) for n in args.attendees.split(',')):
+        t = run(count, args.weeks, args.latency)
+        print(f'{count:>10}{t["fetch_w1"] * 1000:>14.1f}ms{t["fetch_w8"] * 1000:>15.1f}ms'
+              f'{t["sweep"] * 1000:>10.1f}ms{t["naive"] * 1000:>10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
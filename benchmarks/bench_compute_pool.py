@@ -0,0 +1,90 @@
+"""
+Benchmark for the compute pool (compute_pool.py) under concurrent sessions.
+
+One event loop drives a number of light sessions, which only wait on I/O, alongside heavy
+sessions that rank meeting slots for a large group, the way find_meeting_times() does from
+a tool thread. Reported for each COMPUTE_WORKERS setting:
+- how late the light sessions' I/O waits complete (event loop lag), which is what other
+  conversations feel while slot ranking runs
+- slot rankings completed per second
+
+Usage:
+    python benchmarks/bench_compute_pool.py [--workers 0,1,2,4] [--attendees 200] [--weeks 4] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [BENCH_DIR, os.path.join(BENCH_DIR, '..', 'openai_sdk_agent')]
+
+from run_benchmarks import percentile
+import availability
+from compute_pool import ComputePool
+
+
+START = 1736150400  # 2025-01-06T00:00:00Z, a Monday
+IO_WAIT = 0.01
+
+
+def make_busy(attendees, weeks, seed=0):
+    rng = random.Random(seed)
+    end = START + weeks * 7 * 86400
+    return {
+        f'person{i}@example.com': sorted(
+            (s, s + rng.choice((1800, 3600, 5400))) for s in (rng.randrange(START, end, 900) for _ in range(8 * 5 * weeks))
+        )
+        for i in range(attendees)
+    }
+
+
+async def run(pool, busy, weeks, light_sessions, heavy_sessions, seconds):
+    end = START + weeks * 7 * 86400
+    deadline = time.perf_counter() + seconds
+    lags = []
+    rankings = 0
+
+    async def light():
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            await asyncio.sleep(IO_WAIT)
+            lags.append(time.perf_counter() - began - IO_WAIT)
+
+    async def heavy():
+        nonlocal rankings
+        while time.perf_counter() < deadline:
+            await asyncio.to_thread(
+                pool.run_with_intervals, availability.find_slots, busy, START, end, 3600, 'UTC', step=300
+            )
+            rankings += 1
+
+    await asyncio.gather(*[light() for _ in range(light_sessions)], *[heavy() for _ in range(heavy_sessions)])
+    return lags, rankings / seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='0,1,2,4')
+    parser.add_argument('--attendees', type=int, default=200)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--light', type=int, default=20, help='Concurrent I/O-only sessions')
+    parser.add_argument('--heavy', type=int, default=4, help='Concurrent slot-ranking sessions')
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    busy = make_busy(args.attendees, args.weeks)
+    print(f'{"workers":>8}{"lag p50":>10}{"lag p99":>10}{"lag max":>10}{"rankings/s":>12}')
+    for workers in (int(n) for n in args.workers.split(',')):
+        pool = ComputePool(workers)
+        pool.run(abs, 0)  # start the processes before measuring
+        lags, rate = asyncio.run(run(pool, busy, args.weeks, args.light, args.heavy, args.seconds))
+        pool.shutdown()
+        print(f'{workers:>8}{percentile(lags, 0.5) * 1000:>8.1f}ms{percentile(lags, 0.99) * 1000:>8.1f}ms'
+              f'{max(lags) * 1000:>8.1f}ms{rate:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Memory benchmark for cached event results.
+
+Builds N synthetic Calendar API items and measures, with tracemalloc, the memory held by
+the formatted dicts produced by the old get_calendar_events() loop versus event_record.Event.
+
+Usage:
+    python benchmarks/bench_event_memory.py [--events 50000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'openai_sdk_agent'))
+
+from event_record import Event, serialize
+
+
+def make_items(count):
+    start = datetime(2025, 1, 6, 9, 0, tzinfo=timezone(timedelta(hours=-5)))
+    items = []
+    for i in range(count):
+        begin = start + timedelta(minutes=30 * i)
+        item = {
+            'id': f'evt{i:08d}',
+            'summary': ['Standup', '1:1 with manager', 'Focus time', 'Lunch'][i % 4],
+            'start': {'dateTime': begin.isoformat()},
+            'end': {'dateTime': (begin + timedelta(minutes=30)).isoformat()},
+            'htmlLink': f'https://www.google.com/calendar/event?eid=evt{i:08d}',
+            'iCalUID': f'evt{i:08d}@google.com',
+        }
+        if i % 3 == 0:
+            item['description'] = 'Weekly sync to go over priorities and blockers.'
+        if i % 5 == 0:
+            item['location'] = 'Conference Room A'
+        items.append(item)
+    # Round trip through JSON so strings are not shared, as with a real API response
+    return json.loads(json.dumps(items))
+
+
+def legacy_format(items):
+    formatted_events = []
+    for event in items:
+        formatted_event = {
+            'id': event['id'],
+            'summary': event.get('summary', 'No title'),
+            'start': event['start'].get('dateTime', event['start'].get('date')),
+            'end': event['end'].get('dateTime', event['end'].get('date')),
+        }
+        if 'description' in event:
+            formatted_event['description'] = event['description']
+        if 'location' in event:
+            formatted_event['location'] = event['location']
+        if 'htmlLink' in event:
+            formatted_event['link'] = event['htmlLink']
+        formatted_events.append(formatted_event)
+    return formatted_events
+
+
+def measure(label, build, count):
+    items = make_items(count)
+    began = time.perf_counter()
+    build(items)
+    elapsed = time.perf_counter() - began
+
+    # Measure memory on a separate build; tracemalloc distorts timings. Tracing starts
+    # before the API items are created so that strings kept alive by the result count.
+    gc.collect()
+    tracemalloc.start()
+    items = make_items(count)
+    result = build(items)
+    del items
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<28} {current / 1024 / 1024:8.2f} MiB  {current / count:7.1f} B/event  {elapsed * 1000:8.1f} ms')
+    return result
+
+
+def run(count):
+    measure('dicts (legacy loop)', legacy_format, count)
+    events = measure('Event records', lambda items: [Event.from_api(item, 'primary') for item in items], count)
+
+    began = time.perf_counter()
+    for _ in serialize(events):
+        pass
+    print(f'{"serialize() all":<28} {(time.perf_counter() - began) * 1000:38.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=50000)
+    run(parser.parse_args().events)
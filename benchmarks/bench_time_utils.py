@@ -0,0 +1,55 @@
+"""
+Microbenchmark for timestamp normalization in the calendar tools.
+
+Compares the string heuristics previously used in get_calendar_events() with
+time_utils.to_rfc3339(), and the per-call get_localzone() lookup with the cached zone.
+
+Usage:
+    python benchmarks/bench_time_utils.py [--number 100000]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'openai_sdk_agent'))
+
+from tzlocal import get_localzone
+
+from time_utils import local_zone_name, to_rfc3339
+
+
+SAMPLES = [
+    '2025-01-15T00:00:00',
+    '2025-01-15T23:59:59',
+    '2025-03-09T02:30:00',
+    '2025-01-15T10:00:00Z',
+    '2025-01-15T10:00:00-05:00',
+    '2025-01-15',
+]
+
+
+def legacy_normalize(time_min):
+    if time_min and not time_min.endswith('Z') and '+' not in time_min and time_min.count('-') == 2:
+        dt = datetime.fromisoformat(time_min.replace('Z', '+00:00'))
+        time_min = dt.isoformat() + 'Z' if dt.tzinfo is None else dt.isoformat()
+    return time_min
+
+
+def run(number):
+    cases = {
+        'legacy heuristics': lambda: [legacy_normalize(s) for s in SAMPLES],
+        'time_utils.to_rfc3339': lambda: [to_rfc3339(s, 'America/New_York') for s in SAMPLES],
+        'str(get_localzone())': lambda: str(get_localzone()),
+        'local_zone_name()': local_zone_name,
+    }
+    for name, fn in cases.items():
+        seconds = min(timeit.repeat(fn, number=number, repeat=3))
+        print(f'{name:<24} {seconds / number * 1e6:8.2f} us/call')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=20000)
+    run(parser.parse_args().number)
@@ -0,0 +1,358 @@
+"""
+In-process fake of the Google Calendar v3 API.
+
+FakeCalendar implements the httplib2 `request()` interface, so the real googleapiclient
+service object (and therefore the real agent tools) can run against it without network
+access or credentials:
+
+    fake = FakeCalendar(latency=0.05, error_rate=0.01, seed=7)
+    fake.seed_events('primary', count=200, start=datetime(2025, 1, 6, tzinfo=timezone.utc))
+    install(openai_tools, fake)
+
+Supported endpoints: calendarList.list, events.list/insert/import/get/update/patch/delete,
+freeBusy.query and the batch endpoint.
+"""
+import email.parser
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+from googleapiclient.discovery import build
+
+
+_EVENTS_RE = re.compile(r'^/calendar/v3/calendars/([^/]+)/events(?:/([^/]+))?$')
+_SUMMARIES = ['Standup', '1:1 with manager', 'Design review', 'Lunch', 'Focus time', 'Dentist appointment', 'Team sync']
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _event_bounds(event):
+    bounds = []
+    for key in ('start', 'end'):
+        value = event[key]
+        if 'dateTime' in value:
+            bounds.append(_parse_time(value['dateTime']))
+        else:
+            bounds.append(datetime.fromisoformat(value['date']).replace(tzinfo=timezone.utc))
+    return bounds
+
+
+class FakeCalendar:
+    """
+    Thread-safe fake Calendar API backend.
+
+    Args:
+        latency: Seconds added to every request, or a (min, max) tuple for uniform jitter.
+        error_rate: Fraction of requests that fail with a 503 or 429 error.
+        seed: Seed for generated IDs, jitter and injected errors, so runs are reproducible.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._sequence = 0
+        self._forced_failures = []
+        self.calendars = {'primary': {'id': 'primary', 'summary': 'Primary', 'primary': True}}
+        self.events = {'primary': {}}
+        self.request_count = 0
+        self.requests_by_method = {}
+
+    # Setup helpers
+
+    def add_calendar(self, calendar_id, summary=None, primary=False):
+        with self._lock:
+            self.calendars[calendar_id] = {'id': calendar_id, 'summary': summary or calendar_id, 'primary': primary}
+            self.events.setdefault(calendar_id, {})
+
+    def seed_events(self, calendar_id, count, start, days=None, attendees=None):
+        """Create `count` deterministic events on working hours, spread over `days` days from `start`."""
+        days = days or max(1, count // 6)
+        created = []
+        for i in range(count):
+            day = start + timedelta(days=(i * days) // count)
+            begin = day.replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(minutes=30 * (i % 16))
+            body = {
+                'summary': _SUMMARIES[i % len(_SUMMARIES)],
+                'start': {'dateTime': begin.isoformat()},
+                'end': {'dateTime': (begin + timedelta(minutes=30 + 30 * (i % 2))).isoformat()},
+            }
+            if i % 3 == 0:
+                body['description'] = 'Agenda: status, blockers, next steps.'
+            if i % 4 == 0:
+                body['location'] = 'Conference Room A'
+            if attendees:
+                body['attendees'] = [{'email': email} for email in attendees]
+            created.append(self._insert(calendar_id, body))
+        return created
+
+    def copy_events(self, calendar_id, events):
+        """Add copies of events (keeping their iCalUID), as when one meeting invites several of the user's calendars."""
+        body_keys = ('summary', 'description', 'location', 'start', 'end', 'attendees', 'iCalUID')
+        return [self._insert(calendar_id, {key: event[key] for key in body_keys if key in event}) for event in events]
+
+    def fail_next(self, status=503, count=1):
+        """Force the next `count` requests to fail with the given HTTP status."""
+        with self._lock:
+            self._forced_failures.extend([status] * count)
+
+    def service(self, request_builder=None):
+        """Build a real googleapiclient Calendar service bound to this fake."""
+        kwargs = {'requestBuilder': request_builder} if request_builder else {}
+        return build('calendar', 'v3', http=self, static_discovery=True, **kwargs)
+
+    # httplib2 interface
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=None, connection_type=None):
+        self._sleep()
+        with self._lock:
+            self.request_count += 1
+            failure = self._next_failure()
+        if failure:
+            return self._error(failure)
+
+        parsed = urllib.parse.urlparse(uri)
+        if parsed.path.startswith('/batch/'):
+            return self._batch(body, headers or {})
+        status, payload = self._dispatch(method, parsed.path, urllib.parse.parse_qs(parsed.query), body, headers or {})
+        return self._response(status, payload)
+
+    def _sleep(self):
+        latency = self.latency
+        if isinstance(latency, tuple):
+            with self._lock:
+                latency = self._random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _next_failure(self):
+        if self._forced_failures:
+            return self._forced_failures.pop(0)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._random.choice([429, 503])
+        return None
+
+    def _response(self, status, payload):
+        content = b'' if payload is None else json.dumps(payload).encode()
+        resp = httplib2.Response({'status': str(status), 'content-type': 'application/json; charset=UTF-8'})
+        return resp, content
+
+    def _error(self, status, message=None):
+        reason = {404: 'notFound', 409: 'duplicate', 410: 'deleted', 412: 'conditionNotMet', 429: 'rateLimitExceeded'}.get(status, 'backendError')
+        message = message or reason
+        return self._response(status, {'error': {'code': status, 'message': message, 'errors': [{'reason': reason, 'message': message}]}})
+
+    # Routing
+
+    def _dispatch(self, method, path, query, body, headers=None):
+        data = json.loads(body) if body else {}
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        params = {key: values[-1] for key, values in query.items()}
+
+        if path == '/calendar/v3/users/me/calendarList' and method == 'GET':
+            return self._count('calendar.calendarList.list', 200, {'items': list(self.calendars.values())})
+        if path == '/calendar/v3/freeBusy' and method == 'POST':
+            if len(data.get('items', [])) > 50:
+                return self._count('calendar.freebusy.query', 400, {'error': {'code': 400, 'message': 'Too many calendars requested', 'errors': [{'reason': 'tooManyCalendarsRequested'}]}})
+            return self._count('calendar.freebusy.query', 200, self._freebusy(data))
+
+        match = _EVENTS_RE.match(path)
+        if not match:
+            return 404, {'error': {'code': 404, 'message': f'Unknown path {path}'}}
+        calendar_id = urllib.parse.unquote(match.group(1))
+        event_id = urllib.parse.unquote(match.group(2)) if match.group(2) else None
+
+        with self._lock:
+            if calendar_id not in self.events:
+                return 404, {'error': {'code': 404, 'message': 'Calendar not found', 'errors': [{'reason': 'notFound'}]}}
+            if event_id is None:
+                if method == 'GET':
+                    return self._count('calendar.events.list', 200, self._list(calendar_id, params))
+                if method == 'POST':
+                    if data.get('id') in self.events[calendar_id]:
+                        return self._count('calendar.events.insert', 409, {'error': {'code': 409, 'message': 'The requested identifier already exists.', 'errors': [{'reason': 'duplicate'}]}})
+                    if data.get('iCalUID') and any(e.get('iCalUID') == data['iCalUID'] and e['status'] != 'cancelled' for e in self.events[calendar_id].values()):
+                        return self._count('calendar.events.insert', 409, {'error': {'code': 409, 'message': 'The requested identifier already exists.', 'errors': [{'reason': 'duplicate'}]}})
+                    return self._count('calendar.events.insert', 200, self._insert(calendar_id, data))
+            if event_id == 'import' and method == 'POST':
+                # import is keyed by iCalUID (and originalStartTime for an exception to a recurring
+                # event): an existing event with the same key is updated in place
+                key = (data.get('iCalUID'), json.dumps(data.get('originalStartTime'), sort_keys=True))
+                existing = next((
+                    e for e in self.events[calendar_id].values()
+                    if (e.get('iCalUID'), json.dumps(e.get('originalStartTime'), sort_keys=True)) == key
+                ), None)
+                if existing is None:
+                    existing = self._insert(calendar_id, data)
+                existing.update(data)
+                existing['status'] = data.get('status', 'confirmed')
+                self._touch(existing)
+                return self._count('calendar.events.import', 200, existing)
+
+            event = self.events[calendar_id].get(event_id)
+            if event is None or event['status'] == 'cancelled':
+                status = 410 if event is not None else 404
+                return self._count(f'calendar.events.{method.lower()}', status, {'error': {'code': status, 'message': 'Not Found', 'errors': [{'reason': 'deleted' if status == 410 else 'notFound'}]}})
+            if method == 'GET':
+                return self._count('calendar.events.get', 200, event)
+            if method == 'DELETE':
+                self._touch(event)
+                event['status'] = 'cancelled'
+                return self._count('calendar.events.delete', 204, None)
+            if method in ('PUT', 'PATCH'):
+                if headers.get('if-match') not in (None, '*', event['etag']):
+                    return self._count('calendar.events.update' if method == 'PUT' else 'calendar.events.patch', 412, {'error': {'code': 412, 'message': 'Precondition Failed', 'errors': [{'reason': 'conditionNotMet'}]}})
+                if method == 'PUT':
+                    preserved = {key: event[key] for key in ('id', 'iCalUID', 'htmlLink', 'created', 'etag')}
+                    event.clear()
+                    event.update(preserved)
+                event.update(data)
+                event['status'] = 'confirmed'
+                self._touch(event)
+                return self._count('calendar.events.update' if method == 'PUT' else 'calendar.events.patch', 200, event)
+
+        return 405, {'error': {'code': 405, 'message': 'Method not allowed'}}
+
+    def _count(self, method_id, status, payload):
+        with self._lock:
+            self.requests_by_method[method_id] = self.requests_by_method.get(method_id, 0) + 1
+        return status, payload
+
+    def _touch(self, event):
+        self._sequence += 1
+        event['updated'] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        event['etag'] = f'"{self._sequence}"'
+        event['_sequence'] = self._sequence
+
+    def _insert(self, calendar_id, body):
+        with self._lock:
+            event_id = body.get('id') or f'fake{self._sequence + 1:08d}'
+            event = dict(body)
+            event.update({
+                'id': event_id,
+                'status': 'confirmed',
+                'htmlLink': f'https://calendar.example.com/event?eid={event_id}',
+                'iCalUID': body.get('iCalUID') or f'{event_id}@google.com',
+                'created': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+            })
+            self._touch(event)
+            self.events[calendar_id][event_id] = event
+            return event
+
+    def _list(self, calendar_id, params):
+        events = self.events[calendar_id].values()
+        sync_token = params.get('syncToken')
+        if sync_token is not None:
+            since = int(sync_token)
+            selected = [e for e in events if e['_sequence'] > since]
+        else:
+            show_deleted = params.get('showDeleted') == 'true'
+            # Like the API, cancelled exceptions to recurring events are listed unless expanded into instances
+            show_exceptions = params.get('singleEvents') != 'true'
+            selected = [
+                e for e in events
+                if show_deleted or e['status'] != 'cancelled' or (show_exceptions and e.get('recurringEventId'))
+            ]
+            if 'timeMin' in params:
+                time_min = _parse_time(params['timeMin'])
+                selected = [e for e in selected if _event_bounds(e)[1] > time_min]
+            if 'timeMax' in params:
+                time_max = _parse_time(params['timeMax'])
+                selected = [e for e in selected if _event_bounds(e)[0] < time_max]
+            if 'iCalUID' in params:
+                selected = [e for e in selected if e.get('iCalUID') == params['iCalUID']]
+            if 'q' in params:
+                terms = params['q'].lower().split()
+                selected = [
+                    e for e in selected
+                    if all(t in ' '.join(str(e.get(k, '')) for k in ('summary', 'description', 'location')).lower() for t in terms)
+                ]
+            if params.get('orderBy') == 'startTime':
+                selected.sort(key=lambda e: _event_bounds(e)[0])
+
+        offset = int(params.get('pageToken', 0))
+        limit = min(int(params.get('maxResults', 250)), 2500)
+        page = selected[offset:offset + limit]
+        result = {
+            'kind': 'calendar#events',
+            'items': [{k: v for k, v in e.items() if not k.startswith('_')} for e in page],
+        }
+        if offset + limit < len(selected):
+            result['nextPageToken'] = str(offset + limit)
+        else:
+            result['nextSyncToken'] = str(self._sequence)
+        return result
+
+    def _freebusy(self, body):
+        time_min = _parse_time(body['timeMin'])
+        time_max = _parse_time(body['timeMax'])
+        calendars = {}
+        with self._lock:
+            for item in body.get('items', []):
+                calendar_id = item['id']
+                if calendar_id not in self.events:
+                    calendars[calendar_id] = {'busy': [], 'errors': [{'domain': 'global', 'reason': 'notFound'}]}
+                    continue
+                busy = []
+                for event in self.events[calendar_id].values():
+                    if event['status'] == 'cancelled' or event.get('transparency') == 'transparent':
+                        continue
+                    start, end = _event_bounds(event)
+                    if end > time_min and start < time_max:
+                        busy.append((max(start, time_min), min(end, time_max)))
+                busy.sort()
+                calendars[calendar_id] = {'busy': [
+                    {'start': s.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z'),
+                     'end': e.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')}
+                    for s, e in busy
+                ]}
+        return {'kind': 'calendar#freeBusy', 'timeMin': body['timeMin'], 'timeMax': body['timeMax'], 'calendars': calendars}
+
+    def _batch(self, body, headers):
+        content_type = headers.get('content-type') or headers.get('Content-Type')
+        message = email.parser.Parser().parsestr(f'content-type: {content_type}\r\n\r\n{body}')
+        boundary = 'fake_batch_boundary'
+        parts = []
+        for part in message.get_payload():
+            content_id = part['Content-ID']
+            request_line, _, rest = part.get_payload().partition('\n')
+            method, path, _ = request_line.split(' ', 2)
+            _, _, request_body = rest.replace('\r\n', '\n').partition('\n\n')
+            parsed = urllib.parse.urlparse(path)
+            status, payload = self._dispatch(method, parsed.path, urllib.parse.parse_qs(parsed.query), request_body or None)
+            response_body = '' if payload is None else json.dumps(payload)
+            parts.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id[1:-1]}>\r\n\r\n'
+                f'HTTP/1.1 {status} {"OK" if status < 300 else "Error"}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n\r\n{response_body}\r\n'
+            )
+        content = ''.join(parts) + f'--{boundary}--\r\n'
+        resp = httplib2.Response({'status': '200', 'content-type': f'multipart/mixed; boundary={boundary}'})
+        return resp, content.encode()
+
+
+def install(tools_module, fake, instrumentation=None):
+    """
+    Point a tools module (openai_tools or adk_tools) at a FakeCalendar.
+
+    get_calendar_service() is replaced by a function that still builds a fresh service
+    per call, as the real implementation does, but skips OAuth and uses the fake transport.
+    """
+    request_builder = instrumentation.InstrumentedHttpRequest if instrumentation else None
+
+    def get_calendar_service():
+        return fake.service(request_builder)
+
+    if instrumentation is not None:
+        get_calendar_service = instrumentation.timed(instrumentation.SERVICE, 'get_calendar_service')(get_calendar_service)
+    tools_module.get_calendar_service = get_calendar_service
+    return get_calendar_service
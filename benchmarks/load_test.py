@@ -0,0 +1,111 @@
+"""
+Load test for horizontal scale-out: N stateless agent worker processes sharing one store.
+
+Every worker is a separate process running the OpenAI agent with a scripted model against
+its own copy of the fake Calendar API (seeded identically). Workers share a SQLite store
+(CALENDAR_STORE) holding conversation sessions, the event cache and, with --rate-limit,
+one request budget for the Calendar API. Throughput is reported for each worker count
+along with its scaling efficiency relative to a single worker.
+
+Usage:
+    python benchmarks/load_test.py [--workers 1,2,4,8] [--conversations 40] [--concurrency 4]
+    python benchmarks/load_test.py --store memory://   # same workers with nothing shared
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BENCH_DIR, os.path.join(ROOT_DIR, 'openai_sdk_agent')]
+
+
+def worker(index, args, store_url, barrier, results):
+    # Configure before the tools module is imported, as a deployment would through its environment
+    os.environ['CALENDAR_STORE'] = store_url
+    os.environ['CALENDAR_CACHE_TTL'] = str(args.cache_ttl)
+    if args.rate_limit:
+        os.environ['CALENDAR_RATE_LIMIT'] = str(args.rate_limit)
+
+    from fake_calendar import FakeCalendar, install
+    from stub_llm import ScriptedModel
+    import workloads
+    import instrumentation
+    import openai_tools
+    import tool_memo
+    from agents import Runner, set_tracing_disabled
+
+    set_tracing_disabled(True)
+    fake = FakeCalendar(latency=args.latency, seed=args.seed)
+    workloads.seed(fake)
+    install(openai_tools, fake, instrumentation)
+    import openai_agent
+
+    openai_agent.start()  # turns below go straight to Runner.run, not through respond()
+    agent = openai_agent.agent.clone(model=ScriptedModel(workloads.SCRIPT, think_time=args.think_time))
+    messages = list(workloads.SCENARIOS.values())
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def conversation(n):
+            async with semaphore:
+                session = openai_agent.open_session(f'worker{index}-{n}')
+                with instrumentation.turn(), tool_memo.memo_run():
+                    await Runner.run(agent, input=messages[n % len(messages)], session=session, hooks=openai_agent.hooks)
+
+        await asyncio.gather(*(conversation(n) for n in range(args.conversations)))
+
+    barrier.wait()
+    began = time.time()
+    asyncio.run(run_all())
+    results.put((args.conversations, began, time.time(), openai_tools._cache.hits, openai_tools._cache.misses))
+
+
+def run(worker_count, args, store_url):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(worker_count)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(i, args, store_url, barrier, results)) for i in range(worker_count)]
+    for process in processes:
+        process.start()
+    records = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    conversations = sum(r[0] for r in records)
+    elapsed = max(r[2] for r in records) - min(r[1] for r in records)
+    hits, misses = sum(r[3] for r in records), sum(r[4] for r in records)
+    return conversations / elapsed, hits / (hits + misses) if hits + misses else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--conversations', type=int, default=40, help='Conversations per worker')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent conversations per worker')
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake API latency in seconds')
+    parser.add_argument('--think-time', type=float, default=0.05, help='Scripted model latency in seconds')
+    parser.add_argument('--cache-ttl', type=float, default=60)
+    parser.add_argument('--rate-limit', type=float, default=0, help='Calendar requests per second across all workers')
+    parser.add_argument('--store', help='CALENDAR_STORE URL (default: a fresh SQLite file per worker count)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f'{"workers":>8}{"conv/s":>10}{"scaling":>10}{"efficiency":>12}{"cache hits":>12}')
+    baseline = None
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(n) for n in args.workers.split(',')):
+            store_url = args.store or f'sqlite:///{os.path.join(directory, f"store{count}.db")}'
+            throughput, hit_rate = run(count, args, store_url)
+            baseline = baseline or throughput / count
+            scaling = throughput / baseline
+            print(f'{count:>8}{throughput:>10.1f}{scaling:>9.2f}x{scaling / count:>11.0%}{hit_rate:>11.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+Load test replaying recorded conversations against either agent.
+
+Conversations are recorded by running an agent with RECORD_CONVERSATIONS=path (see
+transcripts.py). Replaying them drives the real agent code, tools, cache and memoization
+with the recorded model behaviour: a scripted model issues the recorded tool calls and
+reply for each turn, and the tools talk to the in-process FakeCalendar. Conversations run
+concurrently, the turns of one conversation in order within its own session.
+
+Event IDs in the recording belong to the calendar it was recorded against. When a tool
+argument ending in "id" repeats a value from an earlier tool result of the same turn, the
+replay takes the value from the same place in the live result (the event with the same
+summary, if there is one), so "look the event up, then delete it" deletes a FakeCalendar
+event. Other arguments are replayed verbatim.
+
+Reported per agent: p50/p95/p99 turn latency, and model calls, tool calls, Calendar API
+requests and tokens per turn, next to the same figures from the recording. Recorded tool
+calls include those later served by tool_memo, which the replay reports as memo_saved.
+Conversations with several turns also get one row per turn position.
+
+Usage:
+    python benchmarks/replay.py record conversations.jsonl.gz   # sample recording from the scripted workloads
+    python benchmarks/replay.py run conversations.jsonl.gz [--agents openai,adk] [--concurrency 8] [--repeat 5]
+"""
+import argparse
+import asyncio
+import contextvars
+import os
+import sys
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [BENCH_DIR, os.path.join(BENCH_DIR, '..', 'openai_sdk_agent'), os.path.join(BENCH_DIR, '..')]
+os.environ.setdefault('SEARCH_INDEX', ':memory:')
+
+from fake_calendar import install
+from run_benchmarks import make_fake, print_report, summarize
+from stub_llm import Reply, Script, ScriptedLlm, ScriptedModel, ToolCalls, _parse_output
+import workloads
+
+
+TOOLS = (
+    'list_calendars', 'add_calendar_event', 'get_calendar_events', 'get_agenda', 'get_merged_events', 'search_events', 'update_calendar_event',
+    'delete_calendar_event', 'invite_to_event', 'find_meeting_times', 'import_calendar_events', 'export_calendar_events',
+)
+
+# Multi-turn conversations for `record`, built from the benchmark scenarios
+SAMPLE_CONVERSATIONS = [
+    [workloads.SCENARIOS['agenda'], workloads.SCENARIOS['delete']],
+    [workloads.SCENARIOS['multi_calendar'], workloads.SCENARIOS['repeat']],
+    [workloads.SCENARIOS['create'], workloads.SCENARIOS['invite']],
+    [workloads.SCENARIOS['search']],
+]
+
+_turn_steps = contextvars.ContextVar('replay_turn_steps', default=None)
+
+
+class ReplayScript(Script):
+    """Answers every message with the steps of the turn being replayed in the current context."""
+
+    def __init__(self):
+        super().__init__({})
+
+    def steps_for(self, message):
+        return _turn_steps.get() or []
+
+
+# Recordings
+
+def _find_path(value, target, path=()):
+    if isinstance(value, str):
+        return path if value == target else None
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return None
+    for key, item in items:
+        found = _find_path(item, target, path + (key,))
+        if found is not None:
+            return found
+    return None
+
+
+def _lookup(value, path, recorded):
+    """
+    Follow path into value. At list steps the item with the same summary as the recorded
+    item is preferred over the recorded position, since live results can be ordered differently.
+    """
+    for key in path:
+        item = recorded[key] if isinstance(recorded, (dict, list)) else None
+        if isinstance(value, list) and isinstance(item, dict) and 'summary' in item:
+            key = next((i for i, live in enumerate(value) if isinstance(live, dict) and live.get('summary') == item['summary']), key)
+        try:
+            value = value[key]
+        except (IndexError, KeyError, TypeError):
+            return None
+        recorded = item
+    return value
+
+
+def _remap(arguments, recorded_outputs):
+    """
+    Return arguments, or a callable rebuilding them from live tool results when an ID
+    argument was taken from an earlier result of the turn.
+    """
+    references = {}
+    for key, value in arguments.items():
+        if not (key == 'id' or key.endswith('_id')) or not isinstance(value, str):
+            continue
+        for index in reversed(range(len(recorded_outputs))):
+            path = _find_path(recorded_outputs[index], value)
+            if path:
+                references[key] = (index, path)
+                break
+    if not references:
+        return arguments
+    recorded_outputs = list(recorded_outputs)
+
+    def resolve(outputs, message):
+        resolved = dict(arguments)
+        for key, (index, path) in references.items():
+            if index < len(outputs):
+                value = _lookup(_parse_output(outputs[index]), path, recorded_outputs[index])
+                if isinstance(value, str):
+                    resolved[key] = value
+        return resolved
+    return resolve
+
+
+def replay_steps(record):
+    """The scripted steps reproducing one recorded turn."""
+    steps = []
+    recorded_outputs = []
+    for step in record['steps']:
+        calls = [(name, arguments, output) for name, arguments, output in step if name in TOOLS]
+        if calls:
+            steps.append(ToolCalls(*((name, _remap(arguments, recorded_outputs)) for name, arguments, _ in calls)))
+            recorded_outputs.extend(output for _, _, output in calls)
+    steps.append(Reply(record.get('reply') or 'Done.'))
+    return steps
+
+
+def load_conversations(path):
+    """Recorded turns grouped by conversation, in recording order, each with its replay steps."""
+    import transcripts
+
+    conversations = defaultdict(list)
+    for record in transcripts.read_transcripts(path):
+        record['replay'] = replay_steps(record)
+        conversations[record['conversation']].append(record)
+    return list(conversations.values())
+
+
+# Replay
+
+async def _replay(conversations, args, open_session, run_turn):
+    """Replay every conversation args.repeat times, at most args.concurrency at a time."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async def replay_conversation(number, turns):
+        async with semaphore:
+            session = await open_session(number)
+            for position, record in enumerate(turns, 1):
+                token = _turn_steps.set(record['replay'])
+                try:
+                    measured = await run_turn(record['message'], session)
+                finally:
+                    _turn_steps.reset(token)
+                results.append(dict(measured, position=position))
+
+    began = time.perf_counter()
+    await asyncio.gather(*(
+        replay_conversation(number, turns)
+        for number, turns in enumerate(conversations * args.repeat)
+    ))
+    return results, time.perf_counter() - began
+
+
+def _measure(instrumentation, stats):
+    return {
+        'seconds': stats.total_seconds,
+        'model_calls': stats.calls.get(instrumentation.LLM, 0),
+        'tool_calls': stats.calls.get(instrumentation.TOOL, 0),
+        'api_requests': stats.calls.get(instrumentation.HTTP, 0),
+        'tokens': stats.tokens,
+        'memo_saved': stats.counters.get('tool_memo_hits', 0),
+    }
+
+
+def replay_openai(conversations, args):
+    import instrumentation
+    import openai_tools
+    from agents import SQLiteSession, set_tracing_disabled
+
+    set_tracing_disabled(True)
+    install(openai_tools, make_fake(args), instrumentation)
+    import openai_agent
+
+    agent = openai_agent.agent.clone(model=ScriptedModel(ReplayScript(), think_time=args.think_time))
+
+    async def open_session(number):
+        return SQLiteSession(f'replay-{number}')
+
+    async def run_turn(message, session):
+        with instrumentation.turn() as stats:
+            await openai_agent.respond(message, session, starting_agent=agent)
+        return _measure(instrumentation, stats)
+
+    return asyncio.run(_replay(conversations, args, open_session, run_turn))
+
+
+def replay_adk(conversations, args):
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+    from google_adk_agent import adk_tools, agent as adk_agent, instrumentation
+
+    install(adk_tools, make_fake(args), instrumentation)
+    root_agent = adk_agent.build_root_agent('direct')
+    root_agent.model = ScriptedLlm(script=ReplayScript(), think_time=args.think_time)
+    runner = InMemoryRunner(agent=root_agent, app_name='replay')
+
+    async def open_session(number):
+        return await runner.session_service.create_session(app_name='replay', user_id='replay')
+
+    async def run_turn(message, session):
+        content = types.Content(role='user', parts=[types.Part(text=message)])
+        with instrumentation.turn() as stats:
+            async for _ in runner.run_async(user_id='replay', session_id=session.id, new_message=content):
+                pass
+        return _measure(instrumentation, stats)
+
+    return asyncio.run(_replay(conversations, args, open_session, run_turn))
+
+
+AGENTS = {
+    'openai': replay_openai,
+    'adk': replay_adk,
+}
+
+_FIELDS = ('model_calls', 'tool_calls', 'api_requests', 'tokens', 'memo_saved')
+
+
+def _rows(name, turns, elapsed):
+    """Summary rows for all turns and, for multi-turn conversations, for each turn position."""
+    def row(key, selected):
+        extra = {
+            field: sum(t[field] for t in selected) / len(selected)
+            for field in _FIELDS if all(t.get(field) is not None for t in selected)
+        }
+        # Throughput only applies to a timed replay of every turn
+        return summarize(key, [t['seconds'] for t in selected], elapsed if selected is turns else 0.0, extra)
+
+    rows = dict([row(name, turns)])
+    positions = sorted({t['position'] for t in turns})
+    if len(positions) > 1:
+        rows.update(row(f'{name}.turn{position}', [t for t in turns if t['position'] == position]) for position in positions)
+    return rows
+
+
+def run(args):
+    conversations = load_conversations(args.path)
+    if not conversations:
+        print(f'No recorded turns in {args.path}')
+        return 1
+    recorded = [
+        dict(record, position=position)
+        for turns in conversations for position, record in enumerate(turns, 1)
+    ]
+    results = _rows('recorded', recorded, 0.0)
+    for name in args.agents.split(','):
+        turns, elapsed = AGENTS[name.strip()](conversations, args)
+        results.update(_rows(f'replay.{name.strip()}', turns, elapsed))
+    print(f'{len(conversations)} conversations, {len(recorded)} turns, replayed {args.repeat}x at concurrency {args.concurrency}')
+    print_report(results, {})
+    return 0
+
+
+def record(args):
+    """Record SAMPLE_CONVERSATIONS through the OpenAI agent and the benchmark script."""
+    os.environ['RECORD_CONVERSATIONS'] = args.path
+    import instrumentation
+    import openai_tools
+    from agents import SQLiteSession, set_tracing_disabled
+
+    set_tracing_disabled(True)
+    install(openai_tools, make_fake(args), instrumentation)
+    import openai_agent
+
+    agent = openai_agent.agent.clone(model=ScriptedModel(workloads.SCRIPT, think_time=args.think_time))
+
+    async def record_all():
+        for number, messages in enumerate(SAMPLE_CONVERSATIONS):
+            session = SQLiteSession(f'sample-{number}')
+            for message in messages:
+                await openai_agent.respond(message, session, starting_agent=agent)
+
+    asyncio.run(record_all())
+    turns = sum(len(messages) for messages in SAMPLE_CONVERSATIONS)
+    print(f'Recorded {len(SAMPLE_CONVERSATIONS)} conversations ({turns} turns) to {args.path}')
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('record', 'run'))
+    parser.add_argument('path', help='Recording (JSONL, gzip-compressed if it ends in .gz)')
+    parser.add_argument('--agents', default='openai,adk', help='Comma-separated: ' + ', '.join(AGENTS))
+    parser.add_argument('--concurrency', type=int, default=8, help='Conversations replayed at once')
+    parser.add_argument('--repeat', type=int, default=1, help='Times each conversation is replayed')
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake Calendar API latency in seconds')
+    parser.add_argument('--jitter', action='store_true', help='Draw latency uniformly from 0.5x-1.5x --latency')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--think-time', type=float, default=0.05, help='Simulated model latency in seconds')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+    return record(args) if args.command == 'record' else run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
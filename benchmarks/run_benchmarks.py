@@ -0,0 +1,249 @@
+"""
+Offline benchmark suite for the calendar tools and both agents.
+
+Runs against the in-process FakeCalendar with scripted models, so no credentials or
+API keys are needed and results are reproducible for a given seed.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --workloads tools,openai --runs 50 --concurrency 8 --latency 0.05
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --threshold 0.2
+
+With --baseline, the exit status is 1 if any workload's throughput dropped or its p95
+latency grew by more than the threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+OPENAI_DIR = os.path.join(ROOT_DIR, 'openai_sdk_agent')
+sys.path[:0] = [BENCH_DIR, OPENAI_DIR, ROOT_DIR]
+os.environ.setdefault('SEARCH_INDEX', ':memory:')
+
+from fake_calendar import FakeCalendar, install
+from stub_llm import ScriptedLlm, ScriptedModel
+import workloads
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(name, latencies, elapsed, extra=None):
+    result = {
+        'runs': len(latencies),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+    result.update(extra or {})
+    return name, result
+
+
+def make_fake(args):
+    latency = (args.latency * 0.5, args.latency * 1.5) if args.jitter else args.latency
+    fake = FakeCalendar(latency=latency, error_rate=args.error_rate, seed=args.seed)
+    workloads.seed(fake)
+    return fake
+
+
+# Workloads
+
+def run_tools(args):
+    import instrumentation
+    import openai_tools
+
+    fake = make_fake(args)
+    install(openai_tools, fake, instrumentation)
+    results = {}
+    for name, operation in workloads.tool_operations(openai_tools):
+        latencies = []
+
+        def timed_call(_):
+            began = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - began)
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(timed_call, range(args.runs)))
+        key, summary = summarize(f'tools.{name}', latencies, time.perf_counter() - began)
+        results[key] = summary
+    return results
+
+
+# Per-turn measurements averaged per scenario. result_bytes is the JSON the model reads back from
+# tools, api_bytes what the Calendar API sent.
+_FIELDS = ('model_calls', 'tool_calls', 'api_requests', 'result_bytes', 'api_bytes', 'tokens', 'memo_saved')
+
+
+async def _run_scenarios(args, prefix, run_one):
+    """Run each scenario `args.runs` times with bounded concurrency and summarize per scenario."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def guarded(message):
+        async with semaphore:
+            return await run_one(message)
+
+    results = {}
+    for scenario, message in workloads.SCENARIOS.items():
+        began = time.perf_counter()
+        records = await asyncio.gather(*(guarded(message) for _ in range(args.runs)))
+        key, summary = summarize(
+            f'{prefix}.{scenario}',
+            [r['seconds'] for r in records],
+            time.perf_counter() - began,
+            {field: sum(r[field] for r in records) / len(records) for field in _FIELDS},
+        )
+        results[key] = summary
+    return results
+
+
+def run_openai(args):
+    import instrumentation
+    import openai_tools
+    import tool_memo
+    from agents import Runner, set_tracing_disabled
+
+    set_tracing_disabled(True)
+    install(openai_tools, make_fake(args), instrumentation)
+    import openai_agent
+
+    model = ScriptedModel(workloads.SCRIPT, think_time=args.think_time)
+    agent = openai_agent.agent.clone(model=model)
+
+    async def run_one(message):
+        with instrumentation.turn() as stats, tool_memo.memo_run():
+            result = await Runner.run(agent, input=message, hooks=openai_agent.hooks)
+        return {
+            'message': message,
+            'seconds': stats.total_seconds,
+            'model_calls': stats.calls.get(instrumentation.LLM, 0),
+            'tool_calls': stats.calls.get(instrumentation.TOOL, 0),
+            'api_requests': stats.calls.get(instrumentation.HTTP, 0),
+            'result_bytes': stats.bytes_received.get(instrumentation.TOOL, 0),
+            'api_bytes': stats.bytes_received.get(instrumentation.HTTP, 0),
+            'tokens': result.context_wrapper.usage.total_tokens,
+            'memo_saved': stats.counters.get('tool_memo_hits', 0),
+        }
+
+    return asyncio.run(_run_scenarios(args, 'openai', run_one))
+
+
+def run_adk(args, topology='direct'):
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+    from google_adk_agent import adk_tools, agent as adk_agent, instrumentation
+
+    install(adk_tools, make_fake(args), instrumentation)
+    script = workloads.SCRIPT if topology == 'direct' else workloads.NESTED_SCRIPT
+    llm = ScriptedLlm(script=script, think_time=args.think_time)
+    root_agent = adk_agent.build_root_agent(topology)
+    root_agent.model = llm
+    adk_agent.sharing_agent.model = llm
+    runner = InMemoryRunner(agent=root_agent, app_name='benchmark')
+
+    async def run_one(message):
+        session = await runner.session_service.create_session(app_name='benchmark', user_id='benchmark')
+        content = types.Content(role='user', parts=[types.Part(text=message)])
+        with instrumentation.turn() as stats:
+            async for _ in runner.run_async(user_id='benchmark', session_id=session.id, new_message=content):
+                pass
+        return {
+            'message': message,
+            'seconds': stats.total_seconds,
+            'model_calls': stats.calls.get(instrumentation.LLM, 0),
+            'tool_calls': stats.calls.get(instrumentation.TOOL, 0),
+            'api_requests': stats.calls.get(instrumentation.HTTP, 0),
+            'result_bytes': stats.bytes_received.get(instrumentation.TOOL, 0),
+            'api_bytes': stats.bytes_received.get(instrumentation.HTTP, 0),
+            'tokens': stats.tokens,
+            'memo_saved': stats.counters.get('tool_memo_hits', 0),
+        }
+
+    return asyncio.run(_run_scenarios(args, 'adk' if topology == 'direct' else f'adk_{topology}', run_one))
+
+
+WORKLOADS = {
+    'tools': run_tools,
+    'openai': run_openai,
+    'adk': run_adk,
+    'adk_nested': lambda args: run_adk(args, topology='nested'),
+}
+
+
+# Reporting
+
+def print_report(results, regressions):
+    columns = ('runs', 'throughput', 'p50_ms', 'p95_ms', 'p99_ms') + _FIELDS
+    print(f'{"workload":<30}' + ''.join(f'{c:>13}' for c in columns))
+    for name, row in results.items():
+        cells = ''.join(f'{row[c]:>13.2f}' if c in row else f'{"-":>13}' for c in columns)
+        flag = '  REGRESSION' if name in regressions else ''
+        print(f'{name:<30}{cells}{flag}')
+
+
+def compare(results, baseline, threshold):
+    regressions = {}
+    for name, row in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        reasons = []
+        if before['throughput'] and row['throughput'] < before['throughput'] * (1 - threshold):
+            reasons.append(f"throughput {before['throughput']:.2f} -> {row['throughput']:.2f}/s")
+        if before['p95_ms'] and row['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            reasons.append(f"p95 {before['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+        if reasons:
+            regressions[name] = reasons
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workloads', default='tools,openai,adk', help='Comma-separated: ' + ', '.join(WORKLOADS))
+    parser.add_argument('--runs', type=int, default=20, help='Runs per operation or scenario')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake Calendar API latency in seconds')
+    parser.add_argument('--jitter', action='store_true', help='Draw latency uniformly from 0.5x-1.5x --latency')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--think-time', type=float, default=0.05, help='Simulated model latency in seconds')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--save', help='Write results as JSON to this path')
+    parser.add_argument('--baseline', help='Compare against results saved with --save')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative regression (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.workloads.split(','):
+        results.update(WORKLOADS[name.strip()](args))
+
+    regressions = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    print_report(results, regressions)
+    for name, reasons in regressions.items():
+        print(f'{name}: ' + '; '.join(reasons))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
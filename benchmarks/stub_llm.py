@@ -0,0 +1,231 @@
+"""
+Scripted stand-ins for the OpenAI and Gemini models.
+
+A Script maps a user message to the steps the "model" takes for it: ToolCalls steps
+followed by a final Reply. The current step is derived from the tool calls already present
+in the conversation, so one model instance can serve many concurrent conversations and
+every run is reproducible.
+
+    script = Script({
+        'Delete my standup': [
+            ToolCalls(('get_calendar_events', {'time_min': '2025-01-06T00:00:00Z'})),
+            ToolCalls(('delete_calendar_event', lambda outputs, message: {'event_id': outputs[-1]['events'][0]['id']})),
+            Reply('Deleted your standup.'),
+        ],
+    })
+    agent = openai_agent.agent.clone(model=ScriptedModel(script))
+"""
+import ast
+import asyncio
+import itertools
+import json
+from typing import Any
+
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+
+
+class ToolCalls:
+    """
+    One model turn issuing tool calls. Each call is (tool_name, args), where args is a dict
+    or a callable receiving the tool results returned so far in this user turn and the
+    user message.
+    """
+
+    def __init__(self, *calls):
+        self.calls = calls
+
+    def resolve(self, outputs, message):
+        return [(name, args(outputs, message) if callable(args) else args) for name, args in self.calls]
+
+
+class If:
+    """
+    ToolCalls step taken only if condition(outputs, message) holds for the tool results
+    returned before it, e.g. a model asking again when a result looks cut off.
+    """
+
+    def __init__(self, condition, step):
+        self.condition = condition
+        self.step = step
+
+
+class Reply:
+    """Final model turn answering the user."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class Script:
+    """
+    Steps per user message. A message without an exact entry uses the longest key it
+    starts with, so sub-agent requests with embedded IDs can still be scripted.
+    """
+
+    def __init__(self, conversations, default_reply='Done.'):
+        self.conversations = conversations
+        self.default = Reply(default_reply)
+
+    def steps_for(self, message):
+        if message in self.conversations:
+            return self.conversations[message]
+        prefixes = [key for key in self.conversations if message.startswith(key)]
+        return self.conversations[max(prefixes, key=len)] if prefixes else []
+
+    def step(self, message, calls_seen, outputs=()):
+        seen = 0
+        for step in self.steps_for(message):
+            if isinstance(step, If):
+                if not step.condition(list(outputs[:seen]), message):
+                    continue
+                step = step.step
+            if isinstance(step, Reply):
+                return step
+            if calls_seen < seen + len(step.calls):
+                return step
+            seen += len(step.calls)
+        return self.default
+
+
+def _estimate_tokens(payload) -> int:
+    return max(1, len(json.dumps(payload, default=str)) // 4)
+
+
+def _parse_output(output):
+    if isinstance(output, (dict, list)):
+        return output
+    try:
+        return json.loads(output)
+    except (TypeError, ValueError):
+        try:
+            return ast.literal_eval(output)
+        except (ValueError, SyntaxError):
+            return output
+
+
+# OpenAI Agents SDK
+
+def _openai_turn_state(input_items):
+    """Return (user message, tool calls issued, tool outputs) since the last user message."""
+    if isinstance(input_items, str):
+        return input_items, 0, []
+    items = [item if isinstance(item, dict) else item.model_dump() for item in input_items]
+    last_user = max((i for i, item in enumerate(items) if item.get('role') == 'user'), default=-1)
+    message = ''
+    if last_user >= 0:
+        content = items[last_user]['content']
+        message = content if isinstance(content, str) else ''.join(part.get('text', '') for part in content)
+    turn = items[last_user + 1:]
+    calls = sum(1 for item in turn if item.get('type') == 'function_call')
+    outputs = [_parse_output(item['output']) for item in turn if item.get('type') == 'function_call_output']
+    return message, calls, outputs
+
+
+class ScriptedModel(Model):
+    """agents.Model returning scripted responses after an optional simulated think time."""
+
+    def __init__(self, script: Script, think_time: float = 0.0, name: str = 'scripted-model'):
+        self.script = script
+        self.think_time = think_time
+        self.name = name
+        self.calls = 0
+        self.tokens = 0
+        self._ids = itertools.count(1)
+
+    def __str__(self):
+        return self.name
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, **kwargs):
+        self.calls += 1
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+
+        message, calls_seen, outputs = _openai_turn_state(input)
+        step = self.script.step(message, calls_seen, outputs)
+        if isinstance(step, Reply):
+            output = [ResponseOutputMessage(
+                id=f'msg_{next(self._ids)}',
+                content=[ResponseOutputText(text=step.text, type='output_text', annotations=[])],
+                role='assistant',
+                status='completed',
+                type='message',
+            )]
+        else:
+            output = []
+            for name, args in step.resolve(outputs, message):
+                call_id = f'call_{next(self._ids)}'
+                output.append(ResponseFunctionToolCall(
+                    id=call_id, call_id=call_id, name=name, arguments=json.dumps(args),
+                    type='function_call', status='completed',
+                ))
+
+        input_tokens = _estimate_tokens([system_instructions, input])
+        output_tokens = _estimate_tokens([item.model_dump() for item in output])
+        self.tokens += input_tokens + output_tokens
+        usage = Usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens)
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError('ScriptedModel only supports Runner.run()')
+
+
+# Google ADK
+
+def _adk_turn_state(contents):
+    last_user = -1
+    for i, content in enumerate(contents):
+        if content.role == 'user' and any(part.text for part in content.parts or []):
+            last_user = i
+    message = ''
+    if last_user >= 0:
+        message = ''.join(part.text or '' for part in contents[last_user].parts)
+    calls, outputs = 0, []
+    for content in contents[last_user + 1:]:
+        for part in content.parts or []:
+            if part.function_call:
+                calls += 1
+            if part.function_response:
+                outputs.append(part.function_response.response)
+    return message, calls, outputs
+
+
+class ScriptedLlm(BaseLlm):
+    """ADK BaseLlm returning scripted responses after an optional simulated think time."""
+
+    model: str = 'scripted-gemini'
+    script: Any = None
+    think_time: float = 0.0
+    stats: dict = {}
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.stats['calls'] = self.stats.get('calls', 0) + 1
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+
+        message, calls_seen, outputs = _adk_turn_state(llm_request.contents)
+        step = self.script.step(message, calls_seen, outputs)
+        if isinstance(step, Reply):
+            parts = [types.Part(text=step.text)]
+        else:
+            parts = [
+                types.Part(function_call=types.FunctionCall(name=name, args=args))
+                for name, args in step.resolve(outputs, message)
+            ]
+
+        prompt_tokens = _estimate_tokens([c.model_dump(exclude_none=True) for c in llm_request.contents])
+        output_tokens = _estimate_tokens([p.model_dump(exclude_none=True) for p in parts])
+        self.stats['tokens'] = self.stats.get('tokens', 0) + prompt_tokens + output_tokens
+        yield LlmResponse(
+            content=types.Content(role='model', parts=parts),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
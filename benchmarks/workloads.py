@@ -0,0 +1,194 @@
+"""
+Reproducible benchmark workloads: seeded calendar data plus scripted conversations.
+
+Every scenario is a user message and the tool calls a model would make for it, following
+the instructions in the agent prompts (list calendars before using a named calendar, look
+an event up before changing it).
+"""
+from datetime import datetime, timedelta, timezone
+
+from stub_llm import If, Reply, Script, ToolCalls
+
+
+BASE = datetime(2025, 1, 6, tzinfo=timezone.utc)  # a Monday
+WORK_CALENDAR = 'work@example.com'
+PERSONAL_CALENDAR = 'me@example.com'
+
+
+def day_window(offset_days=0):
+    start = BASE + timedelta(days=offset_days)
+    return {
+        'time_min': start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'time_max': (start + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'max_results': 50,
+    }
+
+
+def open_range(offset_days=0):
+    """day_window() without max_results, as a model leaves it when it does not know how busy the day is."""
+    window = day_window(offset_days)
+    del window['max_results']
+    return window
+
+
+def seed(fake, events_per_calendar=200):
+    fake.add_calendar(WORK_CALENDAR, summary='Work')
+    fake.seed_events('primary', events_per_calendar, BASE, days=14)
+    work_events = fake.seed_events(WORK_CALENDAR, events_per_calendar, BASE, days=14, attendees=['team@example.com'])
+    # Every fourth work meeting also invites the user's personal address, so it is on both calendars
+    fake.add_calendar(PERSONAL_CALENDAR, summary='Personal')
+    fake.copy_events(PERSONAL_CALENDAR, work_events[::4])
+
+
+def _find(summary):
+    def pick(outputs, message):
+        events = outputs[-1].get('events', [])
+        matches = [e for e in events if e['summary'] == summary] or events
+        return matches[0]['id'] if matches else 'missing'
+    return pick
+
+
+SCENARIOS = {
+    'agenda': "What's on my calendar on Monday?",
+    'create': 'Schedule a team meeting on Tuesday at 2pm',
+    'multi_calendar': "What's on my work calendar on Monday?",
+    'delete': 'Delete the dentist appointment on Monday',
+    'invite': 'Invite sarah@example.com to the design review on Monday',
+    'repeat': 'Is my Monday busier than my work calendar on Monday?',
+    'search': 'Cancel my next dentist appointment',
+    'edit': 'Move my 10am design review on Monday to 4pm and invite sarah@example.com',
+    'week': 'What does my week look like starting Monday?',
+    'all_calendars': "What's on all my calendars on Monday?",
+    'unsized_day': 'What do I have on Wednesday?',
+    'next_events': "What's next on my calendar after Thursday noon?",
+}
+
+_STEPS = {
+    SCENARIOS['agenda']: [
+        ToolCalls(('get_calendar_events', day_window(0))),
+        Reply('Here is your Monday.'),
+    ],
+    SCENARIOS['week']: [
+        ToolCalls(('get_agenda', {'period': 'week', 'start_date': '2025-01-06'})),
+        Reply('Here is your week.'),
+    ],
+    SCENARIOS['all_calendars']: [
+        ToolCalls(('get_merged_events', day_window(0))),
+        Reply('Here is everything on your calendars on Monday.'),
+    ],
+    SCENARIOS['create']: [
+        ToolCalls(('add_calendar_event', {
+            'summary': 'Team meeting',
+            'start_time': '2025-01-07T14:00:00',
+            'end_time': '2025-01-07T15:00:00',
+            'timezone': 'UTC',
+        })),
+        Reply('Scheduled the team meeting.'),
+    ],
+    SCENARIOS['multi_calendar']: [
+        ToolCalls(('list_calendars', {})),
+        ToolCalls(('get_calendar_events', dict(day_window(0), calendar_id=WORK_CALENDAR))),
+        Reply('Here is your work calendar for Monday.'),
+    ],
+    SCENARIOS['delete']: [
+        ToolCalls(('get_calendar_events', day_window(0))),
+        ToolCalls(('delete_calendar_event', lambda outputs, message: {'event_id': _find('Dentist appointment')(outputs, message)})),
+        Reply('Deleted the dentist appointment.'),
+    ],
+    SCENARIOS['search']: [
+        ToolCalls(('search_events', {'query': 'dentist appointment', 'time_min': '2025-01-06T00:00:00', 'max_results': 5})),
+        ToolCalls(('delete_calendar_event', lambda outputs, message: {'event_id': _find('Dentist appointment')(outputs, message)})),
+        Reply('Cancelled your next dentist appointment.'),
+    ],
+    # Mutation tools resolve an event by title and time (event_resolver.py), so a multi-step edit
+    # needs no lookups: one narrow query for the first step, none for the event it created
+    SCENARIOS['edit']: [
+        ToolCalls(('update_calendar_event', {
+            'event_summary': 'Design review',
+            'event_date': '2025-01-06T10:00:00',
+            'start_time': '2025-01-06T16:00:00',
+            'timezone': 'UTC',
+        })),
+        ToolCalls(('invite_to_event', {
+            'event_summary': 'Design review',
+            'event_date': '2025-01-06T16:00:00',
+            'attendees': ['sarah@example.com'],
+            'timezone': 'UTC',
+        })),
+        Reply('Moved the design review to 4pm and invited sarah@example.com.'),
+    ],
+    # Without max_results the model cannot tell a full day from a cut-off one; seeing exactly the
+    # old default of ten events, it asks again for more
+    SCENARIOS['unsized_day']: [
+        ToolCalls(('get_calendar_events', open_range(2))),
+        If(lambda outputs, message: outputs[-1].get('count') == 10,
+           ToolCalls(('get_calendar_events', dict(open_range(2), max_results=50)))),
+        Reply('Here is your Wednesday.'),
+    ],
+    SCENARIOS['next_events']: [
+        ToolCalls(('get_calendar_events', {'time_min': '2025-01-09T12:00:00Z'})),
+        Reply('Here is what comes next.'),
+    ],
+    # Models often repeat a lookup after reasoning about it; tool_memo serves the repeats
+    SCENARIOS['repeat']: [
+        ToolCalls(('get_calendar_events', day_window(0))),
+        ToolCalls(('list_calendars', {})),
+        ToolCalls(('get_calendar_events', dict(day_window(0), calendar_id=WORK_CALENDAR))),
+        ToolCalls(('list_calendars', {}), ('get_calendar_events', day_window(0))),
+        Reply('Your primary calendar is busier on Monday.'),
+    ],
+}
+
+_INVITE_LOOKUP = ToolCalls(('get_calendar_events', day_window(0)))
+_INVITE_PREFIX = 'Invite sarah@example.com to event '
+
+# Both agents with invite_to_event attached directly (the ADK default, ADK_TOPOLOGY=direct)
+SCRIPT = Script(dict(_STEPS, **{
+    SCENARIOS['invite']: [
+        _INVITE_LOOKUP,
+        ToolCalls(('invite_to_event', lambda outputs, message: {
+            'event_id': _find('Design review')(outputs, message),
+            'attendees': ['sarah@example.com'],
+        })),
+        Reply('Invited sarah@example.com.'),
+    ],
+}))
+
+# With ADK_TOPOLOGY=nested the root agent reaches invite_to_event through
+# AgentTool(sharing_agent), whose tool name is the sub-agent's name, so the invite takes a
+# nested agent turn.
+NESTED_SCRIPT = Script(dict(_STEPS, **{
+    SCENARIOS['invite']: [
+        _INVITE_LOOKUP,
+        ToolCalls(('root_agent', lambda outputs, message: {
+            'request': _INVITE_PREFIX + _find('Design review')(outputs, message),
+        })),
+        Reply('Invited sarah@example.com.'),
+    ],
+    _INVITE_PREFIX: [
+        ToolCalls(('invite_to_event', lambda outputs, message: {
+            'event_id': message[len(_INVITE_PREFIX):],
+            'attendees': ['sarah@example.com'],
+        })),
+        Reply('Invitation sent.'),
+    ],
+}))
+
+
+def tool_operations(tools):
+    """Direct tool calls exercised by the 'tools' workload, in order, as (name, callable)."""
+    state = {}
+
+    def create():
+        result = tools.add_calendar_event(summary='Benchmark event', start_time='2025-01-08T10:00:00', timezone='UTC')
+        state['event_id'] = result.get('event_id')
+        return result
+
+    return [
+        ('list_calendars', tools.list_calendars),
+        ('get_calendar_events', lambda: tools.get_calendar_events(**day_window(0))),
+        ('search_events', lambda: tools.search_events('design review')),
+        ('add_calendar_event', create),
+        ('invite_to_event', lambda: tools.invite_to_event(state.get('event_id', 'missing'), ['sarah@example.com'])),
+        ('delete_calendar_event', lambda: tools.delete_calendar_event(state.get('event_id', 'missing'))),
+    ]
@@ -1 +1,11 @@
-from . import agent
+# The agent module is loaded on first access (ADK reads google_adk_agent.agent.root_agent) rather
+# than with the package: compute pool workers import modules of this package to run their
+# functions (see compute_pool.py), and loading the agent would start its metrics server,
+# write-behind queue and timers in every worker.
+import importlib
+
+
+def __getattr__(name):
+    if name == 'agent':
+        return importlib.import_module(f'{__name__}.agent')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
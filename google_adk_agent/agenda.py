@@ -0,0 +1,277 @@
+"""
+Precomputed day and week agendas.
+
+"What does my day/week look like?" is the most common request, and answering it used to
+mean fetching and formatting events through get_calendar_events() on every turn.
+AgendaBuilder keeps compact, already formatted agendas for today and the next seven days
+of each configured calendar. It builds them just after local midnight and again, for one
+calendar at a time, whenever that calendar changes, so get_agenda() can answer from memory.
+Changes made elsewhere (the web UI, a phone, invitations) do not reach the cache listeners,
+so a stored agenda is only served for `ttl` seconds after it was built.
+With AGENDA_FAST_PATH set, the agents answer the common phrasings of the question straight
+from the agenda, without a model call (see match_request()).
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache_manager import approximate_size, near_term_weight
+from .event_record import Event
+from .instrumentation import count
+from .time_utils import UTC, from_epoch, get_zone, local_midnight, to_epoch
+
+
+PERIODS = {'day': 1, 'week': 7}
+MIDNIGHT_DELAY = 60  # Seconds after local midnight at which the new day's agendas are built
+
+
+def format_agenda(events: Iterable[Event], calendar_id: str, period: str, first_day: date, timezone: str) -> dict:
+    """
+    Compact agenda for the days of a period: per day, its events as title and local
+    HH:MM-HH:MM times (all-day events flagged instead), plus location. Descriptions, links and
+    attendees are left out; get_calendar_events() has them.
+    """
+    zone = get_zone(timezone)
+    days = [first_day + timedelta(days=i) for i in range(PERIODS[period])]
+    entries = {day: [] for day in days}
+    total = 0
+    for event in events:
+        entry = {'id': event.id, 'summary': event.summary}
+        if event.all_day:
+            entry['all_day'] = True
+            first = date.fromisoformat(event.start_iso)
+            last = date.fromisoformat(event.end_iso) - timedelta(days=1)
+        else:
+            start = from_epoch(event.start).astimezone(zone)
+            end = from_epoch(event.end).astimezone(zone)
+            entry['time'] = f'{start:%H:%M}-{end:%H:%M}'
+            first, last = start.date(), (end - timedelta(seconds=1)).date()
+        if event.location:
+            entry['location'] = event.location
+        listed = False
+        for day in days:
+            if first <= day <= last:
+                entries[day].append(entry)
+                listed = True
+        total += listed
+
+    return {
+        'success': True,
+        'calendar_id': calendar_id,
+        'period': period,
+        'timezone': timezone,
+        'start': days[0].isoformat(),
+        'end': days[-1].isoformat(),
+        'count': total,
+        'days': [{'date': day.isoformat(), 'weekday': day.strftime('%A'), 'events': entries[day]} for day in days],
+    }
+
+
+def format_text(agenda: dict) -> str:
+    """Plain-text rendering of an agenda, for replies that skip the model."""
+    lines = []
+    for day in agenda['days']:
+        heading = datetime.strptime(day['date'], '%Y-%m-%d').strftime('%A, %B %d').replace(' 0', ' ')
+        lines.append(f'{heading}:')
+        if not day['events']:
+            lines.append('- Nothing scheduled')
+        for entry in day['events']:
+            when = 'All day' if entry.get('all_day') else entry['time']
+            where = f" ({entry['location']})" if entry.get('location') else ''
+            lines.append(f"- {when} {entry['summary']}{where}")
+    return '\n'.join(lines)
+
+
+# Phrasings answered by the fast path. Anything more specific (another calendar, a date, a
+# follow-up action) falls through to the model.
+_REQUEST_RES = [re.compile(pattern) for pattern in (
+    r"(?:what(?:'s| is| does)|how(?:'s| is| does)) my (?P<period>day|week)(?: look| looking)?(?: like)?(?P<when> today| tomorrow| this week| next week)?",
+    r"what(?:'s| is) (?:on )?my (?:calendar|schedule|agenda)(?: for| look like)?(?P<when> today| tomorrow| this week| next week)",
+    r"(?:show|give|tell) me my (?:agenda|schedule|calendar)(?: for)?(?P<when> today| tomorrow| this week| next week)",
+)]
+
+
+def match_request(message: str, today: date) -> Optional[Tuple[str, date]]:
+    """Return (period, first day) if message is a plain request for the day's or week's agenda."""
+    text = re.sub(r'\s+', ' ', message.lower().replace('’', "'")).strip().rstrip('?.! ')
+    text = re.sub(r',? please$', '', text)
+    for pattern in _REQUEST_RES:
+        match = pattern.fullmatch(text)
+        if match is None:
+            continue
+        period = match.groupdict().get('period')
+        when = (match.group('when') or '').strip()
+        if when == 'tomorrow':
+            return (period or 'day'), today + timedelta(days=1)
+        if when == 'next week':
+            return 'week', today + timedelta(days=7 - today.weekday())
+        if when == 'this week':
+            return 'week', today
+        if period == 'week' and when == 'today':
+            return None
+        return (period or 'day'), today
+    return None
+
+
+class AgendaBuilder:
+    """
+    Precomputed agendas per calendar, timezone, period and first day.
+
+    Args:
+        fetch_events: fetch_events(calendar_id, start, end, timezone) returns every event in
+                      the epoch range [start, end)
+        generation: generation(calendar_id) returns the calendar's cache generation; an agenda
+                    built at an older generation is stale
+        timezone: Returns the timezone agendas are built in
+        calendar_ids: Calendars whose agendas are precomputed
+        manager: Optional CacheManager (see cache_manager.py) whose memory budget stored agendas count against
+        ttl: Seconds a stored agenda is served before it is built again. 0 stores no agendas.
+    """
+
+    def __init__(
+        self,
+        fetch_events: Callable[[str, int, int, str], List[Event]],
+        generation: Callable[[str], int],
+        timezone: Callable[[], str],
+        calendar_ids: Iterable[str] = ('primary',),
+        manager=None,
+        ttl: float = 0.0
+    ):
+        self.fetch_events = fetch_events
+        self.manager = manager
+        self.ttl = ttl
+        self.generation = generation
+        self.timezone = timezone
+        self.calendar_ids = tuple(calendar_ids)
+        self.builds = 0
+        self._agendas = {}  # (calendar_id, timezone, period, first_day) -> (generation, agenda, built_at)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agenda')
+        self._timer = None
+
+    def today(self, timezone: Optional[str] = None) -> date:
+        return local_midnight(timezone or self.timezone()).date()
+
+    def get(self, calendar_id: str, period: str = 'day', first_day: Optional[date] = None,
+            timezone: Optional[str] = None, use_stored: bool = True) -> dict:
+        """Return an agenda, building it now if there is none, it is older than ttl or the calendar changed since it was built."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period {period!r}, expected one of {', '.join(PERIODS)}")
+        timezone = timezone or self.timezone()
+        first_day = first_day or self.today(timezone)
+        use_stored = use_stored and self.ttl > 0
+        if use_stored:
+            with self._lock:
+                stored = self._agendas.get((calendar_id, timezone, period, first_day))
+            if stored is not None and stored[0] == self.generation(calendar_id) and time.monotonic() - stored[2] < self.ttl:
+                count('agenda_hits')
+                self._record((calendar_id, timezone, period, first_day), True)
+                return stored[1]
+            self._record(None, False)
+        count('agenda_misses')
+        return self.build(calendar_id, first_day, timezone, (period,), store=use_stored)[period]
+
+    def build(self, calendar_id: str, first_day: date, timezone: str,
+              periods: Iterable[str] = tuple(PERIODS), store: bool = True) -> Dict[str, dict]:
+        """Build the agendas of several periods starting on first_day from one fetch covering the longest."""
+        periods = tuple(periods)
+        generation = self.generation(calendar_id)
+        built_at = time.monotonic()
+        start = to_epoch(first_day, timezone)
+        end = to_epoch(first_day + timedelta(days=max(PERIODS[period] for period in periods)), timezone)
+        events = self.fetch_events(calendar_id, start, end, timezone)
+
+        built = {}
+        for period in periods:
+            period_end = to_epoch(first_day + timedelta(days=PERIODS[period]), timezone)
+            built[period] = format_agenda([e for e in events if e.start < period_end], calendar_id, period, first_day, timezone)
+        if store and self.ttl > 0:
+            stored = {(calendar_id, timezone, period, first_day): (generation, agenda, built_at) for period, agenda in built.items()}
+            with self._lock:
+                self._agendas.update(stored)
+            self._track(stored, start)
+        self.builds += 1
+        return built
+
+    # Memory budget (see cache_manager.py)
+
+    def _record(self, key, hit: bool):
+        if self.manager is not None:
+            self.manager.record('agendas', hit)
+            if hit:
+                self.manager.touch('agendas', key)
+
+    def _track(self, stored: dict, start: int):
+        if self.manager is None:
+            return
+        for key, value in stored.items():
+            end = start + PERIODS[key[2]] * 86400
+            self.manager.add('agendas', key, approximate_size(value[1]), lambda key=key, value=value: self._evict(key, value),
+                             weight=near_term_weight(start, end))
+
+    def _evict(self, key, value):
+        with self._lock:
+            if self._agendas.get(key) is value:
+                del self._agendas[key]
+
+    # Scheduled and incremental builds
+
+    def precompute(self):
+        """Build today's day and week agendas of every configured calendar and drop past days'."""
+        timezone = self.timezone()
+        today = self.today(timezone)
+        with self._lock:
+            past = [key for key in self._agendas if key[3] < today]
+            for key in past:
+                del self._agendas[key]
+        if self.manager is not None:
+            for key in past:
+                self.manager.remove('agendas', key)
+        for calendar_id in self.calendar_ids:
+            try:
+                self.build(calendar_id, today, timezone)
+            except Exception:
+                count('agenda_errors')  # Built on demand by get() instead
+
+    def refresh(self, calendar_id: Optional[str]):
+        """Rebuild the stored agendas of a calendar (every calendar if None) in the background."""
+        with self._lock:
+            keys = [key for key in self._agendas if calendar_id is None or key[0] == calendar_id]
+            targets = {(key[0], key[1], key[3]) for key in keys} - self._refreshing
+            self._refreshing |= targets
+        for target in targets:
+            self._executor.submit(self._rebuild, *target)
+
+    def _rebuild(self, calendar_id: str, timezone: str, first_day: date):
+        with self._lock:
+            self._refreshing.discard((calendar_id, timezone, first_day))
+            periods = [key[2] for key in self._agendas if key[:2] == (calendar_id, timezone) and key[3] == first_day]
+        try:
+            self.build(calendar_id, first_day, timezone, periods or tuple(PERIODS))
+        except Exception:
+            count('agenda_errors')
+
+    def start(self):
+        """Precompute now, and again just after every local midnight."""
+        self._executor.submit(self.precompute)
+        self._schedule()
+
+    def _schedule(self):
+        delay = (local_midnight(self.timezone(), days=1) - datetime.now(UTC)).total_seconds() + MIDNIGHT_DELAY
+        self._timer = threading.Timer(delay, self._at_midnight)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _at_midnight(self):
+        self._executor.submit(self.precompute)
+        self._schedule()
+
+    def shutdown(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,7 +1,105 @@
+import os
+
 from google.adk.agents.llm_agent import Agent
 from google.adk.tools import AgentTool
-from .adk_tools import add_calendar_event, get_calendar_events, delete_calendar_event, update_calendar_event, list_calendars, invite_to_event, get_time_info
-
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from . import deadlines, event_resolver, instrumentation, profiling, tool_memo, transcripts
+from .adk_tools import add_calendar_event, get_agenda, get_calendar_events, get_merged_events, delete_calendar_event, update_calendar_event, list_calendars, invite_to_event, find_meeting_times, search_events, import_calendar_events, export_calendar_events, get_time_info, prefetch_calendar_data, answer_agenda_request, start_background_tasks
+from .tool_memo import invalidates, memoize
+
+
+# Set METRICS_PORT to expose Prometheus metrics, OTEL_TRACING=1 to emit OpenTelemetry spans
+if os.getenv('METRICS_PORT'):
+    instrumentation.start_metrics_server(int(os.getenv('METRICS_PORT')))
+if os.getenv('OTEL_TRACING'):
+    instrumentation.enable_opentelemetry()
+
+# Start the write-behind queue, snapshot and agendas as configured, and warming the calendar
+# cache (needs CALENDAR_PREFETCH), when the agent is loaded. Compute pool workers never load
+# this module (see __init__.py).
+start_background_tasks()
+prefetch_calendar_data()
+
+# Set RECORD_CONVERSATIONS=path to record turns for benchmarks/replay.py
+_recorder = transcripts.open_recorder('adk')
+# Set PROFILE_SAMPLE_RATE or PROFILE_TURN to write sampled profiles of turns (see profiling.py)
+_profiler = profiling.open_profiler()
+# Set AGENDA_FAST_PATH=1 to answer plain "what does my day/week look like?" messages from the
+# precomputed agenda (see agenda.py) without a model call
+AGENDA_FAST_PATH = bool(os.getenv('AGENDA_FAST_PATH'))
+# Set AGENT_RUN_TIMEOUT to stop a turn, and the tool calls it started, after that many seconds
+RUN_TIMEOUT = deadlines.env_seconds('AGENT_RUN_TIMEOUT')
+
+_turns = {}
+_llm_spans = {}
+
+def start_turn(callback_context):
+    content = callback_context.user_content
+    message = ''.join(part.text or '' for part in (content.parts or [])) if content else ''
+    stats = instrumentation.begin_turn()
+    profile = _profiler.begin(stats, callback_context.session.id) if _profiler is not None else None
+    transcript = _recorder.begin(callback_context.session.id, message, stats) if _recorder is not None else None
+    # Repeated read-tool calls within the turn are served from tool_memo; writes clear it, and
+    # events seen earlier in the session can be referred to by title (see event_resolver.py).
+    # Tool calls and Calendar requests stop at the turn's deadline (see deadlines.py).
+    _turns[callback_context.invocation_id] = (
+        stats, tool_memo.begin_run(), transcript, event_resolver.begin_session(callback_context.session.id),
+        deadlines.begin(RUN_TIMEOUT), profile
+    )
+    reply = answer_agenda_request(message) if AGENDA_FAST_PATH else None
+    if reply is not None:
+        if transcript is not None:
+            transcript.reply = reply
+        # ADK skips after_agent_callback when this callback returns content, so end the turn here
+        end_turn(callback_context)
+        return types.Content(role='model', parts=[types.Part(text=reply)])
+    # Warm the calendar cache while the model works on the message (needs CALENDAR_PREFETCH)
+    prefetch_calendar_data()
+
+def end_turn(callback_context):
+    turn = _turns.pop(callback_context.invocation_id, None)
+    if turn is not None:
+        stats, memo, transcript, resolver_session, deadline, profile = turn
+        if transcript is not None:
+            _recorder.finish(transcript)
+        if profile is not None:
+            _profiler.finish(profile)
+        deadlines.end(deadline)
+        event_resolver.end_session(resolver_session)
+        tool_memo.end_run(memo)
+        instrumentation.end_turn(stats)
+
+def record_tool_call(tool, args, tool_context, tool_response):
+    turn = _turns.get(tool_context.invocation_id)
+    if turn is not None and turn[2] is not None:
+        turn[2].add_tool_call(tool.name, args, tool_response)
+
+def start_llm_span(callback_context, llm_request):
+    deadline = deadlines.current()
+    if deadline is not None and deadline.expired:
+        # Out of time: answer in place of the model, which ends the turn
+        instrumentation.count('run_timeouts')
+        turn = _turns.get(callback_context.invocation_id)
+        if turn is not None and turn[2] is not None:
+            turn[2].reply = deadlines.TIMEOUT_REPLY
+        return LlmResponse(content=types.Content(role='model', parts=[types.Part(text=deadlines.TIMEOUT_REPLY)]))
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    _llm_spans[key] = instrumentation.Span(instrumentation.LLM, llm_request.model or 'gemini').start()
+
+def end_llm_span(callback_context, llm_response):
+    span = _llm_spans.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if span is not None:
+        if llm_response.usage_metadata:
+            span.attributes['tokens'] = llm_response.usage_metadata.total_token_count or 0
+        span.error = llm_response.error_code is not None
+        span.finish()
+    turn = _turns.get(callback_context.invocation_id)
+    if turn is not None and turn[2] is not None and llm_response.content:
+        # The last text the model produces in the turn is its reply
+        text = ''.join(part.text or '' for part in llm_response.content.parts or [] if not part.thought)
+        if text:
+            turn[2].reply = text
 
 
 sharing_agent = Agent(
@@ -18,13 +116,13 @@ sharing_agent = Agent(
     - invite_to_event() - Add attendees to an existing event and send email invitations
 
     """,
-    tools = [invite_to_event]
+    tools = [invalidates(invite_to_event)],
+    before_model_callback=start_llm_span,
+    after_model_callback=end_llm_span
 )
-root_agent = Agent(
-    model='gemini-2.5-flash',
-    name='root_agent',
-    description='A helpful schedule management assistant to help the user manage their calendar and tasks.',
-    instruction=f"""
+
+
+ROOT_INSTRUCTION = f"""
     You are a helpful assistant with access to Google Calendar. You can help users schedule events and manage their calendar.
 
     {get_time_info()}
@@ -37,23 +135,63 @@ root_agent = Agent(
     You have access to the following tools to complete the task the user asks you.
     - list_calendars() - List all available calendars the user has access to
     - add_calendar_event() - Add a new event to a calendar (supports attendees for sending invites)
+    - get_agenda() - Get a compact agenda of a day or a week; precomputed, so it is the fastest way to see a schedule
     - get_calendar_events() - Retrieve upcoming events from a calendar (supports calendar_id parameter)
-    - update_calendar_event() - Update an event on a calendar (requires event_id and calendar_id)
-    - delete_calendar_event() - Delete an event from a calendar (requires event_id and calendar_id)
+    - get_merged_events() - Retrieve events from several or all calendars as one list, listing shared meetings once
+    - search_events() - Find events by keywords in their title, description, location or attendees
+    - update_calendar_event() - Update an event on a calendar (by event_id, or by event_summary and event_date)
+    - delete_calendar_event() - Delete an event from a calendar (by event_id, or by event_summary and event_date)
     - invite_to_event() - Add attendees to an existing event and send email invitations
+    - find_meeting_times() - Find times when a group of attendees are all free
+    - import_calendar_events() - Import events from an .ics or .csv file in the import/export folder (skips events that already exist)
+    - export_calendar_events() - Export events in a time range to an .ics file in the import/export folder (replaces an existing file only if the user asks)
 
     IMPORTANT: The user may have multiple calendars. When the user mentions a specific calendar by name
     (e.g., "work calendar", "personal calendar", "family calendar"), first use list_calendars() to find
-    the correct calendar_id, then use that ID with the calendar functions.
+    the correct calendar_id, then use that ID with the calendar functions. When the user asks about all of
+    their calendars, use get_merged_events() instead of calling get_calendar_events() for each one.
 
-    When deleting or updating events, first use get_calendar_events() to find the event and get its event_id,
-    then use delete_calendar_event() or update_calendar_event() with that ID.
+    To delete, update or invite people to an event, pass its event_id if you already have it. Otherwise pass its
+    title as event_summary and its date (or time) as event_date, e.g. delete_calendar_event(event_summary="Dentist appointment",
+    event_date="2025-01-15"), and the tool finds the event; there is no need to look it up first. If the tool reports
+    several matching events, call it again with the event_id of the one the user means.
 
     If no specific calendar is mentioned, use the primary calendar (calendar_id='primary').
 
     If you make any changes to the user's calendar, include a summary of those changes below.
-    When the user asks about their schedule or upcoming events, use get_calendar_events() to retrieve them.
-
-    """,
-    tools = [list_calendars, add_calendar_event, get_calendar_events, update_calendar_event, delete_calendar_event, AgentTool(sharing_agent)]
-)
+    When the user asks what their day or week looks like, use get_agenda(). For other time ranges, or when
+    event descriptions are needed, use get_calendar_events().
+
+    """
+
+# ADK_TOPOLOGY decides how the root agent reaches invite_to_event:
+#   direct (default) - attached to the root agent like every other tool
+#   nested           - through AgentTool(sharing_agent), which costs an extra sub-agent model
+#                      round trip (with its own prompt) for every invite
+# Deterministic single-call tools gain nothing from a sub-agent, so direct is the default.
+TOPOLOGIES = ('direct', 'nested')
+
+
+def build_root_agent(topology: str = 'direct') -> Agent:
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown ADK_TOPOLOGY {topology!r}, expected one of {', '.join(TOPOLOGIES)}")
+    tools = [
+        memoize(list_calendars), invalidates(add_calendar_event), memoize(get_calendar_events), memoize(get_agenda), memoize(get_merged_events), invalidates(update_calendar_event),
+        invalidates(delete_calendar_event), memoize(find_meeting_times), memoize(search_events), invalidates(import_calendar_events), export_calendar_events,
+    ]
+    tools.append(invalidates(invite_to_event) if topology == 'direct' else AgentTool(sharing_agent))
+    return Agent(
+        model='gemini-2.5-flash',
+        name='root_agent',
+        description='A helpful schedule management assistant to help the user manage their calendar and tasks.',
+        instruction=ROOT_INSTRUCTION,
+        tools=tools,
+        before_agent_callback=start_turn,
+        after_agent_callback=end_turn,
+        before_model_callback=start_llm_span,
+        after_model_callback=end_llm_span,
+        after_tool_callback=record_tool_call
+    )
+
+
+root_agent = build_root_agent(os.getenv('ADK_TOPOLOGY', 'direct'))
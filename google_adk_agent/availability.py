@@ -0,0 +1,227 @@
+"""
+Group scheduling: find meeting times that work for many attendees.
+
+Busy times come from freebusy queries, split into chunks of at most FREEBUSY_CALENDARS
+calendars and FREEBUSY_DAYS days and run concurrently. Each attendee's busy intervals are
+widened by the meeting length, so "the slot starting at t overlaps a busy interval" becomes
+"t falls inside a widened interval"; a single sweep over all attendees' widened intervals then
+gives the weight of conflicting attendees for every possible start time. Candidate starts
+inside working hours are ranked from that profile and the caller's time preferences.
+"""
+import contextvars
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .time_utils import from_epoch, get_zone, localize, to_epoch, to_rfc3339
+
+
+FREEBUSY_CALENDARS = 50  # The API rejects queries for more calendars than this
+FREEBUSY_DAYS = 28
+OPTIONAL_WEIGHT = 0.3
+
+Interval = Tuple[int, int]
+
+
+def _chunks(items: Sequence, size: int) -> Iterable[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fetch_busy(
+    get_service: Callable,
+    calendars: Sequence[str],
+    start: int,
+    end: int,
+    max_workers: int = 8
+) -> Tuple[Dict[str, List[Interval]], Dict[str, str]]:
+    """
+    Query busy intervals for every calendar in the epoch range [start, end).
+
+    Returns:
+        tuple: (busy, errors) where busy maps each calendar to its (start, end) epoch
+               intervals and errors maps calendars the API could not read to the reason
+    """
+    calendars = list(dict.fromkeys(calendars))
+    windows = [(s, min(s + FREEBUSY_DAYS * 86400, end)) for s in range(start, end, FREEBUSY_DAYS * 86400)]
+    queries = [(chunk, window) for chunk in _chunks(calendars, FREEBUSY_CALENDARS) for window in windows]
+
+    def query(chunk, window):
+        # httplib2 connections are not thread-safe, so each query builds its own service
+        return get_service().freebusy().query(body={
+            'timeMin': to_rfc3339(from_epoch(window[0])),
+            'timeMax': to_rfc3339(from_epoch(window[1])),
+            'timeZone': 'UTC',
+            'items': [{'id': calendar_id} for calendar_id in chunk],
+        }).execute(num_retries=3)
+
+    busy = {calendar_id: [] for calendar_id in calendars}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+        # Each query runs in its own copy of this context, so it keeps the request's deadline, stats and memo
+        contexts = [contextvars.copy_context() for _ in queries]
+        for result in pool.map(lambda context, q: context.run(query, *q), contexts, queries):
+            for calendar_id, data in result.get('calendars', {}).items():
+                if data.get('errors'):
+                    errors[calendar_id] = data['errors'][0].get('reason', 'unknown')
+                    continue
+                busy.setdefault(calendar_id, []).extend(
+                    (to_epoch(period['start']), to_epoch(period['end'])) for period in data.get('busy', [])
+                )
+    for calendar_id in errors:
+        busy.pop(calendar_id, None)
+    return busy, errors
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Return the union of intervals as sorted, non-overlapping intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class ConflictProfile:
+    """
+    Piecewise-constant weight and count of attendees who cannot make a meeting of
+    `duration` seconds, as a function of its start time.
+
+    Args:
+        busy: Busy intervals per attendee
+        duration: Meeting length in seconds
+        weights: Weight per attendee (default: 1.0)
+    """
+
+    def __init__(self, busy: Dict[str, List[Interval]], duration: int, weights: Optional[Dict[str, float]] = None):
+        weights = weights or {}
+        self.duration = duration
+        self.busy = {}
+        edges = []
+        for attendee, intervals in busy.items():
+            merged = merge_intervals(intervals)
+            self.busy[attendee] = merged
+            weight = weights.get(attendee, 1.0)
+            # A meeting starting at t overlaps [s, e) exactly when s - duration < t < e
+            for s, e in merge_intervals((s - duration + 1, e) for s, e in merged):
+                edges.append((s, weight, 1))
+                edges.append((e, -weight, -1))
+        edges.sort()
+
+        self.times = [float('-inf')]
+        self.weights = [0.0]
+        self.counts = [0]
+        weight, count = 0.0, 0
+        for time, delta_weight, delta_count in edges:
+            weight += delta_weight
+            count += delta_count
+            if time == self.times[-1]:
+                self.weights[-1], self.counts[-1] = weight, count
+            else:
+                self.times.append(time)
+                self.weights.append(weight)
+                self.counts.append(count)
+
+    def at(self, start: int) -> Tuple[float, int]:
+        """Return (conflicting weight, conflicting attendees) for a meeting starting at `start`."""
+        i = bisect_right(self.times, start) - 1
+        return max(self.weights[i], 0.0), self.counts[i]
+
+    def conflicts(self, start: int) -> List[str]:
+        """Return the attendees who are busy during a meeting starting at `start`."""
+        end = start + self.duration
+        names = []
+        for attendee, intervals in self.busy.items():
+            i = bisect_right(intervals, (end,)) - 1
+            if i >= 0 and intervals[i][1] > start:
+                names.append(attendee)
+        return names
+
+
+def candidate_starts(
+    start: int,
+    end: int,
+    duration: int,
+    tz: str,
+    step: int = 900,
+    working_hours: Tuple[int, int] = (9, 17),
+    weekdays: Iterable[int] = range(5)
+) -> Iterator[int]:
+    """Yield meeting start times (epoch) every `step` seconds within working hours in `tz`."""
+    weekdays = set(weekdays)
+    zone = get_zone(tz)
+    day = from_epoch(start).astimezone(zone).date()
+    last_day = from_epoch(end).astimezone(zone).date()
+    while day <= last_day:
+        if day.weekday() in weekdays:
+            midnight = datetime(day.year, day.month, day.day)
+            open_at = to_epoch(localize(midnight + timedelta(hours=working_hours[0]), tz))
+            close_at = to_epoch(localize(midnight + timedelta(hours=working_hours[1]), tz))
+            t = open_at
+            if t < start:
+                t += -(-(start - t) // step) * step  # first aligned step at or after start
+            while t + duration <= min(close_at, end):
+                yield t
+                t += step
+        day += timedelta(days=1)
+
+
+def _preferred(start: int, tz: str, preferred_hours: Optional[Tuple[int, int]]) -> bool:
+    if preferred_hours is None:
+        return True
+    hour = from_epoch(start).astimezone(get_zone(tz)).hour
+    return preferred_hours[0] <= hour < preferred_hours[1]
+
+
+def find_slots(
+    busy: Dict[str, List[Interval]],
+    start: int,
+    end: int,
+    duration: int,
+    tz: str,
+    weights: Optional[Dict[str, float]] = None,
+    step: int = 900,
+    working_hours: Tuple[int, int] = (9, 17),
+    weekdays: Iterable[int] = range(5),
+    preferred_hours: Optional[Tuple[int, int]] = None,
+    max_results: int = 5
+) -> List[dict]:
+    """
+    Rank non-overlapping meeting slots in [start, end).
+
+    Slots are ranked by the weight of attendees who cannot make them, then by whether they
+    fall in preferred_hours, then by how soon they are, so a preference never costs an
+    attendee. A slot's score is the weighted share of attendees who are free.
+
+    Returns:
+        list: Up to max_results dicts with start, end (epoch), score, conflict_weight and
+              busy (attendees who cannot make it), best first
+    """
+    weights = weights or {}
+    total = sum(weights.get(attendee, 1.0) for attendee in busy) or 1.0
+    profile = ConflictProfile(busy, duration, weights)
+
+    ranked = []
+    for t in candidate_starts(start, end, duration, tz, step, working_hours, weekdays):
+        weight, _ = profile.at(t)
+        ranked.append((round(weight, 6), not _preferred(t, tz, preferred_hours), t))
+    ranked.sort()
+
+    slots = []
+    for weight, _, t in ranked:
+        if any(t < s['end'] and t + duration > s['start'] for s in slots):
+            continue
+        slots.append({
+            'start': t,
+            'end': t + duration,
+            'score': round(1.0 - weight / total, 4),
+            'conflict_weight': weight,
+            'busy': profile.conflicts(t),
+        })
+        if len(slots) >= max_results:
+            break
+    return slots
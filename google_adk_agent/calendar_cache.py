@@ -0,0 +1,396 @@
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+from .cache_manager import approximate_size, near_term_weight
+from .event_record import Event
+from .time_utils import get_zone
+
+
+class _Window:
+    __slots__ = ('start', 'end', 'events', 'fetched_at', 'generation')
+
+    def __init__(self, start, end, events, fetched_at, generation=0):
+        self.start = start
+        self.end = end
+        self.events = events
+        self.fetched_at = fetched_at
+        self.generation = generation
+
+    def covers(self, start: int, end: Optional[int]) -> bool:
+        if start < self.start:
+            return False
+        if self.end is None:
+            return True
+        return end is not None and end <= self.end
+
+    def between(self, start: int, end: Optional[int], tz=None) -> list:
+        if isinstance(self.events, list):
+            return [event for event in self.events if event.overlaps(start, end, tz)]
+        # Restored from a snapshot (see snapshot.py), which has an interval index
+        return self.events.between(start, end, tz)
+
+    def size(self) -> int:
+        if isinstance(self.events, list):
+            return approximate_size(self.events)
+        return self.events.nbytes
+
+
+def _contains(start, end, inner_start, inner_end) -> bool:
+    """True if [inner_start, inner_end) lies within [start, end). None means open-ended."""
+    return inner_start >= start and (end is None or (inner_end is not None and inner_end <= end))
+
+
+def _generation_key(calendar_id: Optional[str]) -> str:
+    return f'cache:generation:{calendar_id or "*"}'
+
+
+def _windows_key(calendar_id: str, timezone: str, generation: int) -> str:
+    return f'cache:events:{calendar_id}:{timezone}:{generation}'
+
+
+class CalendarCache:
+    """
+    Short-lived cache of calendar lists and complete event windows.
+
+    A window is stored only when it holds every event in its time range, so any query
+    inside it can be answered locally with the same filtering and ordering as the API.
+    Writes call invalidate(); results fetched before an invalidation are discarded.
+
+    With a shared store (see shared_store.py) the cache has a second tier that all worker
+    processes read and fill, and generations live in the store, so an invalidation by one
+    worker retires the entries every other worker holds in memory.
+
+    With a cache manager (see cache_manager.py) windows and the calendar list count against
+    the process's memory budget, and the manager may drop them before they expire.
+
+    Args:
+        ttl: Seconds an entry stays fresh. 0 disables the cache.
+        store: Optional shared store for the second tier
+        manager: Optional CacheManager for the in-memory tier
+    """
+
+    def __init__(self, ttl: float = 0.0, store=None, manager=None):
+        self.ttl = ttl
+        self.store = store
+        self.manager = manager
+        self._lock = threading.Lock()
+        self._calendars = None
+        self._windows = {}
+        self._generations = {}
+        self._pending = {}
+        self._listeners = []
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _fresh(self, fetched_at: float) -> bool:
+        return time.monotonic() - fetched_at < self.ttl
+
+    def generation(self, calendar_id: Optional[str] = None) -> int:
+        if self.store is not None:
+            return int(self.store.get(_generation_key(calendar_id)) or 0) + int(self.store.get(_generation_key(None)) or 0)
+        with self._lock:
+            return self._generations.get(calendar_id, 0) + self._generations.get(None, 0)
+
+    def has_calendars(self) -> bool:
+        generation = self.generation()
+        with self._lock:
+            if self._calendars is not None and self._fresh(self._calendars[0]) and self._calendars[2] == generation:
+                return True
+        return self._load_calendars(generation) is not None
+
+    def has_window(self, calendar_id: str, timezone: str, start: int, end: Optional[int]) -> bool:
+        """Return True if a fresh window covers [start, end), without counting a hit or miss."""
+        generation = self.generation(calendar_id)
+        with self._lock:
+            if self._local_window(calendar_id, timezone, start, end, generation) is not None:
+                return True
+        return self._load_window(calendar_id, timezone, start, end, generation) is not None
+
+    def event_density(self, calendar_id: str) -> Optional[float]:
+        """Events per day across the fresh bounded windows held in memory for a calendar, or None if there are none."""
+        generation = self.generation(calendar_id)
+        events = seconds = 0
+        with self._lock:
+            for (cached_id, _), windows in self._windows.items():
+                if cached_id != calendar_id:
+                    continue
+                for window in windows:
+                    if window.end is not None and self._fresh(window.fetched_at) and window.generation == generation:
+                        events += len(window.events)
+                        seconds += window.end - window.start
+        return events * 86400 / seconds if seconds else None
+
+    def _local_window(self, calendar_id, timezone, start, end, generation) -> Optional[_Window]:
+        for window in self._windows.get((calendar_id, timezone), ()):
+            if self._fresh(window.fetched_at) and window.generation == generation and window.covers(start, end):
+                return window
+        return None
+
+    # Shared tier. Entries carry wall-clock fetch times so every worker agrees on freshness.
+
+    def _load_calendars(self, generation: int) -> Optional[list]:
+        if self.store is None:
+            return None
+        stored = self.store.get(f'cache:calendars:{generation}')
+        if stored is None:
+            return None
+        fetched_at, calendars = json.loads(stored)
+        age = time.time() - fetched_at
+        if age >= self.ttl:
+            return None
+        with self._lock:
+            self._calendars = entry = (time.monotonic() - age, calendars, generation)
+        self._track_calendars(entry)
+        return calendars
+
+    def _load_window(self, calendar_id, timezone, start, end, generation) -> Optional[_Window]:
+        if self.store is None:
+            return None
+        stored = self.store.get(_windows_key(calendar_id, timezone, generation))
+        if stored is None:
+            return None
+        now = time.time()
+        for window_start, window_end, fetched_at, records in json.loads(stored):
+            age = now - fetched_at
+            if age < self.ttl and _Window(window_start, window_end, None, 0).covers(start, end):
+                window = _Window(
+                    window_start, window_end, [Event.from_record(r) for r in records], time.monotonic() - age, generation
+                )
+                with self._lock:
+                    replaced = self._store_local(calendar_id, timezone, window)
+                self._track(calendar_id, timezone, window, replaced)
+                return window
+        return None
+
+    def _save_window(self, calendar_id, timezone, window: _Window):
+        key = _windows_key(calendar_id, timezone, window.generation)
+        now = time.time()
+        stored = self.store.get(key)
+        windows = [
+            w for w in (json.loads(stored) if stored else ())
+            if now - w[2] < self.ttl and not _contains(window.start, window.end, w[0], w[1])
+        ]
+        windows.append([window.start, window.end, now, [event.to_record() for event in window.events]])
+        self.store.set(key, json.dumps(windows, separators=(',', ':')), ttl=self.ttl)
+
+    # Calendar list
+
+    def get_calendars(self) -> Optional[list]:
+        if not self.enabled:
+            return None
+        generation = self.generation()
+        with self._lock:
+            if self._calendars is not None and self._fresh(self._calendars[0]) and self._calendars[2] == generation:
+                self.hits += 1
+                calendars = self._calendars[1]
+            else:
+                calendars = None
+        if calendars is not None:
+            self._record('calendars', 'list', True)
+            return calendars
+        calendars = self._load_calendars(generation)
+        with self._lock:
+            if calendars is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._record('calendars', 'list', calendars is not None)
+        return calendars
+
+    def put_calendars(self, calendars: list, generation: Optional[int] = None):
+        if not self.enabled:
+            return
+        current = self.generation()
+        if generation is not None and generation != current:
+            return
+        with self._lock:
+            self._calendars = entry = (time.monotonic(), calendars, current)
+        self._track_calendars(entry)
+        if self.store is not None:
+            self.store.set(f'cache:calendars:{current}', json.dumps([time.time(), calendars]), ttl=self.ttl)
+
+    # Event windows
+
+    def get_events(self, calendar_id: str, timezone: str, start: int, end: Optional[int], max_results: int) -> Optional[list]:
+        """Return up to max_results events overlapping [start, end), ordered by start, or None on a miss."""
+        if not self.enabled:
+            return None
+        generation = self.generation(calendar_id)
+        with self._lock:
+            window = self._local_window(calendar_id, timezone, start, end, generation)
+        if window is None:
+            window = self._load_window(calendar_id, timezone, start, end, generation)
+        with self._lock:
+            if window is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self._record('events', (calendar_id, timezone, window), window is not None)
+        if window is None:
+            return None
+        # All-day events are matched by their dates in the query's time zone, as the API does
+        return window.between(start, end, get_zone(timezone))[:max_results]
+
+    def put_events(self, calendar_id: str, timezone: str, start: int, end: Optional[int], events: list, generation: Optional[int] = None):
+        """Store a complete window. `generation` is the value of generation() taken before fetching."""
+        if not self.enabled:
+            return
+        current = self.generation(calendar_id)
+        if generation is not None and generation != current:
+            return
+        window = _Window(start, end, sorted(events, key=lambda e: e.start), time.monotonic(), current)
+        with self._lock:
+            replaced = self._store_local(calendar_id, timezone, window)
+        self._track(calendar_id, timezone, window, replaced)
+        if self.store is not None:
+            self._save_window(calendar_id, timezone, window)
+
+    def _store_local(self, calendar_id, timezone, window: _Window) -> list:
+        """Add window, dropping expired windows and those it contains. Returns the dropped windows."""
+        key = (calendar_id, timezone)
+        windows, replaced = [], []
+        for w in self._windows.get(key, ()):
+            if self._fresh(w.fetched_at) and w.generation == window.generation and not _contains(window.start, window.end, w.start, w.end):
+                windows.append(w)
+            else:
+                replaced.append(w)
+        windows.append(window)
+        self._windows[key] = windows
+        return replaced
+
+    # Memory budget (see cache_manager.py). The manager is only called without self._lock held,
+    # since its eviction callbacks take the lock.
+
+    def _record(self, tier: str, key, hit: bool):
+        if self.manager is not None:
+            self.manager.record(tier, hit)
+            if hit:
+                self.manager.touch(tier, key)
+
+    def _track(self, calendar_id: str, timezone: str, window: _Window, replaced: list):
+        if self.manager is None:
+            return
+        for old in replaced:
+            self.manager.remove('events', (calendar_id, timezone, old))
+        self.manager.add(
+            'events', (calendar_id, timezone, window), window.size(),
+            lambda: self._evict_window(calendar_id, timezone, window),
+            weight=near_term_weight(window.start, window.end)
+        )
+
+    def _evict_window(self, calendar_id: str, timezone: str, window: _Window):
+        with self._lock:
+            windows = self._windows.get((calendar_id, timezone))
+            if windows is not None and window in windows:
+                windows.remove(window)
+
+    def _track_calendars(self, entry: tuple):
+        if self.manager is not None:
+            self.manager.add('calendars', 'list', approximate_size(entry[1]), lambda: self._evict_calendars(entry))
+
+    def _evict_calendars(self, entry: tuple):
+        with self._lock:
+            if self._calendars is entry:
+                self._calendars = None
+
+    def _forget(self, dropped: dict, calendars: bool):
+        if self.manager is None:
+            return
+        for (window_calendar, timezone), windows in dropped.items():
+            for window in windows:
+                self.manager.remove('events', (window_calendar, timezone, window))
+        if calendars:
+            self.manager.remove('calendars', 'list')
+
+    # Snapshots (see snapshot.py). Only this process's tier is saved and restored.
+
+    def snapshot_windows(self) -> list:
+        """Return (calendar_id, timezone, window start, window end, events, wall-clock fetch time) for every fresh window."""
+        if not self.enabled:
+            return []
+        offset = time.time() - time.monotonic()
+        windows = []
+        with self._lock:
+            items = list(self._windows.items())
+        for (calendar_id, timezone), calendar_windows in items:
+            generation = self.generation(calendar_id)
+            for window in calendar_windows:
+                if self._fresh(window.fetched_at) and window.generation == generation:
+                    windows.append((calendar_id, timezone, window.start, window.end, window.events, window.fetched_at + offset))
+        return windows
+
+    def restore_window(self, calendar_id: str, timezone: str, start: int, end: Optional[int], events, fetched: float) -> bool:
+        """
+        Store a window fetched at wall-clock time `fetched` if it is still fresh. events must be
+        ordered by start; a snapshot SectionView is kept as is and decoded on demand.
+        """
+        age = time.time() - fetched
+        if not self.enabled or age >= self.ttl:
+            return False
+        window = _Window(start, end, events, time.monotonic() - max(age, 0.0), self.generation(calendar_id))
+        with self._lock:
+            replaced = self._store_local(calendar_id, timezone, window)
+        self._track(calendar_id, timezone, window, replaced)
+        return True
+
+    def invalidate(self, calendar_id: Optional[str] = None):
+        """Drop cached data for one calendar, or everything when calendar_id is None."""
+        if self.store is not None:
+            self.store.incr(_generation_key(calendar_id))
+        with self._lock:
+            self._generations[calendar_id] = self._generations.get(calendar_id, 0) + 1
+            dropped = {key: windows for key, windows in self._windows.items() if calendar_id is None or key[0] == calendar_id}
+            for key in dropped:
+                del self._windows[key]
+            if calendar_id is None:
+                self._calendars = None
+        self._forget(dropped, calendar_id is None)
+        for listener in self._listeners:
+            listener(calendar_id)
+
+    def add_listener(self, callback: Callable[[Optional[str]], object]):
+        """Call callback(calendar_id) after every invalidate(), e.g. to rebuild data derived from the cache."""
+        self._listeners.append(callback)
+
+    # In-flight fetches
+
+    def track(self, key: tuple, future):
+        """Register a background fetch so callers needing the same data can wait for it."""
+        with self._lock:
+            self._pending[key] = future
+        future.add_done_callback(lambda _: self._untrack(key, future))
+
+    def _untrack(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def pending(self, key: tuple):
+        with self._lock:
+            return self._pending.get(key)
+
+    def wait_pending(self, key: tuple, timeout: float = 10.0) -> bool:
+        """Wait for an in-flight fetch for key. Returns True if one finished successfully."""
+        future = self.pending(key)
+        if future is None:
+            return False
+        try:
+            future.result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def clear(self):
+        with self._lock:
+            dropped = dict(self._windows)
+            self._calendars = None
+            self._windows.clear()
+            self.hits = 0
+            self.misses = 0
+        self._forget(dropped, True)
@@ -0,0 +1,267 @@
+"""
+Per-request deadlines and cooperative cancellation.
+
+A deadline is opened for each user turn (AGENT_RUN_TIMEOUT) and, optionally, for each tool
+call within it (TOOL_TIMEOUT). It lives in a context variable, so it reaches every tool and
+Calendar request of the turn, including tools run on worker threads. Calendar requests
+check it before they are sent, give up waiting on the socket when it passes, and are cut
+off when the turn is cancelled, e.g. because the user went away. Tools then return
+{'success': False, 'timed_out': True, ...} with whatever they finished.
+"""
+import contextvars
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+# Reply used when a turn runs out of time
+TIMEOUT_REPLY = (
+    'Sorry, that request took too long and was stopped before it finished. Some changes may '
+    'already have been made, so please check your calendar before trying again.'
+)
+
+_current = contextvars.ContextVar('current_deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    The request's deadline passed or the request was cancelled.
+
+    partial holds what the operation finished before it stopped, for the tool result.
+    """
+
+    def __init__(self, message: str, partial: Optional[dict] = None):
+        super().__init__(message)
+        self.partial = partial or {}
+
+
+class Deadline:
+    """
+    A point in time after which work for a request should stop, and a flag to stop it sooner.
+
+    Args:
+        seconds: Time allowed from now (None for no time limit, only cancellation)
+        parent: Enclosing deadline; this one never outlasts it and is cancelled with it
+    """
+
+    def __init__(self, seconds: Optional[float] = None, parent: Optional['Deadline'] = None):
+        self.parent = parent
+        self.seconds = seconds
+        expires = time.monotonic() + seconds if seconds is not None else None
+        if parent is not None and parent.expires is not None:
+            expires = parent.expires if expires is None else min(expires, parent.expires)
+        self.expires = expires
+        self.reason = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (0 once expired or cancelled), or None without a time limit."""
+        if self.cancelled:
+            return 0.0
+        return None if self.expires is None else max(0.0, self.expires - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or (self.expires is not None and time.monotonic() >= self.expires)
+
+    def check(self):
+        """Raise DeadlineExceeded if the deadline passed or the request was cancelled."""
+        if self.cancelled:
+            raise DeadlineExceeded(f'Request cancelled ({self._reason()})')
+        if self.expired:
+            raise DeadlineExceeded(f'Request deadline of {self._seconds():g}s exceeded')
+
+    def _reason(self) -> str:
+        deadline = self
+        while deadline is not None:
+            if deadline.reason:
+                return deadline.reason
+            deadline = deadline.parent
+        return 'cancelled'
+
+    def _seconds(self) -> float:
+        limits = []
+        deadline = self
+        while deadline is not None:
+            if deadline.seconds is not None:
+                limits.append(deadline.seconds)
+            deadline = deadline.parent
+        return min(limits) if limits else 0.0
+
+    def sleep(self, seconds: float):
+        """Sleep, but raise DeadlineExceeded as soon as the deadline passes or is cancelled."""
+        remaining = self.remaining()
+        self._cancelled.wait(seconds if remaining is None else min(seconds, remaining))
+        if remaining is not None and remaining < seconds:
+            raise DeadlineExceeded(f'Request deadline of {self._seconds():g}s exceeded')
+        self.check()
+
+    def cancel(self, reason: str = 'cancelled'):
+        """Stop the request: later checks raise, and in-flight work registered with on_cancel() is aborted."""
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self.reason = reason
+            self._cancelled.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], object]):
+        """Call callback if this deadline, or an enclosing one, is cancelled while the block runs."""
+        chain = []
+        deadline = self
+        while deadline is not None:
+            chain.append(deadline)
+            deadline = deadline.parent
+        for deadline in chain:
+            with deadline._lock:
+                deadline._callbacks.add(callback)
+        try:
+            if self.cancelled:
+                callback()
+            yield
+        finally:
+            for deadline in chain:
+                with deadline._lock:
+                    deadline._callbacks.discard(callback)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check():
+    """Raise DeadlineExceeded if the current request is out of time or cancelled."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def sleep(seconds: float):
+    """time.sleep() that stops early, raising DeadlineExceeded, when the current request runs out of time."""
+    deadline = _current.get()
+    if deadline is None:
+        time.sleep(seconds)
+    else:
+        deadline.sleep(seconds)
+
+
+def begin(seconds: Optional[float] = None) -> contextvars.Token:
+    """Open a deadline for work in this context, within any current one. Pair with end()."""
+    return _current.set(Deadline(seconds, _current.get()))
+
+
+def end(token: contextvars.Token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Ended from a different context than it was begun in (framework callbacks)
+        _current.set(None)
+
+
+@contextmanager
+def scope(seconds: Optional[float] = None):
+    """
+    Run a block under a deadline of `seconds` (None for cancellation only). If the block
+    exits with an exception, e.g. because its task was cancelled, the deadline is cancelled
+    so work it started on other threads stops too.
+
+    Example:
+        with deadlines.scope(30) as deadline:
+            result = await asyncio.wait_for(Runner.run(agent, input=user_query), deadline.remaining())
+    """
+    token = begin(seconds)
+    deadline = _current.get()
+    try:
+        yield deadline
+    except BaseException:
+        deadline.cancel('request abandoned')
+        raise
+    finally:
+        end(token)
+
+
+def env_seconds(name: str) -> Optional[float]:
+    """A time limit from the environment, None when unset or 0."""
+    return float(os.getenv(name) or 0) or None
+
+
+def retries_within(seconds: Optional[float], num_retries: int) -> int:
+    """
+    The number of retries whose backoff (googleapiclient sleeps up to 2**n seconds before
+    retry n) fits in seconds.
+    """
+    if seconds is None:
+        return num_retries
+    fitting = 0
+    while fitting < num_retries and 2 ** (fitting + 2) - 2 < seconds:
+        fitting += 1
+    return fitting
+
+
+def _refuse_connect():
+    raise socket.timeout('request cancelled')
+
+
+def abort_connections(http):
+    """Shut down the open sockets of an httplib2 transport, so a blocked request fails at once."""
+    http = getattr(http, 'http', http)  # google_auth_httplib2.AuthorizedHttp wraps an httplib2.Http
+    for connection in list(getattr(http, 'connections', {}).values()):
+        # httplib2 reconnects and sends the request again after a dropped connection
+        connection.connect = _refuse_connect
+        sock = getattr(connection, 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def reset_transport(http, timeout: Optional[float]):
+    """
+    Make an httplib2 transport fit for reuse after limit_socket_timeout() or abort_connections():
+    restore its socket timeout and drop connections that were cut off.
+    """
+    http = getattr(http, 'http', http)
+    if hasattr(http, 'timeout'):
+        http.timeout = timeout
+    connections = getattr(http, 'connections', {})
+    for key, connection in list(connections.items()):
+        if vars(connection).get('connect') is _refuse_connect:
+            connections.pop(key, None)
+            connection.close()
+            continue
+        sock = getattr(connection, 'sock', None)
+        if sock is not None:
+            try:
+                sock.settimeout(timeout)
+            except OSError:
+                pass
+
+
+def limit_socket_timeout(http, seconds: float):
+    """Make an httplib2 transport stop waiting for a response after seconds."""
+    http = getattr(http, 'http', http)
+    if hasattr(http, 'timeout'):
+        http.timeout = seconds
+    for connection in list(getattr(http, 'connections', {}).values()):
+        sock = getattr(connection, 'sock', None)
+        if sock is not None:
+            try:
+                sock.settimeout(seconds)
+            except OSError:
+                pass
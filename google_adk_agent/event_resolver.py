@@ -0,0 +1,172 @@
+"""
+Session-scoped resolution of event references to event IDs.
+
+Deleting, updating or inviting people to an event needs its event_id, so the model used to
+look the event up before every change, and again for each step of a multi-step edit.
+Every event a tool returns or creates is remembered for the conversation it was seen in,
+which lets the mutation tools accept the event's title and date instead of an ID and
+resolve them locally. The tools only query the API, once and narrowly, when nothing
+remembered matches.
+"""
+import contextvars
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+from .cache_manager import MANAGER, approximate_size
+from .event_record import Event
+
+
+MAX_EVENTS = 1000   # Remembered events per session, least recently seen dropped first
+MAX_SESSIONS = 256  # Sessions kept, least recently active dropped first; the cache memory budget may drop more
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Words users put in front of a title ("my dentist appointment") that are not part of it
+_FILLER_WORDS = frozenset({'a', 'an', 'the', 'my', 'our', 'your', 'this', 'that', 'next'})
+
+_current = contextvars.ContextVar('current_event_resolver', default=None)
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in _FILLER_WORDS]
+
+
+class EventResolver:
+    """
+    Events seen in one session, by ID and by title.
+
+    Args:
+        max_events: Events remembered, least recently seen dropped first
+        session_id: Session whose entry in the cache manager tracks this resolver's size
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS, session_id: Optional[str] = None):
+        self.max_events = max_events
+        self.session_id = session_id
+        self.nbytes = 0
+        self._events = OrderedDict()  # (calendar_id, event_id) -> Event, most recently seen last
+        self._lock = threading.Lock()
+
+    def remember(self, events: Iterable[Event]):
+        with self._lock:
+            for event in events:
+                key = (event.calendar_id, event.id)
+                self._drop(key)
+                self._events[key] = event
+                self.nbytes += approximate_size(event)
+            while len(self._events) > self.max_events:
+                self._drop(next(iter(self._events)))
+        self._resized()
+
+    def forget(self, calendar_id: str, event_id: str):
+        with self._lock:
+            self._drop((calendar_id, event_id))
+        self._resized()
+
+    def _drop(self, key):
+        event = self._events.pop(key, None)
+        if event is not None:
+            self.nbytes -= approximate_size(event)
+
+    def _resized(self):
+        if self.session_id is not None:
+            MANAGER.resize('sessions', self.session_id, self.nbytes)
+
+    def get(self, calendar_id: str, event_id: str) -> Optional[Event]:
+        with self._lock:
+            return self._events.get((calendar_id, event_id))
+
+    def find(self, calendar_id: str, summary: str, start: Optional[int] = None, end: Optional[int] = None) -> List[Event]:
+        """
+        Remembered events in calendar_id overlapping [start, end) whose title contains every
+        word of summary, ordered by start. If any title equals summary (ignoring case and
+        punctuation), only those events are returned.
+        """
+        wanted = _words(summary)
+        if not wanted:
+            return []
+        with self._lock:
+            events = [event for (cal, _), event in self._events.items() if cal == calendar_id]
+        matches = []
+        for event in events:
+            if start is not None and event.end <= start or end is not None and event.start >= end:
+                continue
+            title = _words(event.summary or '')
+            if all(word in title for word in wanted):
+                matches.append((title == wanted, event))
+        if any(exact for exact, _ in matches):
+            matches = [match for match in matches if match[0]]
+        return sorted((event for _, event in matches), key=lambda event: (event.start, event.id))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._events)
+
+
+# A process-wide resolver serves tool calls made outside any session (scripts, benchmarks)
+_default = EventResolver()
+
+
+def for_session(session_id: str) -> EventResolver:
+    with _sessions_lock:
+        resolver = _sessions.pop(session_id, None)
+        created = resolver is None
+        if created:
+            resolver = EventResolver(session_id=session_id)
+        _sessions[session_id] = resolver
+        dropped = []
+        while len(_sessions) > MAX_SESSIONS:
+            dropped.append(_sessions.popitem(last=False)[0])
+    # Outside the lock, since the manager's eviction callback takes it
+    for dropped_id in dropped:
+        MANAGER.remove('sessions', dropped_id)
+    MANAGER.record('sessions', not created)
+    if created:
+        MANAGER.add('sessions', session_id, resolver.nbytes, lambda: _evict_session(session_id, resolver))
+    else:
+        MANAGER.touch('sessions', session_id)
+    return resolver
+
+
+def _evict_session(session_id: str, resolver: EventResolver):
+    with _sessions_lock:
+        if _sessions.get(session_id) is resolver:
+            del _sessions[session_id]
+
+
+def begin_session(session_id: str) -> contextvars.Token:
+    """Make session_id's resolver current for tool calls in this context. Pair with end_session()."""
+    return _current.set(for_session(session_id))
+
+
+def end_session(token: contextvars.Token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Ended from a different context than it was begun in (framework callbacks)
+        _current.set(None)
+
+
+@contextmanager
+def session(session_id: str):
+    """
+    Resolve event references against the events seen in session_id.
+
+    Example:
+        with event_resolver.session(session.session_id):
+            result = await Runner.run(agent, input=user_query, session=session)
+    """
+    token = begin_session(session_id)
+    try:
+        yield _current.get()
+    finally:
+        end_session(token)
+
+
+def current() -> EventResolver:
+    resolver = _current.get()
+    return resolver if resolver is not None else _default
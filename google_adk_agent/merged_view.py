@@ -0,0 +1,53 @@
+"""
+One view of several calendars, with meetings that appear on more than one listed once.
+
+Someone invited to a meeting on both their work and personal calendar gets a copy of the
+event on each, with the same iCalUID and, for each occurrence, the same start and end.
+merge_events() walks the per-calendar event lists as one stream ordered by start, keyed
+by the compact (iCalUID, start, end) tuple in a dict, so duplicates are collapsed in a
+single pass. Each meeting is returned once, annotated with the other calendars it is on.
+"""
+import heapq
+from typing import List, Optional, Sequence, Tuple
+
+from .event_record import Event
+
+
+def duplicate_key(event: Event) -> Optional[tuple]:
+    """Key shared by the copies of one meeting occurrence on different calendars, or None if it has no iCalUID."""
+    if not event.ical_uid:
+        return None
+    return (event.ical_uid, event.start, event.end)
+
+
+def merge_events(event_lists: Sequence[Sequence[Event]]) -> List[Tuple[Event, List[Event]]]:
+    """
+    Merge per-calendar event lists, each ordered by start, into (event, duplicates) pairs
+    ordered by start. event is the copy on the calendar that comes first in event_lists;
+    duplicates are the copies of the same occurrence on the other calendars. Events on the
+    same calendar are never merged with each other.
+    """
+    merged = []
+    seen = {}  # duplicate_key -> index in merged
+    for event in heapq.merge(*event_lists, key=lambda e: e.start):
+        key = duplicate_key(event)
+        index = seen.get(key) if key is not None else None
+        if index is not None:
+            first, duplicates = merged[index]
+            if event.calendar_id != first.calendar_id and all(d.calendar_id != event.calendar_id for d in duplicates):
+                duplicates.append(event)
+                continue
+        if key is not None and index is None:
+            seen[key] = len(merged)
+        merged.append((event, []))
+    return merged
+
+
+def format_merged(entry: Tuple[Event, List[Event]]) -> dict:
+    """get_calendar_events() event dict plus the event's calendar_id and, for duplicates, also_on."""
+    event, duplicates = entry
+    formatted_event = event.to_dict()
+    formatted_event['calendar_id'] = event.calendar_id
+    if duplicates:
+        formatted_event['also_on'] = [{'calendar_id': d.calendar_id, 'id': d.id} for d in duplicates]
+    return formatted_event
@@ -0,0 +1,245 @@
+"""
+Sampling profiler for agent turns.
+
+Set PROFILE_SAMPLE_RATE to profile that fraction of turns (e.g. 0.01), or PROFILE_TURN=N to
+profile the Nth turn after startup. While a profiled turn runs, a background thread records
+the call stack of every thread each PROFILE_INTERVAL_MS milliseconds (default 10); nothing
+is traced, so the turn itself runs unchanged and the cost is one stack walk per thread per
+sample. Turns that are not profiled cost nothing.
+
+Each profile is written to PROFILE_DIR (default: profiles) as:
+- <name>.folded: collapsed stacks, one "thread;outer;...;inner count" line per stack, for
+  flamegraph.pl or speedscope
+- <name>.json: samples per phase (model, service_setup, calendar_api, session_io,
+  formatting, tools, waiting, other) next to the turn's span times from instrumentation.py
+
+Only one turn is profiled at a time, and stacks are sampled process-wide, so with concurrent
+turns a profile also shows the others' work.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from .instrumentation import count
+
+
+# (phase, path fragments, function names), checked in order against every frame of a stack
+_PHASES = (
+    ('service_setup', ('/googleapiclient/discovery', '/google_auth_oauthlib/', '/google/oauth2/'), ('get_calendar_service',)),
+    ('session_io', ('/agents/memory/', '/agents/extensions/memory/', '/google/adk/sessions/', '/sqlite3/'), ()),
+    ('calendar_api', ('/httplib2/', '/googleapiclient/http'), ()),
+    ('model', ('/openai/', '/httpx/', '/httpcore/', '/google/genai/', '/google/adk/models/', '/litellm/'), ()),
+    ('formatting', ('/json/', '/result_shaping', '/event_record', '/merged_view', '/agenda'), ()),
+)
+_TOOL_FILES = ('_tools.py',)
+_WAITING_FILES = ('/selectors.py', '/asyncio/')
+_PARKED_FILES = ('/threading.py', '/queue.py')
+_PARKED_FUNCTIONS = {('/concurrent/futures/thread.py', '_worker')}  # Waits for work inside C code
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name='turn-profiler', daemon=True)
+        self.interval = interval
+        self.samples = Counter()  # (thread id, code objects from innermost out) -> samples
+        self.names = {}
+        self.ticks = 0
+        self._done = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._done.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in self.names:
+                    self.names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                self.samples[(ident, tuple(stack))] += 1
+            self.ticks += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+_labels = {}  # code object -> frame label
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        for prefix in sorted(sys.path, key=len, reverse=True):
+            if prefix and path.startswith(prefix + os.sep):
+                path = path[len(prefix) + 1:]
+                break
+        module = path[:-3] if path.endswith('.py') else path
+        name = getattr(code, 'co_qualname', code.co_name)
+        label = _labels[code] = f"{module.replace(os.sep, '.')}:{name}".replace(';', ',').replace(' ', '_')
+    return label
+
+
+def classify(stack: tuple) -> str:
+    """Phase of a sampled stack (code objects from innermost out)."""
+    for phase, fragments, functions in _PHASES:
+        for code in stack:
+            if code.co_name in functions or any(fragment in code.co_filename for fragment in fragments):
+                return phase
+    if any(code.co_filename.endswith(_TOOL_FILES) for code in stack):
+        return 'tools'
+    if stack and any(fragment in stack[0].co_filename for fragment in _WAITING_FILES):
+        return 'waiting'
+    return 'other'
+
+
+def _parked(stack: tuple) -> bool:
+    # Idle pool workers, timers and the like, blocked in a lock or queue wait
+    if not stack:
+        return False
+    leaf = stack[0]
+    return any(fragment in leaf.co_filename for fragment in _PARKED_FILES) or any(
+        leaf.co_filename.endswith(path) and leaf.co_name == name for path, name in _PARKED_FUNCTIONS
+    )
+
+
+class Profile:
+    """A turn being profiled."""
+
+    def __init__(self, number: int, label: str, stats, interval: float):
+        self.number = number
+        self.label = label
+        self.stats = stats
+        self.started = time.perf_counter()
+        self.wall_seconds = 0.0
+        self.sampler = _Sampler(interval)
+        self.sampler.start()
+
+
+class TurnProfiler:
+    """
+    Decides which turns to profile and writes their profiles.
+
+    Args:
+        directory: Where profiles are written
+        sample_rate: Fraction of turns to profile
+        turn: Profile this turn (1-based) regardless of sample_rate
+        interval: Seconds between stack samples
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, turn: Optional[int] = None, interval: float = 0.01):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.turn_number = turn
+        self.interval = interval
+        self.turns = 0
+        self._active = None
+        self._lock = threading.Lock()
+
+    def begin(self, stats=None, label: str = '') -> Optional[Profile]:
+        """Start profiling this turn if it is selected and no other turn is being profiled. stats is its TurnStats."""
+        with self._lock:
+            self.turns += 1
+            selected = self.turns == self.turn_number or (self.sample_rate > 0 and random.random() < self.sample_rate)
+            if not selected:
+                return None
+            if self._active is not None:
+                count('profiles_skipped')
+                return None
+            self._active = profile = Profile(self.turns, label, stats, self.interval)
+        return profile
+
+    def finish(self, profile: Profile) -> str:
+        """Stop sampling and write the profile. Returns the path of the .folded file."""
+        profile.wall_seconds = time.perf_counter() - profile.started
+        profile.sampler.stop()
+        with self._lock:
+            if self._active is profile:
+                self._active = None
+        try:
+            path = self._write(profile)
+        except OSError:
+            count('profile_errors')
+            return ''
+        count('profiles_written')
+        return path
+
+    @contextmanager
+    def turn(self, stats=None, label: str = ''):
+        """
+        Profile the enclosed turn if it is selected.
+
+        Example:
+            with instrumentation.turn() as stats, profiler.turn(stats, session.session_id):
+                result = await Runner.run(agent, input=user_query, session=session)
+        """
+        profile = self.begin(stats, label)
+        try:
+            yield profile
+        finally:
+            if profile is not None:
+                self.finish(profile)
+
+    def _write(self, profile: Profile) -> str:
+        sampler = profile.sampler
+        folded = Counter()
+        phases = Counter()
+        parked = 0
+        for (ident, stack), samples in sampler.samples.items():
+            if _parked(stack):
+                parked += samples
+                continue
+            thread = sampler.names.get(ident, f'thread-{ident}').replace(';', ',').replace(' ', '_')
+            folded[';'.join([thread] + [_label(code) for code in reversed(stack)])] += samples
+            phases[classify(stack)] += samples
+
+        total = sum(phases.values())
+        summary = {
+            'turn': profile.number,
+            'label': profile.label,
+            'wall_seconds': profile.wall_seconds,
+            'interval_seconds': sampler.interval,
+            'ticks': sampler.ticks,
+            'samples': total,
+            'parked_samples': parked,
+            # Samples per phase across all active threads; seconds assume one thread per sample tick
+            'phases': {
+                phase: {'samples': samples, 'share': samples / total, 'seconds': samples * sampler.interval}
+                for phase, samples in phases.most_common()
+            },
+        }
+        if profile.stats is not None:
+            # Wall-clock time per span kind (llm, tool, service, http), from instrumentation.py
+            summary['spans'] = {'seconds': dict(profile.stats.seconds), 'calls': dict(profile.stats.calls)}
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S') + f'.{int(time.time() * 1000) % 1000:03d}'
+        base = os.path.join(self.directory, f'{stamp}-{os.getpid()}-turn{profile.number}')
+        with open(base + '.folded', 'w') as f:
+            f.writelines(f'{stack} {samples}\n' for stack, samples in folded.most_common())
+        with open(base + '.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+        return base + '.folded'
+
+
+def open_profiler() -> Optional[TurnProfiler]:
+    """TurnProfiler configured from PROFILE_SAMPLE_RATE / PROFILE_TURN, or None if neither is set."""
+    rate = float(os.getenv('PROFILE_SAMPLE_RATE') or 0)
+    turn = int(os.getenv('PROFILE_TURN') or 0) or None
+    if not rate and turn is None:
+        return None
+    return TurnProfiler(
+        os.getenv('PROFILE_DIR', 'profiles'),
+        sample_rate=rate,
+        turn=turn,
+        interval=float(os.getenv('PROFILE_INTERVAL_MS', '10')) / 1000
+    )
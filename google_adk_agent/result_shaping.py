@@ -0,0 +1,113 @@
+"""
+Token budgets for tool results.
+
+A tool result goes into the model's context verbatim, so a long event list costs latency
+and money and can overflow the context window. shape_events() leaves results that fit the
+budget untouched. Larger ones are reduced deterministically: events lose their links and
+have descriptions truncated, as many as fit are kept in start order, every day in the
+result is summarized with its event count, and a page token lets the model fetch the rest.
+"""
+import base64
+import json
+import os
+from typing import Callable, Optional
+
+# Approximate tokens per tool result; 0 disables shaping
+TOKEN_BUDGET = int(os.getenv('TOOL_RESULT_TOKEN_BUDGET', '4000'))
+DESCRIPTION_CHARS = 120
+
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(value) -> int:
+    """Rough token count of a JSON-serializable value (about 4 characters per token)."""
+    return len(json.dumps(value, separators=(',', ':'), default=str)) // _CHARS_PER_TOKEN + 1
+
+
+def compact_event(formatted_event: dict) -> dict:
+    """Drop the link and truncate the description of a get_calendar_events() event dict."""
+    compact = {key: value for key, value in formatted_event.items() if key != 'link'}
+    description = compact.get('description')
+    if description and len(description) > DESCRIPTION_CHARS:
+        compact['description'] = description[:DESCRIPTION_CHARS].rstrip() + '...'
+    return compact
+
+
+def encode_page_token(cursor: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_page_token(token: str) -> dict:
+    """Inverse of encode_page_token(). Raises ValueError for a token this module did not issue."""
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'Invalid page_token {token!r}') from e
+    if not isinstance(cursor, dict) or not {'calendar_id', 'start', 'end', 'timezone', 'max_results', 'offset'} <= cursor.keys():
+        raise ValueError(f'Invalid page_token {token!r}')
+    return cursor
+
+
+def shape_events(
+    result: dict,
+    events: list,
+    format_event: Callable[[object], dict],
+    page: dict,
+    budget: Optional[int] = None,
+    tool: str = 'get_calendar_events'
+) -> dict:
+    """
+    Fill result['events'] with events, keeping the result within a token budget.
+
+    Args:
+        result: Tool result without its events (success, calendar_id, ...)
+        events: Event objects ordered by start
+        format_event: Turns an Event into its tool-output dict
+        page: calendar_id, start, end, timezone and max_results of the query, and the offset
+              of the first event, for the page token
+        budget: Token budget (default: TOOL_RESULT_TOKEN_BUDGET)
+        tool: Tool the note tells the model to call with the page token
+
+    Returns:
+        dict: result with events and count. When the budget forced a reduction it also has
+              total (events in this page), days (date, count, shown per day), truncated=True
+              and, if events were left out, next_page_token and a note for the model.
+    """
+    budget = TOKEN_BUDGET if budget is None else budget
+    formatted_events = [format_event(event) for event in events]
+    full = dict(result, events=formatted_events, count=len(formatted_events))
+    if budget <= 0 or estimate_tokens(full) <= budget:
+        return full
+
+    counts = {}
+    for formatted_event in formatted_events:
+        day = formatted_event['start'][:10]
+        counts[day] = counts.get(day, 0) + 1
+
+    # Reserve room for the day summary, page token and note before adding events
+    used = estimate_tokens(result) + estimate_tokens([{'date': day, 'count': count, 'shown': count} for day, count in counts.items()]) + 80
+    shown = []
+    for formatted_event in formatted_events:
+        compact = compact_event(formatted_event)
+        size = estimate_tokens(compact)
+        if shown and used + size > budget:
+            break
+        shown.append(compact)
+        used += size
+
+    shown_by_day = {}
+    for compact in shown:
+        day = compact['start'][:10]
+        shown_by_day[day] = shown_by_day.get(day, 0) + 1
+
+    shaped = dict(result, events=shown, count=len(shown), total=len(formatted_events), truncated=True)
+    shaped['days'] = [{'date': day, 'count': count, 'shown': shown_by_day.get(day, 0)} for day, count in counts.items()]
+
+    if len(shown) < len(events):
+        # The next page repeats the same query (usually served from the cache) and skips what was shown
+        shaped['next_page_token'] = encode_page_token(dict(page, offset=page.get('offset', 0) + len(shown)))
+        shaped['note'] = (
+            f'Showing {len(shown)} of {len(formatted_events)} events with shortened descriptions. '
+            f'Call {tool}(page_token=next_page_token) for the next page.'
+        )
+    return shaped
@@ -0,0 +1,294 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import httplib2
+from google.auth.exceptions import TransportError
+from googleapiclient.errors import HttpError
+
+from .event_record import Event
+
+
+INSERT = 'insert'
+DELETE = 'delete'
+INVITE = 'invite'
+UPDATE = 'update'  # payload['body'] holds only the changed fields, patched onto the event as it is then
+
+_RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}  # 403s that clear up on their own
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created REAL NOT NULL
+)
+"""
+
+
+def _patched(event: Event, body: dict) -> Event:
+    """event with the fields of an uncommitted update applied."""
+    item = {
+        'id': event.id,
+        'summary': event.summary,
+        'start': {'date' if event.all_day else 'dateTime': event.start_iso},
+        'end': {'date' if event.end_tz is None else 'dateTime': event.end_iso},
+        'description': event.description,
+        'location': event.location,
+        'htmlLink': event.link,
+        'iCalUID': event.ical_uid,
+        'attendees': [{'email': email} for email in event.attendees] if event.attendees else None,
+    }
+    item.update(body)
+    return Event.from_api({key: value for key, value in item.items() if value is not None}, event.calendar_id)
+
+
+def _reason(error: HttpError) -> Optional[str]:
+    try:
+        return json.loads(error.content)['error']['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+def _retryable(error: Exception) -> bool:
+    """
+    True for errors another attempt may get past: rate limits, server errors and failed
+    connections (socket errors and timeouts are OSErrors). Anything else, such as a
+    forbidden or invalid request or a bug in commit(), fails the operation at once.
+    """
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        return status in _RETRYABLE_STATUSES or (status == 403 and _reason(error) in _RATE_LIMIT_REASONS)
+    return isinstance(error, (OSError, httplib2.HttpLib2Error, TransportError))
+
+
+class Operation:
+    __slots__ = ('seq', 'kind', 'calendar_id', 'event_id', 'payload', 'attempts', 'not_before')
+
+    def __init__(self, seq, kind, calendar_id, event_id, payload, attempts=0):
+        self.seq = seq
+        self.kind = kind
+        self.calendar_id = calendar_id
+        self.event_id = event_id
+        self.payload = payload
+        self.attempts = attempts
+        self.not_before = 0.0
+
+    @property
+    def key(self) -> tuple:
+        return self.calendar_id, self.event_id
+
+
+class WriteQueue:
+    """
+    Durable write-behind queue for calendar mutations.
+
+    Tools enqueue an operation and return immediately. Operations are stored in SQLite
+    before enqueue() returns, so they survive a restart, and are committed to the API on
+    worker threads: operations on the same event run one at a time in the order they were
+    queued, while different events are committed in parallel. Rate limits, server errors
+    and failed connections are retried with exponential backoff (see _retryable()); other
+    errors fail the operation, which is then reported once through failures().
+
+    Until an operation is committed, overlay() applies it to event lists read from the
+    cache or the API, so the agent sees its own changes straight away.
+
+    Args:
+        path: SQLite file holding the queue
+        commit: commit(operation) performs the operation against the API and raises
+                HttpError on failure. It is responsible for reconciling conflicts.
+        on_commit: Called with each operation once it is committed or has failed for good,
+                   before overlay() stops applying it (e.g. to invalidate the cache).
+        max_workers: Operations committed in parallel
+        max_attempts: Attempts before a retryable error fails the operation
+    """
+
+    def __init__(
+        self,
+        path: str,
+        commit: Callable[[Operation], object],
+        on_commit: Optional[Callable[[Operation], object]] = None,
+        max_workers: int = 4,
+        max_attempts: int = 8
+    ):
+        self.commit = commit
+        self.on_commit = on_commit
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(_SCHEMA)
+        self._condition = threading.Condition()
+        self._operations = []
+        self._in_flight = set()
+        self._failures = []
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='calendar-write')
+
+        # Resume anything left over from a previous run
+        rows = self._db.execute(
+            "SELECT seq, kind, calendar_id, event_id, payload, attempts FROM operations WHERE status = 'pending' ORDER BY seq"
+        ).fetchall()
+        self._operations = [Operation(seq, kind, cal, eid, json.loads(payload), attempts) for seq, kind, cal, eid, payload, attempts in rows]
+
+        self._dispatcher = threading.Thread(target=self._run, name='calendar-write-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def enqueue(self, kind: str, calendar_id: str, event_id: str, payload: Optional[dict] = None) -> Operation:
+        """Persist an operation and schedule it. Returns once it is durable, not once it is committed."""
+        payload = payload or {}
+        with self._condition:
+            cursor = self._db.execute(
+                'INSERT INTO operations (kind, calendar_id, event_id, payload, created) VALUES (?, ?, ?, ?, ?)',
+                (kind, calendar_id, event_id, json.dumps(payload), time.time())
+            )
+            operation = Operation(cursor.lastrowid, kind, calendar_id, event_id, payload)
+            self._operations.append(operation)
+            self._condition.notify_all()
+        return operation
+
+    def pending(self, calendar_id: Optional[str] = None) -> List[Operation]:
+        with self._condition:
+            return [op for op in self._operations if calendar_id is None or op.calendar_id == calendar_id]
+
+    def overlay(self, calendar_id: str, events: list, start: int, end: Optional[int], tz=None) -> list:
+        """
+        Apply uncommitted inserts, updates and deletes for calendar_id to events in [start, end),
+        ordered by start. tz is the query's time zone, for all-day events (see Event.overlaps()).
+        """
+        inserted = {}
+        updated = {}
+        deleted = set()
+        with self._condition:
+            for op in self._operations:
+                if op.calendar_id != calendar_id:
+                    continue
+                if op.kind == INSERT:
+                    inserted[op.event_id] = op
+                    deleted.discard(op.event_id)
+                elif op.kind == UPDATE:
+                    updated.setdefault(op.event_id, {}).update(op.payload['body'])
+                elif op.kind == DELETE:
+                    deleted.add(op.event_id)
+                    inserted.pop(op.event_id, None)
+                    updated.pop(op.event_id, None)
+        if not inserted and not updated and not deleted:
+            return events
+
+        merged = []
+        for event in events:
+            if event.id in deleted or event.id in inserted:
+                continue
+            if event.id in updated:
+                event = _patched(event, updated[event.id])
+                if not event.overlaps(start, end, tz):
+                    continue  # moved out of the range
+            merged.append(event)
+        for op in inserted.values():
+            body = dict(op.payload['body'], **updated.get(op.event_id, {}))
+            event = Event.from_api(dict(body, id=op.event_id), calendar_id)
+            if event.overlaps(start, end, tz):
+                merged.append(event)
+        merged.sort(key=lambda event: event.start)
+        return merged
+
+    def failures(self) -> List[dict]:
+        """Return operations that failed for good since the last call."""
+        with self._condition:
+            failures, self._failures = self._failures, []
+        return failures
+
+    def wait(self, calendar_id: Optional[str] = None, event_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block until matching operations are committed. Returns False on timeout."""
+        def done():
+            return not any(
+                (calendar_id is None or op.calendar_id == calendar_id) and (event_id is None or op.event_id == event_id)
+                for op in self._operations
+            )
+        with self._condition:
+            return self._condition.wait_for(done, timeout)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._executor.shutdown(wait=True)
+
+    # Background commit
+
+    def _eligible(self) -> List[Operation]:
+        """The oldest pending operation of every event that has none in flight; only these can start."""
+        seen = set()
+        eligible = []
+        for op in self._operations:
+            if op.key in seen:
+                continue
+            seen.add(op.key)
+            if op.key not in self._in_flight:
+                eligible.append(op)
+        return eligible
+
+    def _ready(self) -> List[Operation]:
+        """Eligible operations that are not waiting out a retry backoff."""
+        now = time.monotonic()
+        return [op for op in self._eligible() if op.not_before <= now]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._ready():
+                    # Operations queued behind another for the same event wait for its notify, not a timeout
+                    delays = [op.not_before - time.monotonic() for op in self._eligible()]
+                    self._condition.wait(timeout=max(0.01, min(delays)) if delays else None)
+                if self._closed:
+                    return
+                ready = self._ready()
+                for op in ready:
+                    self._in_flight.add(op.key)
+            for op in ready:
+                self._executor.submit(self._attempt, op)
+
+    def _attempt(self, op: Operation):
+        error = None
+        try:
+            self.commit(op)
+        except Exception as e:
+            error = e
+
+        if error is not None and _retryable(error) and op.attempts + 1 < self.max_attempts:
+            with self._condition:
+                op.attempts += 1
+                op.not_before = time.monotonic() + min(2 ** op.attempts, 60)
+                self._db.execute('UPDATE operations SET attempts = ? WHERE seq = ?', (op.attempts, op.seq))
+                self._in_flight.discard(op.key)
+                self._condition.notify_all()
+            return
+
+        if self.on_commit is not None:
+            try:
+                self.on_commit(op)
+            except Exception:
+                pass
+
+        with self._condition:
+            if error is None:
+                self._db.execute('DELETE FROM operations WHERE seq = ?', (op.seq,))
+            else:
+                self._db.execute("UPDATE operations SET status = 'failed', error = ? WHERE seq = ?", (str(error), op.seq))
+                self._failures.append({
+                    'operation': op.kind,
+                    'calendar_id': op.calendar_id,
+                    'event_id': op.event_id,
+                    'error': str(error),
+                })
+            self._operations.remove(op)
+            self._in_flight.discard(op.key)
+            self._condition.notify_all()
@@ -0,0 +1,223 @@
+"""
+Non-interactive batch runner: one agent turn per line of a JSONL file.
+
+Each input line is {"id": ..., "instruction": "...", "session_id": ...}; id defaults to the
+line number, and jobs sharing a session_id run in order in one conversation (others each get
+their own). Up to --concurrency conversations run at once in this process, sharing its
+calendar cache, a per-thread pool of Calendar services (CALENDAR_SERVICE_POOL) and the
+credentials. Every finished job is appended to the results file as it completes:
+
+    {"id": ..., "status": "ok" | "timeout" | "error", "reply": ..., "error": ..., "seconds": ...,
+     "tool_calls": ..., "api_requests": ...}
+
+The results file is also the checkpoint: running the same command again skips jobs already
+in it, so an interrupted batch resumes where it stopped. Failed jobs are retried only with
+--retry-failed, since a failed instruction may have changed the calendar partway. Set
+AGENT_RUN_TIMEOUT to bound each job.
+
+Usage:
+    python batch.py instructions.jsonl --output results.jsonl --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Jobs share the calendar cache and reuse Calendar services unless configured otherwise
+os.environ.setdefault('CALENDAR_CACHE_TTL', '120')
+os.environ.setdefault('CALENDAR_SERVICE_POOL', '1')
+
+import deadlines
+import instrumentation
+
+
+def load_jobs(path: str) -> List[dict]:
+    """Read the instructions file. Raises ValueError for a line without an instruction."""
+    jobs = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if not isinstance(job, dict) or not job.get('instruction'):
+                raise ValueError(f'{path}:{number}: expected an object with an "instruction"')
+            job.setdefault('id', number)
+            jobs.append(job)
+    return jobs
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    """
+    Results already written, by job id. A line cut off by an interruption is ignored.
+    Raises ValueError if the file holds something other than batch results.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(result, dict) or 'id' not in result:
+                raise ValueError(f'{path} is not a batch results file')
+            results[str(result['id'])] = result
+    return results
+
+
+class ResultWriter:
+    """Appends results to a JSONL file, one complete line per job, flushed as it is written."""
+
+    def __init__(self, path: str):
+        torn = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        if torn:
+            # End the line cut off by an interruption, so the next result starts on its own line
+            self._file.write('\n')
+
+    def write(self, result: dict):
+        line = json.dumps(result, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+async def run_batch(
+    jobs: List[dict],
+    run_job: Callable[[dict, object], Awaitable[str]],
+    new_session: Callable[[str], Awaitable[object]],
+    writer: ResultWriter,
+    concurrency: int = 8,
+    progress: Optional[Callable[[dict], object]] = None
+) -> List[dict]:
+    """
+    Run jobs, at most `concurrency` conversations at a time, writing each result as it finishes.
+
+    Args:
+        jobs: Jobs to run; those with the same session_id run in order in one session
+        run_job: run_job(job, session) runs the job's instruction as one turn and returns the reply
+        new_session: new_session(key) returns a fresh conversation session (awaitable)
+        writer: Receives every result
+        concurrency: Conversations in flight at once
+        progress: Called with every result
+
+    Returns:
+        list: The results, in completion order
+    """
+    groups = {}
+    for job in jobs:
+        key = f"session:{job['session_id']}" if job.get('session_id') is not None else f"job:{job['id']}"
+        groups.setdefault(key, []).append(job)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = []
+
+    async def run_group(key, group):
+        async with semaphore:
+            session = await new_session(key)
+            for job in group:
+                result = await _run_one(job, session, run_job)
+                writer.write(result)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+
+    await asyncio.gather(*(run_group(key, group) for key, group in groups.items()))
+    return results
+
+
+async def _run_one(job: dict, session, run_job) -> dict:
+    result = {'id': job['id']}
+    with instrumentation.turn() as stats:
+        try:
+            reply = await run_job(job, session)
+            result['status'] = 'timeout' if reply == deadlines.TIMEOUT_REPLY else 'ok'
+            result['reply'] = reply
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = f'{type(e).__name__}: {e}'
+    result.update(
+        seconds=round(stats.total_seconds, 3),
+        tool_calls=stats.calls.get(instrumentation.TOOL, 0),
+        api_requests=stats.calls.get(instrumentation.HTTP, 0),
+    )
+    return result
+
+
+def summarize(results: List[dict], elapsed: float, skipped: int) -> dict:
+    """Batch totals: jobs per status, throughput in requests (jobs) per second and latency percentiles."""
+    latencies = sorted(result['seconds'] for result in results)
+    statuses = {}
+    for result in results:
+        statuses[result['status']] = statuses.get(result['status'], 0) + 1
+    api_requests = sum(result['api_requests'] for result in results)
+    return {
+        'jobs': len(results),
+        'skipped': skipped,
+        'statuses': statuses,
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(len(results) / elapsed, 3) if elapsed else 0.0,
+        'api_requests': api_requests,
+        'api_requests_per_second': round(api_requests / elapsed, 3) if elapsed else 0.0,
+        'p50_seconds': latencies[len(latencies) // 2] if latencies else 0.0,
+        'p95_seconds': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0,
+    }
+
+
+def select_jobs(jobs: List[dict], done: Dict[str, dict], retry_failed: bool) -> List[dict]:
+    """Jobs still to run: those without a result, and failed ones with retry_failed."""
+    return [
+        job for job in jobs
+        if str(job['id']) not in done or (retry_failed and done[str(job['id'])]['status'] != 'ok')
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='JSONL file of instructions')
+    parser.add_argument('--output', help='Results JSONL file, also used to resume (default: <path>.results.jsonl)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Conversations in flight at once (default: 8)')
+    parser.add_argument('--retry-failed', action='store_true', help='Run jobs that failed or timed out again')
+    args = parser.parse_args(argv)
+
+    import openai_agent
+
+    async def new_session(key):
+        return openai_agent.open_session(f'batch-{key}')
+
+    async def run_job(job, session):
+        return str(await openai_agent.respond(job['instruction'], session))
+
+    jobs = load_jobs(args.path)
+    output = args.output or f'{args.path}.results.jsonl'
+    pending = select_jobs(jobs, load_results(output), args.retry_failed)
+
+    def progress(result):
+        print(f"[{result['status']}] {result['id']} ({result['seconds']:.1f}s)", file=sys.stderr)
+
+    writer = ResultWriter(output)
+    started = time.perf_counter()
+    try:
+        results = asyncio.run(run_batch(pending, run_job, new_session, writer, args.concurrency, progress))
+    finally:
+        writer.close()
+    print(json.dumps(summarize(results, time.perf_counter() - started, len(jobs) - len(pending)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
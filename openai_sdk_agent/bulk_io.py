@@ -0,0 +1,791 @@
+"""
+Bulk import and export of calendar events.
+
+Import stream-parses ICS or CSV files, normalizes times, skips events that already exist
+(same UID, or same summary and times), and writes the rest through the batch API in
+chunks, checkpointing after every chunk so an interrupted import can resume. Recurring
+ICS events are imported as recurring events, with their RRULE, RDATE and EXDATE lines as
+the event's recurrence; occurrences changed or cancelled in the file (a VEVENT with a
+RECURRENCE-ID) are imported as exceptions to their series. Every event keeps its own TZID
+as its time zone. Export pages through a time range and writes ICS as it goes, so memory
+use stays constant; recurring events are written as their series plus its exceptions.
+
+Usage:
+    python bulk_io.py import semester.ics --calendar primary
+    python bulk_io.py import agenda.csv --calendar work@example.com --timezone Europe/Berlin
+    python bulk_io.py export backup.ics --calendar primary --from 2025-01-01 --to 2025-07-01
+"""
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import os
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from googleapiclient.errors import HttpError
+
+import deadlines
+from compute_pool import ComputePool, open_pool
+from instrumentation import HTTP, span
+from time_utils import UTC, default_end, event_time, from_epoch, get_zone, parse_time, to_rfc3339
+
+
+BATCH_LIMIT = 50  # The Calendar API accepts up to 50 requests per batch
+ICS_CHUNK_BYTES = 1 << 20  # Size of the ICS chunks parsed in parallel on a compute pool
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_RETRYABLE_STATUSES = {403, 429, 500, 502, 503, 504}
+_UID_DOMAIN = 'schedule-agent'
+
+# Windows time zone names some exporters (Outlook, Exchange) put in TZID
+_WINDOWS_ZONES = {
+    'Dateline Standard Time': 'Etc/GMT+12',
+    'Hawaiian Standard Time': 'Pacific/Honolulu',
+    'Alaskan Standard Time': 'America/Anchorage',
+    'Pacific Standard Time': 'America/Los_Angeles',
+    'US Mountain Standard Time': 'America/Phoenix',
+    'Mountain Standard Time': 'America/Denver',
+    'Central Standard Time': 'America/Chicago',
+    'Central America Standard Time': 'America/Guatemala',
+    'Central Standard Time (Mexico)': 'America/Mexico_City',
+    'Eastern Standard Time': 'America/New_York',
+    'SA Pacific Standard Time': 'America/Bogota',
+    'Atlantic Standard Time': 'America/Halifax',
+    'Newfoundland Standard Time': 'America/St_Johns',
+    'E. South America Standard Time': 'America/Sao_Paulo',
+    'Argentina Standard Time': 'America/Buenos_Aires',
+    'UTC': 'UTC',
+    'GMT Standard Time': 'Europe/London',
+    'Greenwich Standard Time': 'Atlantic/Reykjavik',
+    'W. Europe Standard Time': 'Europe/Berlin',
+    'Romance Standard Time': 'Europe/Paris',
+    'Central Europe Standard Time': 'Europe/Budapest',
+    'Central European Standard Time': 'Europe/Warsaw',
+    'GTB Standard Time': 'Europe/Bucharest',
+    'FLE Standard Time': 'Europe/Kiev',
+    'E. Europe Standard Time': 'Europe/Chisinau',
+    'Israel Standard Time': 'Asia/Jerusalem',
+    'Turkey Standard Time': 'Europe/Istanbul',
+    'Russian Standard Time': 'Europe/Moscow',
+    'South Africa Standard Time': 'Africa/Johannesburg',
+    'Arabian Standard Time': 'Asia/Dubai',
+    'Pakistan Standard Time': 'Asia/Karachi',
+    'India Standard Time': 'Asia/Kolkata',
+    'SE Asia Standard Time': 'Asia/Bangkok',
+    'China Standard Time': 'Asia/Shanghai',
+    'Singapore Standard Time': 'Asia/Singapore',
+    'Taipei Standard Time': 'Asia/Taipei',
+    'Tokyo Standard Time': 'Asia/Tokyo',
+    'Korea Standard Time': 'Asia/Seoul',
+    'AUS Eastern Standard Time': 'Australia/Sydney',
+    'E. Australia Standard Time': 'Australia/Brisbane',
+    'W. Australia Standard Time': 'Australia/Perth',
+    'New Zealand Standard Time': 'Pacific/Auckland',
+}
+
+
+# Parsing
+
+def _unescape(value: str) -> str:
+    return (value.replace('\\n', '\n').replace('\\N', '\n')
+            .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\'))
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[str]:
+    """Join RFC 5545 folded lines (continuations start with a space or tab)."""
+    current = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+@lru_cache(maxsize=256)
+def _zone_name(tzid: str) -> Optional[str]:
+    """IANA name for an ICS TZID, or None if it names no zone known here."""
+    name = _WINDOWS_ZONES.get(tzid.strip(), tzid.strip())
+    # Some exporters prefix the IANA name with a path, e.g. /mozilla.org/20050126_1/America/New_York
+    parts = name.strip('/').split('/')
+    for i in range(len(parts)):
+        candidate = '/'.join(parts[i:])
+        try:
+            get_zone(candidate)
+            return candidate
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+def _parse_ics_time(value: str, params: dict, tz: Optional[str]):
+    """Parse a DATE or DATE-TIME value. A TZID that names no known zone falls back to `tz`."""
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    iso = f'{value[:4]}-{value[4:6]}-{value[6:8]}T{value[9:11]}:{value[11:13]}:{value[13:15]}'
+    if value.endswith('Z'):
+        iso += 'Z'
+    zone = _zone_name(params['TZID']) if 'TZID' in params else None
+    return parse_time(iso, zone or tz)
+
+
+def _parse_duration(value: str) -> timedelta:
+    # Subset of RFC 5545 durations: [+]P[nW][nD][T[nH][nM][nS]]
+    number, days, seconds, in_time = '', 0, 0, False
+    for char in value.lstrip('+'):
+        if char.isdigit():
+            number += char
+        elif char == 'T':
+            in_time = True
+        elif char in 'WDHMS' and number:
+            n = int(number)
+            number = ''
+            if char == 'W':
+                days += 7 * n
+            elif char == 'D':
+                days += n
+            elif char == 'H':
+                seconds += 3600 * n
+            elif char == 'M' and in_time:
+                seconds += 60 * n
+            elif char == 'S':
+                seconds += n
+    return timedelta(days=days, seconds=seconds)
+
+
+def _recurrence_line(name: str, params: dict, value: str, tz: Optional[str]) -> str:
+    """
+    An RRULE, RDATE or EXDATE line for the Calendar API's recurrence field. Date-time values
+    are written in UTC, so TZIDs the API would not know (Windows names, unknown zones) do not
+    reach it.
+    """
+    if name == 'RRULE':
+        return f'RRULE:{value}'
+    values = [_parse_ics_time(v, params, tz) for v in value.split(',')]
+    if not isinstance(values[0], datetime):
+        return f"{name};VALUE=DATE:{','.join(v.strftime('%Y%m%d') for v in values)}"
+    return f"{name}:{','.join(v.astimezone(UTC).strftime('%Y%m%dT%H%M%SZ') for v in values)}"
+
+
+def iter_ics_events(lines: Iterable[str], tz: Optional[str] = None) -> Iterator[dict]:
+    """
+    Yield events from ICS lines one VEVENT at a time.
+
+    Each event is a dict with summary, start, end (date or aware datetime) and, when
+    present, uid, description, location, timezone (the IANA zone of DTSTART's TZID) and
+    recurrence (RRULE, RDATE and EXDATE lines). A changed or cancelled occurrence of a
+    series also has recurrence_id (its original start) and cancelled. Floating times, and
+    times whose TZID names no known zone, use `tz`.
+    """
+    event = None
+    depth = 0
+    for line in _unfold(lines):
+        name, _, value = line.partition(':')
+        name, *raw_params = name.split(';')
+        name = name.upper()
+        params = {key.upper(): param.strip('"') for key, param in (p.split('=', 1) for p in raw_params if '=' in p)}
+
+        if name == 'BEGIN':
+            if value.upper() == 'VEVENT':
+                event = {}
+            elif event is not None:
+                depth += 1  # e.g. VALARM inside VEVENT
+            continue
+        if name == 'END':
+            if value.upper() == 'VEVENT' and event is not None:
+                if 'start' in event:
+                    if 'end' not in event:
+                        duration = event.pop('duration', None)
+                        event['end'] = event['start'] + duration if duration else default_end(event['start'])
+                    event.pop('duration', None)
+                    event.setdefault('summary', 'No title')
+                    status = event.pop('status', None)
+                    if 'recurrence_id' in event:
+                        if event.get('uid'):
+                            event['cancelled'] = status == 'CANCELLED'
+                        else:
+                            del event['recurrence_id']  # no series to belong to
+                    yield event
+                event = None
+            elif event is not None:
+                depth -= 1
+            continue
+        if event is None or depth:
+            continue
+
+        if name == 'DTSTART':
+            event['start'] = _parse_ics_time(value, params, tz)
+            zone = _zone_name(params['TZID']) if 'TZID' in params else None
+            if zone and isinstance(event['start'], datetime):
+                event['timezone'] = zone
+        elif name == 'DTEND':
+            event['end'] = _parse_ics_time(value, params, tz)
+        elif name == 'DURATION':
+            event['duration'] = _parse_duration(value)
+        elif name == 'SUMMARY':
+            event['summary'] = _unescape(value)
+        elif name == 'DESCRIPTION':
+            event['description'] = _unescape(value)
+        elif name == 'LOCATION':
+            event['location'] = _unescape(value)
+        elif name == 'UID':
+            event['uid'] = value
+        elif name in ('RRULE', 'EXDATE', 'RDATE') and params.get('VALUE') != 'PERIOD':
+            event.setdefault('recurrence', []).append(_recurrence_line(name, params, value, tz))
+        elif name == 'RECURRENCE-ID':
+            event['recurrence_id'] = _parse_ics_time(value, params, tz)
+        elif name == 'STATUS':
+            event['status'] = value.strip().upper()
+
+
+_CSV_COLUMNS = {
+    'summary': ('summary', 'subject', 'title'),
+    'start': ('start', 'start_time', 'start time', 'start date'),
+    'end': ('end', 'end_time', 'end time', 'end date'),
+    'description': ('description', 'notes'),
+    'location': ('location',),
+    'uid': ('uid', 'ical_uid', 'id'),
+}
+
+
+def iter_csv_events(lines: Iterable[str], tz: Optional[str] = None) -> Iterator[dict]:
+    """
+    Yield events from CSV rows. Columns are matched case-insensitively: summary/subject/title,
+    start/start_time, end/end_time, description, location and uid. Times are ISO 8601.
+    """
+    reader = csv.DictReader(lines)
+    columns = {}
+    for field, aliases in _CSV_COLUMNS.items():
+        for header in reader.fieldnames or []:
+            if header.strip().lower() in aliases:
+                columns[field] = header
+                break
+    if 'start' not in columns:
+        raise ValueError('CSV needs a start (or start_time) column')
+
+    for row in reader:
+        values = {field: (row.get(header) or '').strip() for field, header in columns.items()}
+        if not values.get('start'):
+            continue
+        start = parse_time(values['start'], tz)
+        event = {
+            'summary': values.get('summary') or 'No title',
+            'start': start,
+            'end': parse_time(values['end'], tz) if values.get('end') else default_end(start),
+        }
+        for field in ('description', 'location', 'uid'):
+            if values.get(field):
+                event[field] = values[field]
+        yield event
+
+
+def _ics_ranges(path: str, chunk_bytes: int = ICS_CHUNK_BYTES) -> Iterator[tuple]:
+    """Split an ICS file into byte ranges of about chunk_bytes that each start at a BEGIN:VEVENT line."""
+    size = os.path.getsize(path)
+    if not size:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start = 0
+        while start < size:
+            boundary = data.find(b'\nBEGIN:VEVENT', start + chunk_bytes)
+            end = size if boundary < 0 else boundary + 1
+            yield path, start, end
+            start = end
+
+
+def _parse_ics_range(job: tuple) -> List[dict]:
+    path, start, end, tz = job
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8-sig')
+    return list(iter_ics_events(text.splitlines(), tz))
+
+
+def resolve_file(directory: str, file_path: str, extensions: tuple) -> str:
+    """
+    Path of the relative file_path inside directory, for callers (the agent tools) that must not
+    reach other files. Raises ValueError for an absolute path, a path with a '..' component, a
+    path leading out of directory through a symlink, or an extension not in extensions.
+    """
+    parts = file_path.replace('\\', '/').split('/')
+    if not file_path.strip() or os.path.isabs(file_path) or file_path.startswith('~') or '..' in parts:
+        raise ValueError(f'{file_path!r} must be a file name relative to the import/export folder, without ".."')
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, file_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f'{file_path!r} is outside the import/export folder')
+    if not path.lower().endswith(extensions):
+        raise ValueError(f"{file_path!r} must end in {' or '.join(extensions)}")
+    return path
+
+
+def open_events(path: str, tz: Optional[str] = None, pool=None) -> Iterator[dict]:
+    """
+    Stream events from an .ics or .csv file. With an enabled compute_pool.ComputePool, ICS
+    files are parsed in parallel chunks on the pool; events are still yielded in file order.
+    """
+    if pool is not None and pool.enabled and not path.lower().endswith('.csv'):
+        jobs = ((source, start, end, tz) for source, start, end in _ics_ranges(path))
+        for events in pool.imap(_parse_ics_range, jobs):
+            yield from events
+        return
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.lower().endswith('.csv'):
+            yield from iter_csv_events(f, tz)
+        else:
+            yield from iter_ics_events(f, tz)
+
+
+# Deduplication
+
+def _epoch(value) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return (value.toordinal() - _EPOCH_ORDINAL) * 86400
+
+
+def content_hash(summary: str, start: int, end: int) -> str:
+    """Hash identifying an event by what it is rather than by its ID."""
+    key = f'{summary.strip().lower()}\x1f{start}\x1f{end}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _api_epoch(value: dict) -> int:
+    if 'dateTime' in value:
+        return _epoch(datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00')))
+    return _epoch(date.fromisoformat(value['date']))
+
+
+def _existing_keys(service, calendar_id: str, start: int, end: int):
+    """Return the iCalUIDs and content hashes of events already in [start, end)."""
+    uids, hashes = set(), set()
+    page_token = None
+    while True:
+        result = service.events().list(
+            calendarId=calendar_id,
+            timeMin=to_rfc3339(from_epoch(start)),
+            timeMax=to_rfc3339(from_epoch(end)),
+            maxResults=2500,
+            singleEvents=True,
+            pageToken=page_token
+        ).execute(num_retries=3)
+        for item in result.get('items', []):
+            if item.get('iCalUID'):
+                uids.add(item['iCalUID'])
+            if 'start' in item and 'end' in item:
+                hashes.add(content_hash(item.get('summary', 'No title'), _api_epoch(item['start']), _api_epoch(item['end'])))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return uids, hashes
+
+
+# Import
+
+def _load_checkpoint(path: Optional[str], source: str, calendar_id: str) -> dict:
+    state = {
+        'source': source, 'calendar_id': calendar_id, 'processed': 0, 'imported': 0, 'skipped': 0, 'failed': 0,
+        'series': {},  # iCalUID -> ID of the recurring events imported or found on the calendar
+        'pending': [],  # exceptions whose series has not been imported yet
+    }
+    if path and os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get('source') == source and saved.get('calendar_id') == calendar_id:
+            state.update(saved)
+    return state
+
+
+def _save_checkpoint(path: Optional[str], state: dict):
+    if not path:
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _event_body(event: dict, tz: Optional[str], uid: str) -> dict:
+    tz = event.get('timezone') or tz
+    body = {
+        'summary': event['summary'],
+        'start': event_time(event['start'], tz),
+        'end': event_time(event['end'], tz),
+        'iCalUID': uid,
+    }
+    if event.get('recurrence'):
+        body['recurrence'] = event['recurrence']
+    for field in ('description', 'location'):
+        if event.get(field):
+            body[field] = event[field]
+    if 'recurrence_id' in event:
+        # An exception to a series: recurringEventId is added once the series is on the calendar
+        body['originalStartTime'] = event_time(event['recurrence_id'], tz)
+        if event['cancelled']:
+            body['status'] = 'cancelled'
+    return body
+
+
+def _find_series(service, calendar_id: str, uid: str) -> Optional[str]:
+    """ID of the recurring event with iCalUID uid on the calendar, or None."""
+    result = service.events().list(calendarId=calendar_id, iCalUID=uid).execute(num_retries=3)
+    for item in result.get('items', []):
+        if item.get('recurrence'):
+            return item['id']
+    return None
+
+
+def _standalone(body: dict) -> dict:
+    """Body importing a changed occurrence whose series was not found as an event of its own."""
+    original = body['originalStartTime']
+    if 'dateTime' in original:
+        stamp = datetime.fromisoformat(original['dateTime']).astimezone(UTC).strftime('%Y%m%dT%H%M%SZ')
+    else:
+        stamp = original['date'].replace('-', '')
+    standalone = {key: value for key, value in body.items() if key not in ('originalStartTime', 'status')}
+    standalone['iCalUID'] = f"{body['iCalUID']}_{stamp}"
+    return standalone
+
+
+def _execute_batch(service, calendar_id: str, bodies: list, max_attempts: int = 4) -> tuple:
+    """
+    Import bodies with batch requests, retrying rate-limited or failed items. Returns (imported,
+    errors), where imported holds the events as the API returned them.
+    """
+    imported = []
+    errors = []
+    pending = bodies
+    for attempt in range(max_attempts):
+        retry = []
+
+        def callback(request_id, response, exception):
+            body = pending[int(request_id)]
+            if exception is None:
+                imported.append(response)
+            elif isinstance(exception, HttpError) and exception.resp.status in _RETRYABLE_STATUSES and attempt + 1 < max_attempts:
+                retry.append(body)
+            else:
+                errors.append(f"{body['summary']}: {exception}")
+
+        batch = service.new_batch_http_request(callback=callback)
+        for i, body in enumerate(pending):
+            batch.add(service.events().import_(calendarId=calendar_id, body=body), request_id=str(i))
+        try:
+            with span(HTTP, 'calendar.batch', quota_units=len(pending)):
+                batch.execute()
+        except HttpError as error:
+            # The whole batch was rejected, so none of its callbacks ran
+            if error.resp.status not in _RETRYABLE_STATUSES or attempt + 1 == max_attempts:
+                raise
+            retry = list(pending)
+
+        if not retry:
+            break
+        pending = retry
+        deadlines.sleep(min(2 ** attempt, 30))
+    return imported, errors
+
+
+def import_events(
+    path: str,
+    calendar_id: str,
+    get_service: Callable,
+    tz: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    chunk_size: int = BATCH_LIMIT,
+    dry_run: bool = False,
+    pool=None
+) -> dict:
+    """
+    Import events from an ICS or CSV file.
+
+    Args:
+        path: File to import (.ics or .csv)
+        calendar_id: Calendar to import into
+        get_service: Returns a Calendar service object
+        tz: Timezone for times without an offset, and of imported events without a TZID
+        checkpoint_path: JSON file recording progress after every chunk. If the import is
+                         interrupted, rerunning it with the same file skips what was
+                         already processed. Removed once the import finishes.
+        chunk_size: Events per batch request (max 50)
+        dry_run: Count what would be imported without writing anything
+        pool: Optional compute_pool.ComputePool to parse ICS files on
+
+    Returns:
+        dict: processed, imported, skipped (duplicates) and failed counts, plus errors
+    """
+    source = os.path.abspath(path)
+    state = _load_checkpoint(checkpoint_path, source, calendar_id)
+    chunk_size = max(1, min(chunk_size, BATCH_LIMIT))
+    service = get_service()
+    errors = []
+    seen = set()
+    missing = set()  # UIDs of series looked up on the calendar and not found
+
+    def write(bodies):
+        if not bodies:
+            return
+        if dry_run:
+            imported = bodies
+        else:
+            imported, batch_errors = _execute_batch(service, calendar_id, bodies)
+            state['failed'] += len(batch_errors)
+            errors.extend(batch_errors)
+        state['imported'] += len(imported)
+        for item in imported:
+            if item.get('recurrence'):
+                state['series'][item['iCalUID']] = item.get('id', '')
+
+    def series_id(uid):
+        if uid not in state['series'] and uid not in missing:
+            found = _find_series(service, calendar_id, uid)
+            if found is None:
+                missing.add(uid)
+            else:
+                state['series'][uid] = found
+        return state['series'].get(uid)
+
+    def flush(chunk):
+        starts = [_epoch(e['start']) for e in chunk]
+        ends = [_epoch(e['end']) for e in chunk]
+        uids, hashes = _existing_keys(service, calendar_id, min(starts), max(ends))
+
+        bodies = {}
+        exceptions = []
+        for event, start, end in zip(chunk, starts, ends):
+            digest = content_hash(event['summary'], start, end)
+            uid = event.get('uid') or f'{digest}@{_UID_DOMAIN}'
+            if 'recurrence_id' in event:
+                # Shares the UID of its series; importing it again updates it in place
+                key = f"{uid}\x1f{_epoch(event['recurrence_id'])}"
+                if key in seen:
+                    state['skipped'] += 1
+                else:
+                    seen.add(key)
+                    exceptions.append(_event_body(event, tz, uid))
+                continue
+            duplicate = uid in uids or digest in hashes or uid in seen or digest in seen
+            seen.update((uid, digest))
+            if duplicate:
+                state['skipped'] += 1
+                continue
+            bodies[uid] = _event_body(event, tz, uid)
+        write(list(bodies.values()))
+
+        # Exceptions go in after their series, which may come in a later chunk or already be on
+        # the calendar; until it is found they wait in the checkpoint
+        ready, waiting = [], []
+        for body in state['pending'] + exceptions:
+            found = series_id(body['iCalUID'])
+            if found is None:
+                waiting.append(body)
+            else:
+                ready.append(dict(body, recurringEventId=found))
+        state['pending'] = waiting
+        write(ready)
+
+        state['processed'] += len(chunk)
+        if not dry_run:
+            _save_checkpoint(checkpoint_path, state)
+
+    def finish():
+        # Exceptions to a series neither in the file nor on the calendar: a changed occurrence
+        # becomes an event of its own, a cancelled one has nothing left to cancel
+        orphans = [_standalone(body) for body in state['pending'] if body.get('status') != 'cancelled']
+        state['skipped'] += len(state['pending']) - len(orphans)
+        state['pending'] = []
+        write(orphans)
+
+    def progress():
+        result = {key: state[key] for key in ('processed', 'imported', 'skipped', 'failed')}
+        result['errors'] = errors[:20]
+        return result
+
+    chunk = []
+    try:
+        for index, event in enumerate(open_events(path, tz, pool)):
+            if index < state['processed']:
+                continue
+            chunk.append(event)
+            if len(chunk) >= chunk_size:
+                deadlines.check()
+                flush(chunk)
+                chunk = []
+        if chunk:
+            deadlines.check()
+            flush(chunk)
+        if state['pending']:
+            deadlines.check()
+            finish()
+    except deadlines.DeadlineExceeded as exceeded:
+        # Every finished chunk is in the checkpoint, so running the import again resumes here
+        exceeded.partial = progress()
+        raise
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)  # finished; a checkpoint only matters for an interrupted import
+    return progress()
+
+
+# Export
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line: str) -> str:
+    """Fold a content line to 75 octets as required by RFC 5545."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # do not split a UTF-8 sequence
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _format_ics_time(name: str, value: dict, zoned: bool = False) -> str:
+    """A DTSTART-like line, in UTC or with zoned in the value's timeZone (which RRULEs repeat in)."""
+    if 'dateTime' in value:
+        dt = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        if zoned and value.get('timeZone'):
+            return f"{name};TZID={value['timeZone']}:{dt.astimezone(get_zone(value['timeZone'])).strftime('%Y%m%dT%H%M%S')}"
+        return f"{name}:{dt.astimezone(UTC).strftime('%Y%m%dT%H%M%SZ')}"
+    return f"{name};VALUE=DATE:{value['date'].replace('-', '')}"
+
+
+def format_vevent(item: dict, uid: Optional[str] = None) -> str:
+    """
+    Format one Calendar API event as an ICS VEVENT block: a recurring event with its recurrence
+    lines, an exception to one (changed or cancelled) with a RECURRENCE-ID. uid replaces the
+    item's iCalUID, which cancelled exceptions may lack.
+    """
+    stamp = datetime.now(UTC).strftime('%Y%m%dT%H%M%SZ')
+    recurring = bool(item.get('recurrence'))
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:{uid or item.get('iCalUID', item['id'])}",
+        f'DTSTAMP:{stamp}',
+        _format_ics_time('DTSTART', item.get('start') or item['originalStartTime'], recurring),
+    ]
+    if 'end' in item:
+        lines.append(_format_ics_time('DTEND', item['end'], recurring))
+    lines.extend(item.get('recurrence', []))
+    if item.get('recurringEventId') and item.get('originalStartTime'):
+        # One occurrence of a series, identified by the series UID and its original start
+        lines.append(_format_ics_time('RECURRENCE-ID', item['originalStartTime']))
+    if item.get('status') == 'cancelled':
+        lines.append('STATUS:CANCELLED')
+    lines.append(f"SUMMARY:{_escape(item.get('summary', 'No title'))}")
+    if item.get('description'):
+        lines.append(f"DESCRIPTION:{_escape(item['description'])}")
+    if item.get('location'):
+        lines.append(f"LOCATION:{_escape(item['location'])}")
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+def export_events(
+    path: str,
+    calendar_id: str,
+    get_service: Callable,
+    time_min: Optional[str] = None,
+    time_max: Optional[str] = None,
+    tz: Optional[str] = None
+) -> int:
+    """
+    Write the events of a calendar in [time_min, time_max) to an ICS file, one page at a time.
+    Recurring events with an occurrence in the range are written whole, followed by their
+    changed and cancelled occurrences. If the request runs out of time, the file is closed after the last full page and the
+    DeadlineExceeded raised carries the number of events written.
+
+    Returns:
+        int: Number of events written
+    """
+    service = get_service()
+    count = 0
+    page_token = None
+    uids = {}  # ID -> iCalUID of the recurring events written
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//schedule-agent//EN\r\n')
+        try:
+            while True:
+                result = service.events().list(
+                    calendarId=calendar_id,
+                    timeMin=to_rfc3339(time_min, tz) if time_min else None,
+                    timeMax=to_rfc3339(time_max, tz) if time_max else None,
+                    maxResults=2500,
+                    singleEvents=False,
+                    pageToken=page_token
+                ).execute(num_retries=3)
+                for item in result.get('items', []):
+                    series = item.get('recurringEventId')
+                    if item.get('status') == 'cancelled' and not series:
+                        continue
+                    if item.get('recurrence'):
+                        uids[item['id']] = item.get('iCalUID', item['id'])
+                    f.write(format_vevent(item, item.get('iCalUID') or uids.get(series)))
+                    count += 1
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    break
+        except deadlines.DeadlineExceeded as exceeded:
+            exceeded.partial = {'exported': count}
+            raise
+        finally:
+            f.write('END:VCALENDAR\r\n')
+    return count
+
+
+def main(argv=None):
+    from openai_tools import get_calendar_service
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Import an .ics or .csv file')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--calendar', default='primary')
+    import_parser.add_argument('--timezone', help='Timezone for times without an offset (default: system timezone)')
+    import_parser.add_argument('--checkpoint', help='Progress file (default: <path>.checkpoint.json)')
+    import_parser.add_argument('--chunk-size', type=int, default=BATCH_LIMIT)
+    import_parser.add_argument('--dry-run', action='store_true')
+    import_parser.add_argument('--workers', type=int, help='Processes parsing the file (default: COMPUTE_WORKERS, else 0)')
+
+    export_parser = subparsers.add_parser('export', help='Export a time range to an .ics file')
+    export_parser.add_argument('path')
+    export_parser.add_argument('--calendar', default='primary')
+    export_parser.add_argument('--from', dest='time_min')
+    export_parser.add_argument('--to', dest='time_max')
+    export_parser.add_argument('--timezone')
+
+    args = parser.parse_args(argv)
+    if args.command == 'import':
+        pool = ComputePool(args.workers) if args.workers is not None else open_pool()
+        try:
+            result = import_events(
+                args.path, args.calendar, get_calendar_service, tz=args.timezone,
+                checkpoint_path=args.checkpoint or f'{args.path}.checkpoint.json',
+                chunk_size=args.chunk_size, dry_run=args.dry_run, pool=pool
+            )
+        finally:
+            pool.shutdown()
+        print(json.dumps(result, indent=2))
+    else:
+        count = export_events(args.path, args.calendar, get_calendar_service, args.time_min, args.time_max, args.timezone)
+        print(f'Exported {count} events to {args.path}')
+
+
+if __name__ == '__main__':
+    main()
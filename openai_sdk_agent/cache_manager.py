@@ -0,0 +1,260 @@
+"""
+One memory budget for every in-process cache.
+
+The event windows and calendar list (calendar_cache.py), the agendas (agenda.py) and the
+per-conversation event resolvers (event_resolver.py) register their entries here with an
+estimated size. When the total goes over CACHE_MEMORY_BUDGET, entries are evicted across
+all of them by Greedy-Dual-Size-Frequency: an entry's priority is the current inflation
+value plus its hit count times its weight divided by its size, and the lowest priority goes
+first, raising the inflation value to it. Small, often used entries stay; entries nobody
+touched recently age out, whatever tier or user they belong to. Windows and agendas near
+today get a higher weight than distant ones, so browsing old history does not push out
+the week everyone asks about.
+
+Per-tier entries, bytes, hits, misses and evictions are available from stats() and on the
+Prometheus endpoint (METRICS_PORT) as calendar_agent_cache_*.
+"""
+import heapq
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Hashable, Optional
+
+import instrumentation
+
+
+DEFAULT_BUDGET = '256MB'
+NEAR_TERM_DAYS = 14   # Windows within this many days of today count as near-term
+NEAR_TERM_WEIGHT = 4.0
+
+_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+_SIZE_RE = re.compile(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', re.IGNORECASE)
+
+
+def parse_size(value: str) -> int:
+    """'512MB' -> bytes. Plain numbers are bytes."""
+    match = _SIZE_RE.fullmatch(value)
+    if match is None:
+        raise ValueError(f'Invalid size {value!r}, expected e.g. 512MB')
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def approximate_size(value, _depth: int = 0) -> int:
+    """Rough heap size of a JSON-like value (dicts, lists, strings, numbers) or an Event."""
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        return size + sum(approximate_size(k, _depth + 1) + approximate_size(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return size + sum(approximate_size(item, _depth + 1) for item in value)
+    slots = getattr(type(value), '__slots__', None)
+    if slots and not isinstance(value, (str, bytes)):
+        # Event and similar records; interned strings shared with other entries are counted each time
+        return size + sum(sys.getsizeof(getattr(value, slot, None)) for slot in slots)
+    return size
+
+
+def near_term_weight(start: Optional[int], end: Optional[int], now: Optional[float] = None) -> float:
+    """Weight for data about the epoch range [start, end): higher if it is within NEAR_TERM_DAYS of today."""
+    now = time.time() if now is None else now
+    horizon_start, horizon_end = now - 86400, now + NEAR_TERM_DAYS * 86400
+    if (end is None or end > horizon_start) and (start is None or start < horizon_end):
+        return NEAR_TERM_WEIGHT
+    return 1.0
+
+
+class _Entry:
+    __slots__ = ('size', 'weight', 'hits', 'priority', 'on_evict')
+
+    def __init__(self, size, weight, on_evict):
+        self.size = max(int(size), 1)
+        self.weight = weight
+        self.hits = 1
+        self.priority = 0.0
+        self.on_evict = on_evict
+
+
+class _TierStats:
+    __slots__ = ('entries', 'bytes', 'hits', 'misses', 'evictions')
+
+    def __init__(self):
+        self.entries = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class CacheManager:
+    """
+    Size-aware eviction across caches sharing one memory budget.
+
+    Caches add() an entry with its size and a callback that drops it, touch() it when it is
+    served, and remove() it when they drop it themselves. Callbacks run without the
+    manager's lock held, so caches must not call the manager while holding their own lock.
+
+    Args:
+        budget: Bytes all entries together may use (None for no limit, only statistics)
+    """
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._entries = {}   # (tier, key) -> _Entry
+        self._heap = []      # (priority, sequence, (tier, key), entry); stale items are skipped
+        self._sequence = itertools.count()
+        self._inflation = 0.0
+        self._used = 0
+        self._tiers = defaultdict(_TierStats)
+
+    def _prioritize(self, name, entry):
+        # Sizes in KB keep hit counts and weights meaningful next to the inflation value
+        entry.priority = self._inflation + entry.hits * entry.weight * 1024 / entry.size
+        heapq.heappush(self._heap, (entry.priority, next(self._sequence), name, entry))
+
+    def add(self, tier: str, key: Hashable, size: int, on_evict: Callable[[], object], weight: float = 1.0):
+        """Register an entry, replacing one with the same key, then evict down to the budget."""
+        name = (tier, key)
+        entry = _Entry(size, weight, on_evict)
+        with self._lock:
+            self._discard(name)
+            self._entries[name] = entry
+            self._used += entry.size
+            stats = self._tiers[tier]
+            stats.entries += 1
+            stats.bytes += entry.size
+            self._prioritize(name, entry)
+            victims = self._select_victims()
+        self._evict(victims)
+
+    def resize(self, tier: str, key: Hashable, size: int):
+        with self._lock:
+            entry = self._entries.get((tier, key))
+            if entry is None:
+                return
+            size = max(int(size), 1)
+            self._used += size - entry.size
+            self._tiers[tier].bytes += size - entry.size
+            entry.size = size
+            self._prioritize((tier, key), entry)
+            victims = self._select_victims()
+        self._evict(victims)
+
+    def touch(self, tier: str, key: Hashable):
+        """Record that an entry was served, raising its priority."""
+        with self._lock:
+            entry = self._entries.get((tier, key))
+            if entry is not None:
+                entry.hits += 1
+                self._prioritize((tier, key), entry)
+                self._compact()
+
+    def remove(self, tier: str, key: Hashable):
+        """Forget an entry the cache dropped itself. Its callback is not called."""
+        with self._lock:
+            self._discard((tier, key))
+
+    def record(self, tier: str, hit: bool):
+        """Count a lookup in tier as a hit or a miss."""
+        with self._lock:
+            stats = self._tiers[tier]
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+    def _discard(self, name) -> Optional[_Entry]:
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._used -= entry.size
+            stats = self._tiers[name[0]]
+            stats.entries -= 1
+            stats.bytes -= entry.size
+        return entry
+
+    def _select_victims(self) -> list:
+        victims = []
+        while self.budget is not None and self._used > self.budget and self._heap:
+            priority, _, name, entry = heapq.heappop(self._heap)
+            if self._entries.get(name) is not entry or priority != entry.priority:
+                continue  # Replaced, removed or re-prioritized since this item was pushed
+            self._inflation = priority
+            self._discard(name)
+            self._tiers[name[0]].evictions += 1
+            victims.append((name, entry))
+        self._compact()
+        return victims
+
+    def _compact(self):
+        if len(self._heap) > 4 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap if self._entries.get(item[2]) is item[3] and item[0] == item[3].priority]
+            heapq.heapify(self._heap)
+
+    def _evict(self, victims):
+        for (tier, _), entry in victims:
+            instrumentation.count('cache_evictions')
+            try:
+                entry.on_evict()
+            except Exception:
+                pass
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            return self._used
+
+    def stats(self) -> dict:
+        """Budget, bytes used, and per tier: entries, bytes, hits, misses, hit ratio and evictions."""
+        with self._lock:
+            tiers = {}
+            for tier, stats in sorted(self._tiers.items()):
+                lookups = stats.hits + stats.misses
+                tiers[tier] = {
+                    'entries': stats.entries,
+                    'bytes': stats.bytes,
+                    'hits': stats.hits,
+                    'misses': stats.misses,
+                    'hit_ratio': stats.hits / lookups if lookups else 0.0,
+                    'evictions': stats.evictions,
+                }
+            return {'budget': self.budget, 'used': self._used, 'tiers': tiers}
+
+    def render_prometheus(self) -> list:
+        stats = self.stats()
+        lines = [
+            '# HELP calendar_agent_cache_bytes Estimated memory used by in-process caches.',
+            '# TYPE calendar_agent_cache_bytes gauge',
+        ]
+        lines += [f'calendar_agent_cache_bytes{{tier="{tier}"}} {tier_stats["bytes"]}' for tier, tier_stats in stats['tiers'].items()]
+        if stats['budget'] is not None:
+            lines += [
+                '# HELP calendar_agent_cache_budget_bytes Memory budget shared by the caches.',
+                '# TYPE calendar_agent_cache_budget_bytes gauge',
+                f'calendar_agent_cache_budget_bytes {stats["budget"]}',
+            ]
+        for field, kind, description in (
+            ('entries', 'gauge', 'Entries held per cache tier.'),
+            ('hits', 'counter', 'Cache lookups served from memory.'),
+            ('misses', 'counter', 'Cache lookups that had to fetch.'),
+            ('evictions', 'counter', 'Entries evicted to stay within the memory budget.'),
+        ):
+            metric = f'calendar_agent_cache_{field}' + ('_total' if kind == 'counter' else '')
+            lines += [f'# HELP {metric} {description}', f'# TYPE {metric} {kind}']
+            lines += [f'{metric}{{tier="{tier}"}} {tier_stats[field]}' for tier, tier_stats in stats['tiers'].items()]
+        return lines
+
+
+def open_manager() -> CacheManager:
+    """Manager with the CACHE_MEMORY_BUDGET budget (default 256MB; 0 for no limit)."""
+    budget = parse_size(os.getenv('CACHE_MEMORY_BUDGET', DEFAULT_BUDGET))
+    return CacheManager(budget or None)
+
+
+# Shared by every cache in the process
+MANAGER = open_manager()
+instrumentation.METRICS.add_collector(MANAGER.render_prometheus)
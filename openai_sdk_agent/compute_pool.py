@@ -0,0 +1,148 @@
+"""
+Process pool for CPU-heavy calendar computations.
+
+Tools run on worker threads, but pure-Python work such as ranking meeting slots or parsing a
+large ICS file holds the GIL, which stalls the event loop and every other conversation it
+drives. With COMPUTE_WORKERS=N that work runs in N separate processes instead; the default
+of 0 runs it inline.
+
+Interval data is handed to workers through shared memory as packed int64 (start, end) pairs
+rather than pickled, so the cost of a call does not grow with the size of the calendars.
+
+Workers are spawned, so each one re-imports the main script and imports the modules of the
+functions it runs. Those imports must not start anything: the metrics server, write-behind
+queue, snapshot and agenda timers are started by the agent (openai_agent.start(), or
+google_adk_agent/agent.py, which the package loads only when ADK asks for it).
+"""
+import itertools
+import os
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+Interval = Tuple[int, int]
+
+
+class SharedIntervals:
+    """
+    Intervals per key packed into one shared-memory block. Use as a context manager; the
+    block is released on exit.
+
+    Args:
+        intervals: (start, end) epoch pairs per key
+    """
+
+    def __init__(self, intervals: Dict[str, List[Interval]]):
+        self.keys = list(intervals)
+        self.offsets = [0]
+        for key in self.keys:
+            self.offsets.append(self.offsets[-1] + 2 * len(intervals[key]))
+        packed = array('q', itertools.chain.from_iterable(itertools.chain.from_iterable(intervals.values())))
+        self._memory = SharedMemory(create=True, size=max(packed.itemsize * len(packed), 1))
+        self._memory.buf[:len(packed) * packed.itemsize] = memoryview(packed).cast('B')
+
+    @property
+    def handle(self) -> tuple:
+        """Small picklable reference that a worker passes to read_intervals()."""
+        return self._memory.name, self.keys, self.offsets
+
+    def close(self):
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_intervals(handle: tuple) -> Dict[str, List[Interval]]:
+    """Read intervals packed by SharedIntervals, in a worker process."""
+    name, keys, offsets = handle
+    memory = SharedMemory(name=name)
+    try:
+        values = memory.buf.cast('q')
+        try:
+            return {
+                key: list(zip(values[start:end:2], values[start + 1:end:2]))
+                for key, start, end in zip(keys, offsets, offsets[1:])
+            }
+        finally:
+            values.release()
+    finally:
+        memory.close()
+
+
+def _call_with_intervals(func: Callable, handle: tuple, args: tuple, kwargs: dict):
+    return func(read_intervals(handle), *args, **kwargs)
+
+
+class ComputePool:
+    """
+    Runs functions inline or on a lazily started process pool. Functions and their
+    arguments must be picklable (module-level functions, plain data).
+
+    Args:
+        workers: Processes in the pool. 0 runs everything inline in the calling thread.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn rather than fork: the parent has threads (event loop, prefetch, write queue)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+            return self._executor
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Call func(*args, **kwargs) and return its result."""
+        if not self.enabled:
+            return func(*args, **kwargs)
+        return self._pool().submit(func, *args, **kwargs).result()
+
+    def run_with_intervals(self, func: Callable, intervals: Dict[str, List[Interval]], *args, **kwargs):
+        """Call func(intervals, *args, **kwargs), passing intervals through shared memory."""
+        if not self.enabled:
+            return func(intervals, *args, **kwargs)
+        with SharedIntervals(intervals) as shared:
+            return self._pool().submit(_call_with_intervals, func, shared.handle, args, kwargs).result()
+
+    def imap(self, func: Callable, items: Iterable, window: Optional[int] = None) -> Iterator:
+        """Yield func(item) for each item, in order, keeping at most `window` calls in flight."""
+        if not self.enabled:
+            yield from map(func, items)
+            return
+        pool = self._pool()
+        window = window or 2 * self.workers
+        in_flight = deque()
+        for item in items:
+            in_flight.append(pool.submit(func, item))
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+def open_pool() -> ComputePool:
+    """Pool sized by COMPUTE_WORKERS (default 0: inline)."""
+    return ComputePool(int(os.getenv('COMPUTE_WORKERS', '0')))
@@ -0,0 +1,183 @@
+"""
+OAuth credential handling shared by every thread (and, through a lock, every process).
+
+CredentialManager keeps the current credentials in memory, so tool calls do not re-read
+token.json, and makes sure a token is refreshed once no matter how many callers need it:
+threads wait on an in-process lock and processes on a file or shared-store lock, and each
+re-reads the saved token before refreshing in case another caller already did. Tokens are
+refreshed a few minutes before they expire, in the background when possible, so tool calls
+rarely wait for the OAuth endpoint.
+"""
+import os
+import tempfile
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+REFRESH_MARGIN = 300  # Seconds before expiry at which a token is refreshed
+
+
+def write_atomic(path: str, data: str):
+    """Replace path with data so readers see either the old or the new file, never a partial one."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class FileLock:
+    """Exclusive lock between processes on one host, held on a separate lock file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def _utcnow() -> datetime:
+    # google-auth keeps expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CredentialManager:
+    """
+    Single-flight, proactively refreshed OAuth credentials.
+
+    Args:
+        load: Returns the saved credentials, or None
+        save: Persists credentials after a refresh or authorization
+        authorize: Runs the interactive OAuth flow and returns new credentials
+        lock: Context manager excluding other processes while refreshing (default: none)
+        refresh_margin: Seconds before expiry at which credentials are refreshed
+        background: Refresh on a background thread shortly before expiry
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Optional[Credentials]],
+        save: Callable[[Credentials], object],
+        authorize: Callable[[], Credentials],
+        lock=None,
+        refresh_margin: float = REFRESH_MARGIN,
+        background: bool = True
+    ):
+        self.load = load
+        self.save = save
+        self.authorize = authorize
+        self.refresh_margin = refresh_margin
+        self.background = background
+        self.refreshes = 0
+        self._process_lock = lock if lock is not None else nullcontext()
+        self._lock = threading.Lock()
+        self._creds = None
+        self._timer = None
+
+    def _fresh(self, creds: Optional[Credentials]) -> bool:
+        if creds is None or not creds.valid:
+            return False
+        return creds.expiry is None or creds.expiry - _utcnow() > timedelta(seconds=self.refresh_margin)
+
+    def get(self) -> Credentials:
+        """Return valid credentials, refreshing or authorizing first if needed."""
+        creds = self._creds
+        if self._fresh(creds):
+            return creds
+        with self._lock:
+            # Another thread may have refreshed while this one waited
+            if not self._fresh(self._creds):
+                self._creds = self._obtain(interactive=True)
+                self._schedule()
+            return self._creds
+
+    def invalidate(self):
+        """Forget the in-memory credentials, e.g. after the API rejected them."""
+        with self._lock:
+            self._creds = None
+
+    def _obtain(self, interactive: bool) -> Credentials:
+        with self._process_lock:
+            # Another process may have refreshed already, in which case its token is reused
+            creds = self.load()
+            if self._fresh(creds):
+                return creds
+            if creds is not None and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                except Exception:
+                    # A token inside the margin still works; refreshing is retried next time
+                    if creds.valid:
+                        return creds
+                    raise
+                self.refreshes += 1
+            elif interactive:
+                creds = self.authorize()
+            else:
+                return creds
+            self.save(creds)
+            return creds
+
+    # Background refresh
+
+    def _schedule(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        creds = self._creds
+        if not self.background or creds is None or creds.expiry is None or not creds.refresh_token:
+            return
+        delay = (creds.expiry - _utcnow()).total_seconds() - self.refresh_margin
+        self._timer = threading.Timer(max(delay, 10.0), self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            try:
+                creds = self._obtain(interactive=False)
+                if creds is not None:
+                    self._creds = creds
+            except Exception:
+                pass  # get() refreshes in the foreground if the token runs out
+            self._schedule()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
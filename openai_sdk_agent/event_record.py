@@ -0,0 +1,181 @@
+import sys
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+
+UTC = dt_timezone.utc
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=128)
+def _shared_offset(offset: timedelta):
+    # One tzinfo object per distinct UTC offset, shared by every event using it
+    return UTC if not offset else dt_timezone(offset)
+
+
+def _intern(value):
+    return sys.intern(value) if value else value
+
+
+def _parse_api_time(value: dict):
+    """Return (epoch seconds, tzinfo) for a Calendar API start/end object. tzinfo is None for all-day."""
+    if 'dateTime' in value:
+        dt = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        return int(dt.timestamp()), _shared_offset(dt.utcoffset())
+    day = date.fromisoformat(value['date'])
+    return (day.toordinal() - _EPOCH_ORDINAL) * 86400, None
+
+
+def wall_epoch(epoch: int, tz) -> int:
+    """
+    The wall-clock time in tz at epoch, as epoch seconds read in UTC: the scale all-day
+    events are stored on, so they can be compared by date in tz.
+    """
+    return epoch + int(datetime.fromtimestamp(epoch, tz).utcoffset().total_seconds())
+
+
+def _offset_seconds(tz) -> Optional[int]:
+    return None if tz is None else int(tz.utcoffset(None).total_seconds())
+
+
+def _offset_tz(seconds: Optional[int]):
+    return None if seconds is None else _shared_offset(timedelta(seconds=seconds))
+
+
+def _format_time(epoch: int, tz) -> str:
+    if tz is None:
+        return date.fromordinal(epoch // 86400 + _EPOCH_ORDINAL).isoformat()
+    return datetime.fromtimestamp(epoch, tz).isoformat()
+
+
+class Event:
+    """
+    Compact representation of a calendar event.
+
+    Times are stored as epoch seconds plus a shared fixed-offset tzinfo; all-day events have
+    None and their dates stored as UTC midnights. Calendar IDs and repeated text such as
+    recurring summaries are interned.
+    Tool-output dicts are only built when to_dict() is called.
+    """
+
+    __slots__ = (
+        'id', 'calendar_id', 'summary', 'start', 'end', 'start_tz', 'end_tz',
+        'description', 'location', 'link', 'ical_uid', 'attendees',
+    )
+
+    def __init__(
+        self,
+        id: str,
+        calendar_id: str,
+        summary: str,
+        start: int,
+        end: int,
+        start_tz=None,
+        end_tz=None,
+        description: Optional[str] = None,
+        location: Optional[str] = None,
+        link: Optional[str] = None,
+        ical_uid: Optional[str] = None,
+        attendees: Optional[tuple] = None
+    ):
+        self.id = id
+        self.calendar_id = sys.intern(calendar_id)
+        self.summary = _intern(summary)
+        self.start = start
+        self.end = end
+        self.start_tz = start_tz
+        self.end_tz = end_tz
+        self.description = _intern(description)
+        self.location = _intern(location)
+        self.link = link
+        self.ical_uid = ical_uid
+        self.attendees = attendees
+
+    @classmethod
+    def from_api(cls, item: dict, calendar_id: str) -> 'Event':
+        """Build an Event from an item returned by the Calendar API."""
+        start, start_tz = _parse_api_time(item['start'])
+        end, end_tz = _parse_api_time(item['end'])
+        attendees = item.get('attendees')
+        return cls(
+            id=item['id'],
+            calendar_id=calendar_id,
+            summary=item.get('summary', 'No title'),
+            start=start,
+            end=end,
+            start_tz=start_tz,
+            end_tz=end_tz,
+            description=item.get('description'),
+            location=item.get('location'),
+            link=item.get('htmlLink'),
+            ical_uid=item.get('iCalUID'),
+            attendees=tuple(sys.intern(a['email']) for a in attendees if 'email' in a) if attendees else None
+        )
+
+    def to_record(self) -> list:
+        """Compact JSON-serializable form, used to share cached events between processes."""
+        return [
+            self.id, self.calendar_id, self.summary, self.start, self.end,
+            _offset_seconds(self.start_tz), _offset_seconds(self.end_tz),
+            self.description, self.location, self.link, self.ical_uid,
+            list(self.attendees) if self.attendees else None,
+        ]
+
+    @classmethod
+    def from_record(cls, record: list) -> 'Event':
+        id, calendar_id, summary, start, end, start_offset, end_offset, description, location, link, ical_uid, attendees = record
+        return cls(
+            id, calendar_id, summary, start, end,
+            _offset_tz(start_offset), _offset_tz(end_offset),
+            description, location, link, ical_uid,
+            tuple(sys.intern(a) for a in attendees) if attendees else None
+        )
+
+    @property
+    def all_day(self) -> bool:
+        return self.start_tz is None
+
+    @property
+    def start_iso(self) -> str:
+        return _format_time(self.start, self.start_tz)
+
+    @property
+    def end_iso(self) -> str:
+        return _format_time(self.end, self.end_tz)
+
+    def overlaps(self, start: int, end: Optional[int] = None, tz=None) -> bool:
+        """
+        Return True if the event intersects the [start, end) epoch range. All-day events are
+        compared by date in tz (a tzinfo, the query's timeZone), or in UTC without one.
+        """
+        if tz is not None and self.all_day:
+            start, end = wall_epoch(start, tz), None if end is None else wall_epoch(end, tz)
+        return self.end > start and (end is None or self.start < end)
+
+    def to_dict(self) -> dict:
+        """Serialize to the dict format returned by get_calendar_events()."""
+        formatted_event = {
+            'id': self.id,
+            'summary': self.summary,
+            'start': self.start_iso,
+            'end': self.end_iso,
+        }
+
+        if self.description is not None:
+            formatted_event['description'] = self.description
+        if self.location is not None:
+            formatted_event['location'] = self.location
+        if self.link is not None:
+            formatted_event['link'] = self.link
+
+        return formatted_event
+
+    def __repr__(self):
+        return f'Event(id={self.id!r}, summary={self.summary!r}, start={self.start_iso!r})'
+
+
+def serialize(events: Iterable[Event]) -> Iterator[dict]:
+    """Lazily yield tool-output dicts for a sequence of events."""
+    for event in events:
+        yield event.to_dict()
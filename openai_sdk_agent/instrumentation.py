@@ -0,0 +1,458 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+from googleapiclient.http import HttpRequest
+
+import deadlines
+
+
+# Span kinds used by the agents
+TURN = 'turn'
+LLM = 'llm'
+TOOL = 'tool'
+SERVICE = 'service'
+HTTP = 'http'
+
+_QUANTILES = (0.5, 0.95, 0.99)
+_RESERVOIR_SIZE = 4096
+
+_current_turn = contextvars.ContextVar('current_turn', default=None)
+_active_kinds = contextvars.ContextVar('active_kinds', default=frozenset())
+
+
+class _Series:
+    __slots__ = ('count', 'errors', 'total', 'bytes_sent', 'bytes_received', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.samples = deque(maxlen=_RESERVOIR_SIZE)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsRegistry:
+    """
+    In-process recorder keeping counts, errors, bytes and latency percentiles per (kind, name).
+
+    Percentiles are computed over the most recent samples of each series.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = defaultdict(_Series)
+        self._quota = defaultdict(int)
+        self._counters = defaultdict(int)
+        self._collectors = []
+
+    def add_collector(self, collect: Callable[[], List[str]]):
+        """Append the Prometheus lines returned by collect() to every render, e.g. gauges owned elsewhere."""
+        self._collectors.append(collect)
+
+    def record(self, kind: str, name: str, seconds: float, error: bool = False, attributes: Optional[dict] = None):
+        attributes = attributes or {}
+        with self._lock:
+            series = self._series[(kind, name)]
+            series.count += 1
+            series.errors += int(error)
+            series.total += seconds
+            series.bytes_sent += attributes.get('bytes_sent', 0)
+            series.bytes_received += attributes.get('bytes_received', 0)
+            series.samples.append(seconds)
+            if attributes.get('quota_units'):
+                self._quota[name] += attributes['quota_units']
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._quota.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable view of all recorded series."""
+        with self._lock:
+            return {
+                'series': [
+                    {
+                        'kind': kind,
+                        'name': name,
+                        'count': series.count,
+                        'errors': series.errors,
+                        'total_seconds': series.total,
+                        'bytes_sent': series.bytes_sent,
+                        'bytes_received': series.bytes_received,
+                        **{f'p{int(q * 100)}': series.quantile(q) for q in _QUANTILES},
+                    }
+                    for (kind, name), series in sorted(self._series.items())
+                ],
+                'quota_units': dict(self._quota),
+                'counters': dict(self._counters),
+            }
+
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+        lines = [
+            '# HELP calendar_agent_duration_seconds Latency of LLM turns, tools, service setup and HTTP requests.',
+            '# TYPE calendar_agent_duration_seconds summary',
+        ]
+        with self._lock:
+            items = sorted(self._series.items())
+            for (kind, name), series in items:
+                labels = f'kind="{kind}",name="{name}"'
+                for q in _QUANTILES:
+                    lines.append(f'calendar_agent_duration_seconds{{{labels},quantile="{q}"}} {series.quantile(q):.6f}')
+                lines.append(f'calendar_agent_duration_seconds_sum{{{labels}}} {series.total:.6f}')
+                lines.append(f'calendar_agent_duration_seconds_count{{{labels}}} {series.count}')
+
+            lines.append('# HELP calendar_agent_errors_total Failed calls.')
+            lines.append('# TYPE calendar_agent_errors_total counter')
+            for (kind, name), series in items:
+                lines.append(f'calendar_agent_errors_total{{kind="{kind}",name="{name}"}} {series.errors}')
+
+            lines.append('# HELP calendar_agent_bytes_total Payload bytes sent and received.')
+            lines.append('# TYPE calendar_agent_bytes_total counter')
+            for (kind, name), series in items:
+                if series.bytes_sent or series.bytes_received:
+                    lines.append(f'calendar_agent_bytes_total{{kind="{kind}",name="{name}",direction="sent"}} {series.bytes_sent}')
+                    lines.append(f'calendar_agent_bytes_total{{kind="{kind}",name="{name}",direction="received"}} {series.bytes_received}')
+
+            lines.append('# HELP calendar_agent_quota_units_total Calendar API quota units consumed.')
+            lines.append('# TYPE calendar_agent_quota_units_total counter')
+            for method, units in sorted(self._quota.items()):
+                lines.append(f'calendar_agent_quota_units_total{{method="{method}"}} {units}')
+
+            lines.append('# HELP calendar_agent_events_total Counted events, such as tool calls served from the memo.')
+            lines.append('# TYPE calendar_agent_events_total counter')
+            for name, value in sorted(self._counters.items()):
+                lines.append(f'calendar_agent_events_total{{name="{name}"}} {value}')
+
+        for collect in self._collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
+_recorders = [METRICS]
+_tracer = None
+
+
+def add_recorder(recorder):
+    """Register an extra recorder. It must provide record(kind, name, seconds, error, attributes)."""
+    _recorders.append(recorder)
+
+
+def remove_recorder(recorder):
+    _recorders.remove(recorder)
+
+
+def enable_opentelemetry(tracer_provider=None) -> bool:
+    """
+    Emit an OpenTelemetry span for every recorded span, nested so tool calls and HTTP
+    requests appear under the LLM turn that triggered them.
+
+    Returns False if opentelemetry-api is not installed.
+    """
+    global _tracer
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return False
+    _tracer = trace.get_tracer('schedule-agent', tracer_provider=tracer_provider)
+    return True
+
+
+class TurnStats:
+    """Time spent in each span kind during one user turn. Nested spans of the same kind count once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.bytes_received = defaultdict(int)
+        self.quota_units = 0
+        self.tokens = 0
+        self.counters = defaultdict(int)
+        self.total_seconds = 0.0
+        self._token = None
+        self._span = None
+        self._depth = 0
+
+    def add(self, kind: str, seconds: float, attributes: Optional[dict] = None):
+        attributes = attributes or {}
+        with self._lock:
+            self.seconds[kind] += seconds
+            self.calls[kind] += 1
+            self.bytes_received[kind] += attributes.get('bytes_received', 0)
+            self.quota_units += attributes.get('quota_units', 0)
+            self.tokens += attributes.get('tokens', 0)
+
+    def summary(self) -> dict:
+        return {
+            'total_seconds': self.total_seconds,
+            'seconds': dict(self.seconds),
+            'calls': dict(self.calls),
+            'bytes_received': dict(self.bytes_received),
+            'quota_units': self.quota_units,
+            'tokens': self.tokens,
+            'counters': dict(self.counters),
+        }
+
+
+class Span:
+    """A timed operation. Use span() for blocks, or start()/finish() from framework hooks."""
+
+    def __init__(self, kind: str, name: str, **attributes):
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes
+        self.error = False
+        self._started = None
+        self._nested = False
+        self._kinds_token = None
+        self._otel_span = None
+        self._otel_token = None
+
+    def start(self) -> 'Span':
+        active = _active_kinds.get()
+        self._nested = self.kind in active
+        self._kinds_token = _active_kinds.set(active | {self.kind})
+        if _tracer is not None:
+            from opentelemetry import context, trace
+            self._otel_span = _tracer.start_span(f'{self.kind} {self.name}')
+            self._otel_token = context.attach(trace.set_span_in_context(self._otel_span))
+        self._started = time.perf_counter()
+        return self
+
+    def finish(self, error: Optional[bool] = None):
+        seconds = time.perf_counter() - self._started
+        if error is not None:
+            self.error = error
+
+        for recorder in _recorders:
+            recorder.record(self.kind, self.name, seconds, self.error, self.attributes)
+
+        turn = _current_turn.get()
+        if turn is not None and not self._nested and self.kind != TURN:
+            turn.add(self.kind, seconds, self.attributes)
+
+        if self._otel_span is not None:
+            from opentelemetry import context
+            for key, value in self.attributes.items():
+                self._otel_span.set_attribute(key, value)
+            self._otel_span.set_attribute('error', self.error)
+            self._otel_span.end()
+            try:
+                context.detach(self._otel_token)
+            except ValueError:
+                # Finished from a different context than it was started in (framework hooks)
+                pass
+        try:
+            _active_kinds.reset(self._kinds_token)
+        except ValueError:
+            pass
+        return seconds
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes):
+    current = Span(kind, name, **attributes).start()
+    try:
+        yield current
+    except BaseException:
+        current.finish(error=True)
+        raise
+    current.finish()
+
+
+def begin_turn() -> TurnStats:
+    """
+    Start grouping spans under a new user turn. Pair with end_turn().
+
+    If a turn is already active (e.g. a harness wrapping an agent that also opens turns),
+    the active turn is reused and only the outermost end_turn() closes it.
+    """
+    stats = _current_turn.get()
+    if stats is not None:
+        stats._depth += 1
+        return stats
+    stats = TurnStats()
+    stats._token = _current_turn.set(stats)
+    stats._span = Span(TURN, 'user_request').start()
+    return stats
+
+
+def end_turn(stats: TurnStats) -> dict:
+    if stats._depth:
+        stats._depth -= 1
+        return stats.summary()
+    stats._span.finish()
+    stats.total_seconds = time.perf_counter() - stats.started
+    try:
+        _current_turn.reset(stats._token)
+    except ValueError:
+        _current_turn.set(None)
+    return stats.summary()
+
+
+@contextmanager
+def turn():
+    """
+    Group all spans recorded during one user request.
+
+    Example:
+        with instrumentation.turn() as stats:
+            result = await Runner.run(agent, input=user_query, session=session)
+        print(stats.summary())
+    """
+    stats = begin_turn()
+    try:
+        yield stats
+    finally:
+        end_turn(stats)
+
+
+def current_turn() -> Optional[TurnStats]:
+    return _current_turn.get()
+
+
+def count(name: str, amount: int = 1):
+    """Increment a named counter globally and on the active turn."""
+    METRICS.increment(name, amount)
+    stats = _current_turn.get()
+    if stats is not None:
+        with stats._lock:
+            stats.counters[name] += amount
+
+
+def timed(kind: str, name: Optional[str] = None):
+    """Decorator recording every call of a function as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_tool(func):
+    """
+    Decorator for agent tools. Records latency, result size and an error when the tool
+    raises or returns {'success': False}. The signature and docstring are preserved so
+    function_tool() and ADK still build the same schema.
+
+    The tool runs under the request's deadline (see deadlines.py), narrowed to TOOL_TIMEOUT
+    seconds if that is set. A tool that runs out of time returns {'success': False,
+    'timed_out': True} plus whatever it finished, instead of raising.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tool_timeout = deadlines.env_seconds('TOOL_TIMEOUT')
+        with span(TOOL, func.__name__) as current, (deadlines.scope(tool_timeout) if tool_timeout else nullcontext()):
+            try:
+                deadlines.check()
+                result = func(*args, **kwargs)
+            except deadlines.DeadlineExceeded as exceeded:
+                result = dict(exceeded.partial, success=False, error=f'Timed out: {exceeded}')
+            deadline = deadlines.current()
+            if isinstance(result, dict) and result.get('success') is False and deadline is not None and deadline.expired:
+                result['timed_out'] = True
+                count('tool_timeouts')
+            if isinstance(result, dict):
+                current.error = result.get('success') is False
+                current.attributes['bytes_received'] = len(json.dumps(result, default=str))
+            return result
+    return wrapper
+
+
+class InstrumentedHttpRequest(HttpRequest):
+    """HttpRequest that records every .execute() as an HTTP span, with payload sizes and quota units."""
+
+    # Optional shared RateLimiter; when set, every request takes a token before it is sent
+    limiter = None
+
+    def execute(self, http=None, num_retries=0):
+        deadline = deadlines.current()
+        if deadline is None:
+            return self._execute(http, num_retries)
+        deadline.check()
+        # Only retry as often as the backoff fits in the time left, and stop waiting on the
+        # socket when the deadline passes; cancelling the request shuts the socket down
+        transport = http or self.http
+        remaining = deadline.remaining()
+        if remaining is not None:
+            num_retries = deadlines.retries_within(remaining, num_retries)
+            deadlines.limit_socket_timeout(transport, max(remaining, 0.001))
+        with deadline.on_cancel(lambda: deadlines.abort_connections(transport)):
+            try:
+                return self._execute(http, num_retries)
+            except OSError as error:
+                if deadline.expired and not isinstance(error, deadlines.DeadlineExceeded):
+                    raise deadlines.DeadlineExceeded(f'{self.methodId or self.method} stopped: {error}') from error
+                raise
+
+    def _execute(self, http, num_retries):
+        if self.limiter is not None:
+            self.limiter.acquire(sleep=deadlines.sleep)
+        received = []
+        postproc = self.postproc
+
+        def counting_postproc(resp, content):
+            received.append(len(content or b''))
+            return postproc(resp, content)
+
+        self.postproc = counting_postproc
+        current = Span(
+            HTTP,
+            self.methodId or self.method,
+            bytes_sent=len(self.body or ''),
+            quota_units=1,
+        ).start()
+        try:
+            return super().execute(http=http, num_retries=num_retries)
+        except BaseException:
+            current.error = True
+            raise
+        finally:
+            self.postproc = postproc
+            current.attributes['bytes_received'] = sum(received)
+            current.finish()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = METRICS.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve METRICS in Prometheus text format on a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,8 +1,19 @@
+import os
+from contextlib import nullcontext
+
 from dotenv import load_dotenv
-from openai_tools import add_calendar_event, get_calendar_events, delete_calendar_event, update_calendar_event, list_calendars, invite_to_event, get_time_info
+import deadlines
+import event_resolver
+import instrumentation
+import profiling
+import shared_store
+import tool_memo
+import transcripts
+from openai_tools import add_calendar_event, get_agenda, get_calendar_events, get_merged_events, delete_calendar_event, update_calendar_event, list_calendars, invite_to_event, find_meeting_times, search_events, import_calendar_events, export_calendar_events, get_time_info, prefetch_calendar_data, answer_agenda_request, start_background_tasks
+from tool_memo import invalidates, memoize
 import asyncio
 
-from agents import Agent, Runner, function_tool, SQLiteSession
+from agents import Agent, Runner, RunHooks, function_tool, SQLiteSession
 
 
 load_dotenv(override=True)
@@ -21,37 +32,154 @@ prompt = f"""
     You have access to the following tools to complete the task the user asks you.
     - list_calendars() - List all available calendars the user has access to
     - add_calendar_event() - Add a new event to a calendar (supports attendees for sending invites)
+    - get_agenda() - Get a compact agenda of a day or a week; precomputed, so it is the fastest way to see a schedule
     - get_calendar_events() - Retrieve upcoming events from a calendar (supports calendar_id parameter)
-    - update_calendar_event() - Update an event on a calendar (requires event_id and calendar_id)
-    - delete_calendar_event() - Delete an event from a calendar (requires event_id and calendar_id)
+    - get_merged_events() - Retrieve events from several or all calendars as one list, listing shared meetings once
+    - search_events() - Find events by keywords in their title, description, location or attendees
+    - update_calendar_event() - Update an event on a calendar (by event_id, or by event_summary and event_date)
+    - delete_calendar_event() - Delete an event from a calendar (by event_id, or by event_summary and event_date)
     - invite_to_event() - Add attendees to an existing event and send email invitations
+    - find_meeting_times() - Find times when a group of attendees are all free
+    - import_calendar_events() - Import events from an .ics or .csv file in the import/export folder (skips events that already exist)
+    - export_calendar_events() - Export events in a time range to an .ics file in the import/export folder (replaces an existing file only if the user asks)
 
     IMPORTANT: The user may have multiple calendars. When the user mentions a specific calendar by name
     (e.g., "work calendar", "personal calendar", "family calendar"), first use list_calendars() to find
-    the correct calendar_id, then use that ID with the calendar functions.
+    the correct calendar_id, then use that ID with the calendar functions. When the user asks about all of
+    their calendars, use get_merged_events() instead of calling get_calendar_events() for each one.
 
-    When deleting events, first use get_calendar_events() to find the event and get its event_id,
-    then use delete_calendar_event() with that ID.
+    To delete, update or invite people to an event, pass its event_id if you already have it. Otherwise pass its
+    title as event_summary and its date (or time) as event_date, e.g. delete_calendar_event(event_summary="Dentist appointment",
+    event_date="2025-01-15"), and the tool finds the event; there is no need to look it up first. If the tool reports
+    several matching events, call it again with the event_id of the one the user means.
 
     If no specific calendar is mentioned, use the primary calendar (calendar_id='primary').
 
     If you make any changes to the user's calendar, include a summary of those changes below.
-    When the user asks about their schedule or upcoming events, use get_calendar_events() to retrieve them.
+    When the user asks what their day or week looks like, use get_agenda(). For other time ranges, or when
+    event descriptions are needed, use get_calendar_events().
     """
 
 agent = Agent(
     name="Assistant",
     model="gpt-5-mini",
     instructions=prompt,
-    tools=[function_tool(list_calendars), function_tool(add_calendar_event), function_tool(get_calendar_events), function_tool(update_calendar_event), function_tool(delete_calendar_event), function_tool(invite_to_event)]
+    # Read tools are memoized within a run and write tools clear the memo (see tool_memo.py)
+    tools=[
+        function_tool(memoize(list_calendars)), function_tool(invalidates(add_calendar_event)), function_tool(memoize(get_calendar_events)), function_tool(memoize(get_agenda)), function_tool(memoize(get_merged_events)),
+        function_tool(invalidates(update_calendar_event)), function_tool(invalidates(delete_calendar_event)), function_tool(invalidates(invite_to_event)),
+        function_tool(memoize(find_meeting_times)), function_tool(memoize(search_events)), function_tool(invalidates(import_calendar_events)), function_tool(export_calendar_events)
+    ]
 )
 
-session = SQLiteSession("conversation_memory")
+class InstrumentationHooks(RunHooks):
+    """Records each model call as an LLM span, so turns can be split into model and tool time."""
+
+    def __init__(self):
+        self._llm_spans = {}
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._llm_spans[id(context)] = instrumentation.Span(instrumentation.LLM, str(agent.model)).start()
+
+    async def on_llm_end(self, context, agent, response):
+        span = self._llm_spans.pop(id(context), None)
+        if span is not None:
+            if response.usage:
+                span.attributes['tokens'] = response.usage.total_tokens
+            span.finish()
+
+    async def on_tool_end(self, context, agent, tool, result):
+        # Only kept while a turn is being recorded (RECORD_CONVERSATIONS)
+        transcripts.record_tool_call(tool.name, getattr(context, "tool_arguments", None), result)
+
+
+# Set METRICS_PORT to expose Prometheus metrics (see start()), OTEL_TRACING=1 to emit OpenTelemetry spans
+if os.getenv("OTEL_TRACING"):
+    instrumentation.enable_opentelemetry()
+
+_started = False
+
+def start():
+    """
+    Start what runs alongside the agent: the METRICS_PORT endpoint and the tools' background work.
+    Done once, at startup or before the first turn, rather than at import: compute pool workers
+    re-import this script (see compute_pool.py) and must not start any of it.
+    """
+    global _started
+    if _started:
+        return
+    _started = True
+    if os.getenv("METRICS_PORT"):
+        instrumentation.start_metrics_server(int(os.getenv("METRICS_PORT")))
+    start_background_tasks()
+
+def open_session(session_id: str):
+    """
+    Open the conversation session in the backend named by CALENDAR_STORE, so any worker
+    sharing the store can pick up the conversation: a SQLite file for sqlite:// stores,
+    Redis for redis:// stores, and process memory otherwise.
+    """
+    url = os.getenv("CALENDAR_STORE", "memory://")
+    if url.startswith("sqlite://"):
+        return SQLiteSession(session_id, db_path=shared_store.sqlite_path(url))
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        from agents.extensions.memory import RedisSession
+        return RedisSession.from_url(session_id, url=url)
+    return SQLiteSession(session_id)
+
+
+hooks = InstrumentationHooks()
+session = open_session(os.getenv("SESSION_ID", "conversation_memory"))
+# Set RECORD_CONVERSATIONS=path to record turns for benchmarks/replay.py
+recorder = transcripts.open_recorder("openai")
+# Set PROFILE_SAMPLE_RATE or PROFILE_TURN to write sampled profiles of turns (see profiling.py)
+profiler = profiling.open_profiler()
+# Set AGENDA_FAST_PATH=1 to answer plain "what does my day/week look like?" messages from the
+# precomputed agenda (see agenda.py) without a model call
+AGENDA_FAST_PATH = bool(os.getenv("AGENDA_FAST_PATH"))
+# Set AGENT_RUN_TIMEOUT to stop a turn, and the tool calls it started, after that many seconds
+RUN_TIMEOUT = deadlines.env_seconds("AGENT_RUN_TIMEOUT")
+
+async def respond(user_query: str, session, starting_agent: Agent = None):
+    """
+    Run one user turn in session: instrumented, with tool memoization, and recorded if enabled.
+    If the turn is cancelled or runs past AGENT_RUN_TIMEOUT, its tool calls stop as well (see deadlines.py).
+    """
+    start()
+    # Events seen earlier in the session can be referred to by title (see event_resolver.py)
+    with instrumentation.turn() as stats, tool_memo.memo_run(), event_resolver.session(session.session_id), \
+            deadlines.scope(RUN_TIMEOUT) as deadline, \
+            profiler.turn(stats, session.session_id) if profiler else nullcontext():
+        transcript = recorder.begin(session.session_id, user_query, stats) if recorder else None
+        reply = await asyncio.to_thread(answer_agenda_request, user_query) if AGENDA_FAST_PATH else None
+        if reply is not None:
+            # Keep the exchange in the session so follow-up messages have it as context
+            await session.add_items([{"role": "user", "content": user_query}, {"role": "assistant", "content": reply}])
+        else:
+            try:
+                result = await asyncio.wait_for(
+                    Runner.run(starting_agent or agent, input=user_query, session=session, hooks=hooks),
+                    deadline.remaining()
+                )
+                reply = result.final_output
+            except TimeoutError:
+                # Tools still running on worker threads stop at their next Calendar request
+                deadline.cancel("timed out")
+                instrumentation.count("run_timeouts")
+                reply = deadlines.TIMEOUT_REPLY
+        if transcript is not None:
+            recorder.finish(transcript, str(reply))
+    return reply
+
 async def main():
+    start()
+    # With CALENDAR_PREFETCH set, calendar data is fetched in the background at session start
+    # and again while the model works on each message
+    prefetch_calendar_data()
     while True:
         user_query = input("[user]: ")
-        result = await Runner.run(agent, input=user_query, session=session)
-        print(result.final_output)
+        prefetch_calendar_data()
+        print(await respond(user_query, session))
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,21 +1,337 @@
 import os
+import contextvars
 import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
-from tzlocal import get_localzone
-
-from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+import agenda
+import availability
+import bulk_io
+import cache_manager
+import compute_pool
+import credentials
+import deadlines
+import event_resolver
+import merged_view
+import query_planner
+import result_shaping
+import shared_store
+import snapshot
+import write_queue
+from calendar_cache import CalendarCache
+from event_record import Event
+from instrumentation import SERVICE, InstrumentedHttpRequest, count, instrument_tool, timed
+from prefetch import Prefetcher
+from search_index import SearchIndex, list_changes
+from time_utils import (
+    UTC, default_end, event_time, from_epoch, get_zone, local_midnight, local_zone_name, parse_time, to_epoch, to_rfc3339, to_utc
+)
+
 
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# State shared between worker processes (CALENDAR_STORE, see shared_store.py). Defaults to per-process memory.
+_store = shared_store.open_store()
+_TOKEN_KEY = 'credentials:token'
+if os.getenv('CALENDAR_RATE_LIMIT'):
+    # Requests per second across all workers sharing the store
+    InstrumentedHttpRequest.limiter = shared_store.RateLimiter(_store, 'ratelimit:calendar', float(os.getenv('CALENDAR_RATE_LIMIT')))
+
+# Process pool for slot ranking and ICS parsing (COMPUTE_WORKERS, see compute_pool.py). Inline by default.
+_compute = compute_pool.open_pool()
+
+# Calendar data cache. Disabled unless CALENDAR_PREFETCH or CALENDAR_CACHE_TTL is set. Its
+# in-memory tier shares the CACHE_MEMORY_BUDGET with the agendas and session resolvers.
+_cache = CalendarCache(
+    ttl=float(os.getenv('CALENDAR_CACHE_TTL', '120' if os.getenv('CALENDAR_PREFETCH') else '0')),
+    store=_store if shared_store.is_shared(_store) else None,
+    manager=cache_manager.MANAGER
+)
+PREFETCH_DAYS = int(os.getenv('CALENDAR_PREFETCH_DAYS', '7'))
+
+# Window and page sizes for get_calendar_events() queries that leave them open, from how busy
+# each calendar has been (see query_planner.py). QUERY_PLANNER=0 sends such queries to the API
+# as given, ten events at a time.
+_planner = query_planner.QueryPlanner(_cache.event_density, windows=_cache.enabled) if os.getenv('QUERY_PLANNER', '1') != '0' else None
+
+
+def _format_calendar(calendar: dict) -> dict:
+    formatted_calendar = {
+        'id': calendar['id'],
+        'summary': calendar.get('summary', 'No name'),
+        'primary': calendar.get('primary', False),
+    }
+
+    if 'description' in calendar:
+        formatted_calendar['description'] = calendar['description']
+    if 'backgroundColor' in calendar:
+        formatted_calendar['color'] = calendar['backgroundColor']
+
+    return formatted_calendar
+
+
+def _fetch_calendar_list() -> list:
+    generation = _cache.generation()
+    service = get_calendar_service()
+
+    calendar_list = service.calendarList().list().execute()
+    formatted_calendars = [_format_calendar(calendar) for calendar in calendar_list.get('items', [])]
+
+    _cache.put_calendars(formatted_calendars, generation)
+    return formatted_calendars
+
+
+def _fetch_event_window(calendar_id: str, start: int, end: int, timezone: str) -> list:
+    """Fetch every event in the epoch range [start, end), following pages, and cache the window."""
+    generation = _cache.generation(calendar_id)
+    service = get_calendar_service()
+
+    events = []
+    page_token = None
+    while True:
+        events_result = service.events().list(
+            calendarId=calendar_id,
+            timeMin=to_rfc3339(from_epoch(start)),
+            timeMax=to_rfc3339(from_epoch(end)),
+            maxResults=2500,
+            singleEvents=True,
+            orderBy='startTime',
+            timeZone=timezone,
+            pageToken=page_token
+        ).execute()
+        events.extend(Event.from_api(item, calendar_id) for item in events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            break
+
+    _cache.put_events(calendar_id, timezone, start, end, events, generation)
+    if _planner is not None:
+        _planner.observe(calendar_id, start, end, len(events), complete=True)
+    return events
+
+
+def _prefetch_window() -> tuple:
+    timezone = get_system_timezone()
+    return to_epoch(local_midnight(timezone)), to_epoch(local_midnight(timezone, days=PREFETCH_DAYS)), timezone
+
+
+_prefetcher = Prefetcher(
+    _cache,
+    _fetch_calendar_list,
+    _fetch_event_window,
+    _prefetch_window,
+    calendar_ids=os.getenv('CALENDAR_PREFETCH_CALENDARS', 'primary').split(',')
+)
+
+
+def prefetch_calendar_data() -> list:
+    """
+    Start fetching the calendar list and the next CALENDAR_PREFETCH_DAYS days of events in
+    the background, so the model's first list_calendars()/get_calendar_events() calls are
+    served from the cache. Does nothing unless CALENDAR_PREFETCH is set.
+    """
+    if not os.getenv('CALENDAR_PREFETCH'):
+        return []
+    return _prefetcher.prefetch()
+
+
+# Warm start (CALENDAR_SNAPSHOT=path, see snapshot.py). The cache's windows are saved every
+# CALENDAR_SNAPSHOT_INTERVAL seconds and at exit, and restored in the background once
+# start_background_tasks() runs.
+_snapshots = None
+if os.getenv('CALENDAR_SNAPSHOT') and _cache.enabled:
+    _snapshots = snapshot.CacheSnapshots(
+        _cache,
+        os.getenv('CALENDAR_SNAPSHOT'),
+        lambda calendar_id, token: list_changes(get_calendar_service(), calendar_id, token)
+    )
+
+
+def _agenda_events(calendar_id: str, start: int, end: int, timezone: str) -> list:
+    events = _cache.get_events(calendar_id, timezone, start, end, 2500)
+    if events is None:
+        events = _fetch_event_window(calendar_id, start, end, timezone)
+    if _write_queue is not None:
+        events = _write_queue.overlay(calendar_id, events, start, end, get_zone(timezone))
+    return events
+
+
+# Day and week agendas (see agenda.py). With CALENDAR_AGENDA set they are stored, precomputed at
+# startup (start_background_tasks()) and just after every local midnight, rebuilt in the background whenever a calendar
+# changes, and served for CALENDAR_CACHE_TTL seconds (default: 120) so that changes made outside
+# the agent show up within that time. Otherwise every agenda is built when it is asked for.
+_agendas = agenda.AgendaBuilder(
+    _agenda_events,
+    _cache.generation,
+    local_zone_name,
+    calendar_ids=os.getenv('CALENDAR_AGENDA_CALENDARS', 'primary').split(','),
+    manager=cache_manager.MANAGER,
+    ttl=(_cache.ttl or 120.0) if os.getenv('CALENDAR_AGENDA') else 0.0
+)
+_cache.add_listener(_agendas.refresh)
+
+
+def _stored_agendas_current(calendar_id: str) -> bool:
+    # Writes still queued for the background are not in the stored agendas yet
+    return _write_queue is None or not _write_queue.pending(calendar_id)
+
+
+def answer_agenda_request(message: str) -> Optional[str]:
+    """
+    Reply to a plain "what does my day/week look like?" message straight from the primary
+    calendar's agenda, or return None if the message needs the model (see agenda.match_request()).
+    """
+    timezone = get_system_timezone()
+    request = agenda.match_request(message, _agendas.today(timezone))
+    if request is None:
+        return None
+    period, first_day = request
+    try:
+        found = _agendas.get('primary', period, first_day, timezone, use_stored=_stored_agendas_current('primary'))
+    except Exception:
+        return None  # The model's own tool calls will report the problem
+    count('agenda_fast_path')
+    return agenda.format_text(found)
+
+
+def _commit_write(operation: write_queue.Operation):
+    """
+    Commit a queued write. Writes are idempotent, so a retry after an attempt whose
+    response was lost converges instead of failing: the event ID is chosen when the
+    write is queued, so a repeated insert hits 409, and a repeated delete hits 404/410.
+    """
+    service = get_calendar_service()
+    try:
+        if operation.kind == write_queue.INSERT:
+            service.events().insert(
+                calendarId=operation.calendar_id,
+                body=dict(operation.payload['body'], id=operation.event_id),
+                sendUpdates='all'
+            ).execute()
+        elif operation.kind == write_queue.DELETE:
+            service.events().delete(calendarId=operation.calendar_id, eventId=operation.event_id).execute()
+        elif operation.kind == write_queue.UPDATE:
+            service.events().patch(
+                calendarId=operation.calendar_id,
+                eventId=operation.event_id,
+                body=operation.payload['body'],
+                sendUpdates='all'
+            ).execute()
+        elif operation.kind == write_queue.INVITE:
+            _merge_attendees(service, operation.calendar_id, operation.event_id, operation.payload['attendees'])
+    except HttpError as error:
+        if (operation.kind, error.resp.status) in ((write_queue.INSERT, 409), (write_queue.DELETE, 404), (write_queue.DELETE, 410)):
+            return
+        raise
+
+
+def _merge_attendees(service, calendar_id: str, event_id: str, attendees: list, max_attempts: int = 3):
+    """Add attendees with a conditional update, re-reading the event if it changed in the meantime."""
+    for attempt in range(max_attempts):
+        event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
+        existing = event.get('attendees', [])
+        emails = {attendee['email'] for attendee in existing}
+        new = [{'email': email} for email in attendees if email not in emails]
+        if not new:
+            return
+        event['attendees'] = existing + new
+        request = service.events().update(calendarId=calendar_id, eventId=event_id, body=event, sendUpdates='all')
+        request.headers['If-Match'] = event['etag']
+        try:
+            request.execute()
+            return
+        except HttpError as error:
+            if error.resp.status != 412 or attempt + 1 == max_attempts:
+                raise
+
+
+# Write-behind mode (CALENDAR_WRITE_BEHIND=1): writes are applied locally and committed in the
+# background. The queue is opened, and writes left over from a previous run resumed, by
+# start_background_tasks().
+_write_queue = None
+
+_background_lock = threading.Lock()
+_background_started = False
+
+
+def start_background_tasks():
+    """
+    Start the background work the environment asks for: the write-behind queue, snapshot
+    restore and saves, and agenda precomputation. The agent calls this before its first turn;
+    later calls do nothing. Importing this module starts none of it: a compute pool worker can
+    import it along with the script it re-imports (see compute_pool.py), and must not commit
+    writes, overwrite the snapshot or call the API.
+    """
+    global _write_queue, _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+        if os.getenv('CALENDAR_WRITE_BEHIND'):
+            _write_queue = write_queue.WriteQueue(
+                os.getenv('CALENDAR_WRITE_QUEUE', 'write_queue.db'),
+                _commit_write,
+                on_commit=lambda operation: _cache.invalidate(operation.calendar_id)
+            )
+        if _snapshots is not None:
+            _snapshots.start(float(os.getenv('CALENDAR_SNAPSHOT_INTERVAL', '300')))
+        if os.getenv('CALENDAR_AGENDA'):
+            _agendas.start()
+
+
+def _with_sync_errors(result: dict) -> dict:
+    """Attach background writes that failed since the last report, so the model can tell the user."""
+    if _write_queue is not None:
+        failures = _write_queue.failures()
+        if failures:
+            result['sync_errors'] = failures
+    return result
+
+
+def _query_events(calendar_id: str, timezone: str, start: int, end: Optional[int], max_results: int) -> list:
+    """Up to max_results events overlapping the epoch range [start, end), from the cache or the API, with queued writes applied."""
+    events = _cache.get_events(calendar_id, timezone, start, end, max_results)
+    if events is None and _cache.wait_pending(('events', calendar_id, timezone)):
+        events = _cache.get_events(calendar_id, timezone, start, end, max_results)
+
+    if events is None:
+        generation = _cache.generation(calendar_id)
+        service = get_calendar_service()
+
+        events_result = service.events().list(
+            calendarId=calendar_id,
+            timeMin=to_rfc3339(from_epoch(start)),
+            timeMax=to_rfc3339(from_epoch(end)) if end is not None else None,
+            maxResults=max_results,
+            singleEvents=True,
+            orderBy='startTime',
+            timeZone=timezone
+        ).execute()
+
+        events = [Event.from_api(item, calendar_id) for item in events_result.get('items', [])]
+
+        # Without a next page the result holds every event in the range, so it can be reused
+        if 'nextPageToken' not in events_result:
+            _cache.put_events(calendar_id, timezone, start, end, events, generation)
+
+    if _write_queue is not None:
+        events = _write_queue.overlay(calendar_id, events, start, end, get_zone(timezone))[:max_results]
+    if _planner is not None:
+        _planner.observe(calendar_id, start, end, len(events), complete=len(events) < max_results)
+    return events
+
+
 # Agent tools
+@instrument_tool
 def list_calendars() -> dict:
     """
     List all calendars accessible to the user.
@@ -30,25 +346,11 @@ def list_calendars() -> dict:
         list_calendars()
     """
     try:
-        service = get_calendar_service()
-
-        calendar_list = service.calendarList().list().execute()
-        calendars = calendar_list.get('items', [])
-
-        formatted_calendars = []
-        for calendar in calendars:
-            formatted_calendar = {
-                'id': calendar['id'],
-                'summary': calendar.get('summary', 'No name'),
-                'primary': calendar.get('primary', False),
-            }
-
-            if 'description' in calendar:
-                formatted_calendar['description'] = calendar['description']
-            if 'backgroundColor' in calendar:
-                formatted_calendar['color'] = calendar['backgroundColor']
-
-            formatted_calendars.append(formatted_calendar)
+        formatted_calendars = _cache.get_calendars()
+        if formatted_calendars is None and _cache.wait_pending(('calendars',)):
+            formatted_calendars = _cache.get_calendars()
+        if formatted_calendars is None:
+            formatted_calendars = _fetch_calendar_list()
 
         return {
             'success': True,
@@ -72,12 +374,14 @@ def list_calendars() -> dict:
         }
 
 
+@instrument_tool
 def get_calendar_events(
     calendar_id: str = 'primary',
     time_min: Optional[str] = None,
     time_max: Optional[str] = None,
-    max_results: int = 10,
-    timezone: Optional[str] = None
+    max_results: Optional[int] = None,
+    timezone: Optional[str] = None,
+    page_token: Optional[str] = None
 ) -> dict:
     """
     Retrieve events from Google Calendar.
@@ -87,9 +391,12 @@ def get_calendar_events(
         time_min: Start of time range in ISO format (e.g., '2025-01-15T00:00:00').
                   If not provided, defaults to current time.
         time_max: End of time range in ISO format (e.g., '2025-01-22T23:59:59').
-                  If not provided, retrieves events indefinitely into the future.
-        max_results: Maximum number of events to return (default: 10, max: 2500)
+                  If not provided, retrieves the next max_results events.
+        max_results: Maximum number of events to return (max: 2500). If not provided, all events
+                     in the time range (up to 250), or the next 10 events without time_max.
         timezone: Timezone for the query (default: system timezone)
+        page_token: next_page_token from a previous result, to get the next page of that query.
+                    The other arguments are ignored when it is given.
 
     Returns:
         dict: Dictionary containing:
@@ -97,6 +404,12 @@ def get_calendar_events(
             - events: List of events with their details
             - count: Number of events returned
             - calendar_id: The calendar that was queried
+            When the events would not fit in the result, they have shortened descriptions and
+            the result also has:
+            - truncated: True
+            - total: Number of events found
+            - days: Number of events found and shown per day
+            - next_page_token: Pass as page_token to get the events that were left out
 
     Example:
         # Get next 10 upcoming events from primary calendar
@@ -110,63 +423,164 @@ def get_calendar_events(
         )
     """
     try:
-        service = get_calendar_service()
-
-        if timezone is None:
-            timezone = get_system_timezone()
+        offset = 0
+        if page_token:
+            page = result_shaping.decode_page_token(page_token)
+            calendar_id, timezone, max_results, offset = page['calendar_id'], page['timezone'], page['max_results'], page['offset']
+            start = from_epoch(page['start'])
+            end = from_epoch(page['end']) if page['end'] is not None else None
+        else:
+            if timezone is None:
+                timezone = get_system_timezone()
+
+            # Naive times are wall-clock times in the requested timezone
+            start = to_utc(time_min, timezone) if time_min else datetime.now(UTC)
+            end = to_utc(time_max, timezone) if time_max else None
+        start_epoch = int(start.timestamp())
+        end_epoch = int(end.timestamp()) if end else None
+
+        if _planner is not None:
+            # Choose the window and page size the query leaves open; the page token records the
+            # chosen ones, so later pages come from the same query
+            events, end_epoch, max_results = _planner.fetch(
+                lambda start, end, max_results: _query_events(calendar_id, timezone, start, end, max_results),
+                calendar_id, start_epoch, end_epoch, max_results
+            )
+        else:
+            max_results = max_results or query_planner.DEFAULT_EVENTS
+            events = _query_events(calendar_id, timezone, start_epoch, end_epoch, max_results)
 
-        # Default to current time if not specified
-        if time_min is None:
-            time_min = datetime.now().isoformat()
+        # Later changes can refer to these events by title (see _resolve_event)
+        event_resolver.current().remember(events)
 
-        # Ensure datetime strings are in RFC3339 format with timezone
-        # If they don't already have timezone info, add 'Z' for UTC or parse with timezone
-        if time_min and not time_min.endswith('Z') and '+' not in time_min and time_min.count('-') == 2:
-            # Parse the datetime and add timezone
-            dt = datetime.fromisoformat(time_min.replace('Z', '+00:00'))
-            time_min = dt.isoformat() + 'Z' if dt.tzinfo is None else dt.isoformat()
+        # Format the events, shortening them to fit the result's token budget (see result_shaping.py)
+        page = {
+            'calendar_id': calendar_id, 'start': start_epoch, 'end': end_epoch,
+            'timezone': timezone, 'max_results': max_results, 'offset': offset,
+        }
+        return _with_sync_errors(result_shaping.shape_events(
+            {'success': True, 'calendar_id': calendar_id}, events[offset:], Event.to_dict, page
+        ))
 
-        if time_max and not time_max.endswith('Z') and '+' not in time_max and time_max.count('-') == 2:
-            # Parse the datetime and add timezone
-            dt = datetime.fromisoformat(time_max.replace('Z', '+00:00'))
-            time_max = dt.isoformat() + 'Z' if dt.tzinfo is None else dt.isoformat()
+    except HttpError as error:
+        return {
+            'success': False,
+            'error': f'An error occurred: {error}',
+            'events': [],
+            'count': 0
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'An error occurred: {str(e)}',
+            'events': [],
+            'count': 0
+        }
 
-        events_result = service.events().list(
-            calendarId=calendar_id,
-            timeMin=time_min,
-            timeMax=time_max,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
 
-        events = events_result.get('items', [])
+def _query_calendars(calendar_ids: list, timezone: str, start: int, end: Optional[int], max_results: int) -> Tuple[list, dict]:
+    """
+    Run _query_events() for several calendars concurrently. Returns the event lists in
+    calendar_ids order and the errors of calendars that could not be read.
+    """
+    def query(calendar_id):
+        try:
+            return _query_events(calendar_id, timezone, start, end, max_results), None
+        except HttpError as error:
+            return [], error
+
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(calendar_ids)))) as pool:
+        # Each query runs in its own copy of this context, so it keeps the request's deadline and stats
+        contexts = [contextvars.copy_context() for _ in calendar_ids]
+        results = list(pool.map(lambda context, calendar_id: context.run(query, calendar_id), contexts, calendar_ids))
+    failed = [error for _, error in results if error is not None]
+    if failed and len(failed) == len(calendar_ids):
+        raise failed[0]
+    errors = {calendar_id: f'An error occurred: {error}' for calendar_id, (_, error) in zip(calendar_ids, results) if error is not None}
+    return [events for events, _ in results], errors
+
+
+@instrument_tool
+def get_merged_events(
+    calendar_ids: Optional[list[str]] = None,
+    time_min: Optional[str] = None,
+    time_max: Optional[str] = None,
+    max_results: int = 25,
+    timezone: Optional[str] = None,
+    page_token: Optional[str] = None
+) -> dict:
+    """
+    Retrieve events from several calendars as one list ordered by start time. A meeting the user
+    is invited to on more than one calendar is listed once. Use this instead of calling
+    get_calendar_events() for each calendar.
 
-        # Formatting event results
-        formatted_events = []
-        for event in events:
-            formatted_event = {
-                'id': event['id'],
-                'summary': event.get('summary', 'No title'),
-                'start': event['start'].get('dateTime', event['start'].get('date')),
-                'end': event['end'].get('dateTime', event['end'].get('date')),
-            }
+    Args:
+        calendar_ids: Calendar IDs to include (default: every calendar from list_calendars()).
+                      The first calendar an event is on is the one it is listed under.
+        time_min: Start of time range in ISO format (e.g., '2025-01-15T00:00:00') (default: now)
+        time_max: End of time range in ISO format (e.g., '2025-01-22T23:59:59').
+                  If not provided, retrieves events indefinitely into the future.
+        max_results: Maximum number of events to return (default: 25, max: 2500)
+        timezone: Timezone for the query (default: system timezone)
+        page_token: next_page_token from a previous result, to get the next page of that query.
+                    The other arguments are ignored when it is given.
 
-            if 'description' in event:
-                formatted_event['description'] = event['description']
-            if 'location' in event:
-                formatted_event['location'] = event['location']
-            if 'htmlLink' in event:
-                formatted_event['link'] = event['htmlLink']
+    Returns:
+        dict: Dictionary containing:
+            - success: Boolean indicating if the request was successful
+            - events: List of events with their details and calendar_id. Events that are also
+                      on other calendars have also_on: the calendar_id and id of each other copy
+            - count: Number of events returned
+            - calendar_ids: The calendars that were queried
+            - duplicates_collapsed: Number of duplicate copies left out
+            - errors: Calendars that could not be read, with the reason (only if any)
+            Large results are shortened and paged like get_calendar_events() results.
 
-            formatted_events.append(formatted_event)
+    Example:
+        # This week across every calendar
+        get_merged_events(time_min="2025-01-13T00:00:00", time_max="2025-01-19T23:59:59")
 
-        return {
-            'success': True,
-            'events': formatted_events,
-            'count': len(formatted_events),
-            'calendar_id': calendar_id
+        # Work and personal calendars only
+        get_merged_events(calendar_ids=["work@example.com", "me@gmail.com"], time_min="2025-01-15T00:00:00")
+    """
+    try:
+        offset = 0
+        if page_token:
+            page = result_shaping.decode_page_token(page_token)
+            calendar_ids, timezone, max_results, offset = page['calendar_id'], page['timezone'], page['max_results'], page['offset']
+            start_epoch, end_epoch = page['start'], page['end']
+        else:
+            if timezone is None:
+                timezone = get_system_timezone()
+            if not calendar_ids:
+                calendars = _cache.get_calendars()
+                if calendars is None:
+                    calendars = _fetch_calendar_list()
+                calendar_ids = [calendar['id'] for calendar in calendars]
+            calendar_ids = list(dict.fromkeys(calendar_ids))
+
+            # Naive times are wall-clock times in the requested timezone
+            start_epoch = int((to_utc(time_min, timezone) if time_min else datetime.now(UTC)).timestamp())
+            end_epoch = int(to_utc(time_max, timezone).timestamp()) if time_max else None
+
+        # Each calendar's first max_results events include every one of the merged first max_results
+        event_lists, errors = _query_calendars(calendar_ids, timezone, start_epoch, end_epoch, max_results)
+        for events in event_lists:
+            event_resolver.current().remember(events)
+        merged = merged_view.merge_events(event_lists)
+        collapsed = sum(len(duplicates) for _, duplicates in merged)
+        count('merged_duplicates', collapsed)
+
+        page = {
+            'calendar_id': calendar_ids, 'start': start_epoch, 'end': end_epoch,
+            'timezone': timezone, 'max_results': max_results, 'offset': offset,
         }
+        result = {'success': True, 'calendar_ids': calendar_ids, 'duplicates_collapsed': collapsed}
+        if errors:
+            result['errors'] = errors
+        return _with_sync_errors(result_shaping.shape_events(
+            result, merged[offset:max_results], merged_view.format_merged, page, tool='get_merged_events'
+        ))
 
     except HttpError as error:
         return {
@@ -184,6 +598,112 @@ def get_calendar_events(
         }
 
 
+@instrument_tool
+def get_agenda(
+    period: str = 'day',
+    start_date: Optional[str] = None,
+    calendar_id: str = 'primary',
+    timezone: Optional[str] = None
+) -> dict:
+    """
+    Get a compact agenda for a day or a week. Agendas are precomputed, so this usually returns immediately.
+
+    Use this when the user asks what their day or week looks like. Use get_calendar_events()
+    when event descriptions or links, or a custom time range, are needed.
+
+    Args:
+        period: 'day' for one day, or 'week' for seven days from start_date (default: 'day')
+        start_date: First day in ISO format (e.g., '2025-01-15') (default: today)
+        calendar_id: Calendar ID (default: 'primary'). Use list_calendars() to get available calendar IDs.
+        timezone: Timezone for the agenda (default: system timezone)
+
+    Returns:
+        dict: Dictionary containing:
+            - success: Boolean indicating if the request was successful
+            - days: One entry per day with its date, weekday and events (id, summary,
+                    time as 'HH:MM-HH:MM' or all_day, and location)
+            - count: Number of events in the period
+            - calendar_id, period, timezone, start and end of the agenda
+
+    Example:
+        get_agenda()
+        get_agenda(period="week", start_date="2025-01-13", calendar_id="work@example.com")
+    """
+    try:
+        if timezone is None:
+            timezone = get_system_timezone()
+
+        first_day = parse_time(start_date, timezone) if start_date else None
+        if isinstance(first_day, datetime):
+            first_day = first_day.date()
+
+        found = _agendas.get(calendar_id, period, first_day, timezone, use_stored=_stored_agendas_current(calendar_id))
+        # Copied, since the stored agenda is shared and _with_sync_errors() adds to the result
+        return _with_sync_errors(dict(found))
+
+    except HttpError as error:
+        return {
+            'success': False,
+            'error': f'An error occurred: {error}',
+            'days': [],
+            'count': 0
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'An error occurred: {str(e)}',
+            'days': [],
+            'count': 0
+        }
+
+
+def _load_token() -> Optional[Credentials]:
+    """Load saved credentials from the shared store, falling back to token.json."""
+    if shared_store.is_shared(_store):
+        info = _store.get(_TOKEN_KEY)
+        if info:
+            return Credentials.from_authorized_user_info(json.loads(info), SCOPES)
+    if os.path.exists('token.json'):
+        return Credentials.from_authorized_user_file('token.json', SCOPES)
+    return None
+
+
+def _save_token(creds: Credentials):
+    # Workers sharing a store also share the token, so one refreshed by any worker is seen by all
+    if shared_store.is_shared(_store):
+        _store.set(_TOKEN_KEY, creds.to_json())
+        return
+    credentials.write_atomic('token.json', creds.to_json())
+
+
+def _authorize() -> Credentials:
+    if not os.path.exists('credentials.json'):
+        raise FileNotFoundError(
+            "credentials.json not found. Please download it from Google Cloud Console.\n"
+            "See: https://developers.google.com/calendar/api/quickstart/python"
+        )
+    flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
+    return flow.run_local_server(port=0)
+
+
+# One refresh at a time across threads and worker processes, ahead of expiry (see credentials.py)
+_credentials = credentials.CredentialManager(
+    _load_token,
+    _save_token,
+    _authorize,
+    lock=(shared_store.StoreLock(_store, 'credentials:lock') if shared_store.is_shared(_store)
+          else credentials.FileLock('token.json.lock'))
+)
+
+
+# With CALENDAR_SERVICE_POOL set, each thread keeps the service it built and reuses it until the
+# credentials change, instead of building one per call. httplib2 connections are not
+# thread-safe, so services are never shared between threads.
+SERVICE_POOL = bool(os.getenv('CALENDAR_SERVICE_POOL'))
+_services = threading.local()
+
+
+@timed(SERVICE)
 def get_calendar_service():
     """
     Authenticate and return Google Calendar service object.
@@ -192,38 +712,99 @@ def get_calendar_service():
     a browser window for user authorization. Credentials are saved to token.json
     for future use.
     """
-    creds = None
-
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+    creds = _credentials.get()
+    if not SERVICE_POOL:
+        return build('calendar', 'v3', credentials=creds, requestBuilder=InstrumentedHttpRequest)
+    pooled = getattr(_services, 'entry', None)
+    if pooled is not None and pooled[0] is creds:
+        service, timeout = pooled[1], pooled[2]
+        deadlines.reset_transport(service._http, timeout)
+        return service
+    service = build('calendar', 'v3', credentials=creds, requestBuilder=InstrumentedHttpRequest)
+    _services.entry = (creds, service, getattr(getattr(service._http, 'http', service._http), 'timeout', None))
+    return service
+
+def _resolve_event(
+    calendar_id: str,
+    event_id: Optional[str],
+    event_summary: Optional[str],
+    event_date: Optional[str],
+    timezone: Optional[str]
+) -> Tuple[str, Optional[Event]]:
+    """
+    Turn a mutation tool's event reference into (event_id, the Event if it was seen before).
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+    Without an event_id the event is looked up by title, and date if given, among the events
+    seen in this session (see event_resolver.py), falling back to one API query for that
+    title in that period. Raises ValueError unless exactly one event matches.
+    """
+    resolver = event_resolver.current()
+    if event_id:
+        return event_id, resolver.get(calendar_id, event_id)
+    if not event_summary:
+        raise ValueError('Pass the event_id of the event, or its event_summary (and event_date if known)')
+    if timezone is None:
+        timezone = get_system_timezone()
+
+    start = end = None
+    if event_date:
+        when = parse_time(event_date, timezone)
+        if isinstance(when, datetime):
+            # A time picks the event in progress at that moment
+            start = int(when.timestamp())
+            end = start + 1
         else:
-            if not os.path.exists('credentials.json'):
-                raise FileNotFoundError(
-                    "credentials.json not found. Please download it from Google Cloud Console.\n"
-                    "See: https://developers.google.com/calendar/api/quickstart/python"
-                )
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
+            start = to_epoch(when, timezone)
+            end = to_epoch(when + timedelta(days=1), timezone)
+
+    matches = resolver.find(calendar_id, event_summary, start, end)
+    if matches:
+        count('event_resolver_hits')
+    else:
+        count('event_resolver_misses')
+        service = get_calendar_service()
+        items = service.events().list(
+            calendarId=calendar_id,
+            q=event_summary,
+            timeMin=to_rfc3339(from_epoch(start) if start is not None else local_midnight(timezone)),
+            timeMax=to_rfc3339(from_epoch(end)) if end is not None else None,
+            maxResults=25,
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute().get('items', [])
+        resolver.remember(Event.from_api(item, calendar_id) for item in items)
+        matches = resolver.find(calendar_id, event_summary, start, end)
+
+    where = f' on {event_date}' if event_date else ''
+    if not matches:
+        raise ValueError(f'No event titled {event_summary!r}{where} in calendar {calendar_id}')
+    if len(matches) > 1:
+        listed = '; '.join(f'{event.summary} at {event.start_iso} (event_id {event.id})' for event in matches[:5])
+        raise ValueError(
+            f'{len(matches)} events titled {event_summary!r}{where}: {listed}. Call again with the event_id of the one the user means.'
+        )
+    return matches[0].id, matches[0]
 
-    return build('calendar', 'v3', credentials=creds)
 
+@instrument_tool
 def delete_calendar_event(
-    event_id: str,
-    calendar_id: str = 'primary'
+    event_id: Optional[str] = None,
+    calendar_id: str = 'primary',
+    event_summary: Optional[str] = None,
+    event_date: Optional[str] = None,
+    timezone: Optional[str] = None
 ) -> dict:
     """
     Delete an event from Google Calendar.
 
+    Identify the event by event_id, or by its title and date if the ID is not known.
+
     Args:
-        event_id: The ID of the event to delete (required). Can be obtained from get_calendar_events().
+        event_id: The ID of the event to delete. Can be obtained from get_calendar_events() or search_events().
         calendar_id: Calendar ID where the event exists (default: 'primary')
+        event_summary: Title of the event, instead of event_id (e.g., 'Dentist appointment')
+        event_date: Date (e.g., '2025-01-15') or time (e.g., '2025-01-15T10:00:00') of the event named by event_summary
+        timezone: Timezone for event_date (default: system timezone)
 
     Returns:
         dict: Dictionary containing:
@@ -234,11 +815,27 @@ def delete_calendar_event(
 
     Example:
         delete_calendar_event(event_id="abc123def456")
+        delete_calendar_event(event_summary="Dentist appointment", event_date="2025-01-15")
     """
     try:
+        event_id, _ = _resolve_event(calendar_id, event_id, event_summary, event_date, timezone)
+
+        if _write_queue is not None:
+            _write_queue.enqueue(write_queue.DELETE, calendar_id, event_id)
+            event_resolver.current().forget(calendar_id, event_id)
+            return _with_sync_errors({
+                'success': True,
+                'event_id': event_id,
+                'calendar_id': calendar_id,
+                'provisional': True,
+                'message': 'Event deleted; the change is being synced to Google Calendar in the background'
+            })
+
         service = get_calendar_service()
 
         service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+        _cache.invalidate(calendar_id)
+        event_resolver.current().forget(calendar_id, event_id)
 
         return {
             'success': True,
@@ -263,6 +860,7 @@ def delete_calendar_event(
         }
 
 
+@instrument_tool
 def add_calendar_event(
     summary: str,
     start_time: str,
@@ -278,7 +876,7 @@ def add_calendar_event(
 
     Args:
         summary: Event title/summary (required)
-        start_time: Start time in ISO format (e.g., '2024-01-15T10:00:00') or natural language
+        start_time: Start time in ISO format (e.g., '2024-01-15T10:00:00'), or a date (e.g., '2024-01-15') for an all-day event
         calendar_id: Calendar ID to add event to (default: 'primary'). Use list_calendars() to get available calendar IDs.
         end_time: End time in ISO format. If not provided, defaults to 1 hour after start_time
         description: Event description (optional)
@@ -301,28 +899,20 @@ def add_calendar_event(
         )
     """
     try:
-        service = get_calendar_service()
-
         if timezone is None:
             timezone = get_system_timezone()
 
-        start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+        start = parse_time(start_time, timezone)
 
         if end_time is None:
-            end_dt = start_dt + timedelta(hours=1)
+            end = default_end(start)
         else:
-            end_dt = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
+            end = parse_time(end_time, timezone)
 
         event = {
             'summary': summary,
-            'start': {
-                'dateTime': start_dt.isoformat(),
-                'timeZone': timezone,
-            },
-            'end': {
-                'dateTime': end_dt.isoformat(),
-                'timeZone': timezone,
-            },
+            'start': event_time(start, timezone),
+            'end': event_time(end, timezone),
         }
 
         if description:
@@ -334,11 +924,33 @@ def add_calendar_event(
         if attendees:
             event['attendees'] = [{'email': email} for email in attendees]
 
+        if _write_queue is not None:
+            # Client-chosen IDs (base32hex) make the background insert idempotent
+            event_id = uuid.uuid4().hex
+            _write_queue.enqueue(write_queue.INSERT, calendar_id, event_id, {'body': event})
+            event_resolver.current().remember([Event.from_api(dict(event, id=event_id), calendar_id)])
+            result = {
+                'success': True,
+                'calendar_id': calendar_id,
+                'event_id': event_id,
+                'summary': summary,
+                'start': event['start'].get('dateTime', event['start'].get('date')),
+                'end': event['end'].get('dateTime', event['end'].get('date')),
+                'provisional': True,
+                'message': 'Event saved; it is being synced to Google Calendar in the background'
+            }
+            if attendees:
+                result['attendees_invited'] = attendees
+            return _with_sync_errors(result)
+
+        service = get_calendar_service()
         created_event = service.events().insert(
             calendarId=calendar_id,
             body=event,
             sendUpdates='all'  # Send email invitations to attendees
         ).execute()
+        _cache.invalidate(calendar_id)
+        event_resolver.current().remember([Event.from_api(created_event, calendar_id)])
 
         result = {
             'success': True,
@@ -346,8 +958,8 @@ def add_calendar_event(
             'event_id': created_event['id'],
             'event_link': created_event.get('htmlLink'),
             'summary': created_event['summary'],
-            'start': created_event['start'].get('dateTime'),
-            'end': created_event['end'].get('dateTime'),
+            'start': created_event['start'].get('dateTime', created_event['start'].get('date')),
+            'end': created_event['end'].get('dateTime', created_event['end'].get('date')),
         }
 
         if attendees:
@@ -367,28 +979,37 @@ def add_calendar_event(
             'error': f'An error occurred: {str(e)}'
         }
 
+@instrument_tool
 def update_calendar_event(
-    event_id: str,
-    summary: str,
-    start_time: str,
+    event_id: Optional[str] = None,
+    summary: Optional[str] = None,
+    start_time: Optional[str] = None,
     calendar_id: str = 'primary',
     end_time: Optional[str] = None,
     description: Optional[str] = None,
     location: Optional[str] = None,
-    timezone: Optional[str] = None
+    timezone: Optional[str] = None,
+    event_summary: Optional[str] = None,
+    event_date: Optional[str] = None
 ) -> dict:
     """
     Update an existing event in Google Calendar by deleting it and creating a new one.
+    Anything not given is carried over from the current event, including its attendees.
+    In write-behind mode only the fields given are changed, and the event keeps its ID.
+
+    Identify the event by event_id, or by its current title and date if the ID is not known.
 
     Args:
-        event_id: The ID of the event to update (required). Can be obtained from get_calendar_events().
-        summary: Event title/summary (required)
-        start_time: Start time in ISO format (e.g., '2024-01-15T10:00:00')
+        event_id: The ID of the event to update. Can be obtained from get_calendar_events() or search_events().
+        summary: New event title/summary (default: the current title)
+        start_time: New start time in ISO format (e.g., '2024-01-15T10:00:00') (default: the current start and end)
         calendar_id: Calendar ID where the event exists (default: 'primary')
         end_time: End time in ISO format. If not provided, defaults to 1 hour after start_time
-        description: Event description (optional)
-        location: Event location (optional)
-        timezone: Timezone for the event (default: system timezone)
+        description: New event description (default: the current description)
+        location: New event location (default: the current location)
+        timezone: Timezone for the event and event_date (default: system timezone)
+        event_summary: Current title of the event, instead of event_id (e.g., 'Design review')
+        event_date: Date (e.g., '2025-01-15') or time (e.g., '2025-01-15T10:00:00') of the event named by event_summary
 
     Returns:
         dict: Dictionary containing:
@@ -410,8 +1031,29 @@ def update_calendar_event(
             description="Rescheduled meeting",
             location="Conference Room B"
         )
+        update_calendar_event(event_summary="Design review", event_date="2025-01-15", start_time="2025-01-15T16:00:00")
     """
     try:
+        event_id, current = _resolve_event(calendar_id, event_id, event_summary, event_date, timezone)
+
+        if _write_queue is not None:
+            return _queue_update(calendar_id, event_id, summary, start_time, end_time, description, location, timezone)
+
+        # The event is recreated, so everything the update leaves alone comes from the current one
+        if current is None:
+            service = get_calendar_service()
+            current = Event.from_api(service.events().get(calendarId=calendar_id, eventId=event_id).execute(), calendar_id)
+        if summary is None:
+            summary = current.summary
+        if start_time is None:
+            start_time = current.start_iso
+            if end_time is None:
+                end_time = current.end_iso
+        if description is None:
+            description = current.description
+        if location is None:
+            location = current.location
+
         # First, delete the old event
         delete_result = delete_calendar_event(event_id=event_id, calendar_id=calendar_id)
 
@@ -431,7 +1073,8 @@ def update_calendar_event(
             end_time=end_time,
             description=description,
             location=location,
-            timezone=timezone
+            timezone=timezone,
+            attendees=list(current.attendees) if current.attendees else None
         )
 
         if not create_result['success']:
@@ -463,19 +1106,56 @@ def update_calendar_event(
         }
 
 
+def _queue_update(calendar_id, event_id, summary, start_time, end_time, description, location, timezone) -> dict:
+    """
+    Queue an update as a patch of just the fields given. It applies to the event as it is when
+    the write commits, so changes made meanwhile, such as an attendee's reply, are kept.
+    """
+    if timezone is None:
+        timezone = get_system_timezone()
+    changes = {}
+    for field, value in (('summary', summary), ('description', description), ('location', location)):
+        if value is not None:
+            changes[field] = value
+    if start_time is not None:
+        start = parse_time(start_time, timezone)
+        changes['start'] = event_time(start, timezone)
+        changes['end'] = event_time(parse_time(end_time, timezone) if end_time else default_end(start), timezone)
+    elif end_time is not None:
+        changes['end'] = event_time(parse_time(end_time, timezone), timezone)
+
+    _write_queue.enqueue(write_queue.UPDATE, calendar_id, event_id, {'body': changes})
+    # Whatever the resolver holds for the event is out of date now
+    event_resolver.current().forget(calendar_id, event_id)
+    result = {'success': True, 'old_event_id': event_id, 'new_event_id': event_id, 'calendar_id': calendar_id}
+    for field, value in changes.items():
+        result[field] = value.get('dateTime', value.get('date')) if isinstance(value, dict) else value
+    result.update(provisional=True, message='Event updated; the change is being synced to Google Calendar in the background')
+    return _with_sync_errors(result)
+
+
+@instrument_tool
 def invite_to_event(
-    event_id: str,
-    attendees: list[str],
-    calendar_id: str = 'primary'
+    event_id: Optional[str] = None,
+    attendees: Optional[list[str]] = None,
+    calendar_id: str = 'primary',
+    event_summary: Optional[str] = None,
+    event_date: Optional[str] = None,
+    timezone: Optional[str] = None
 ) -> dict:
     """
     Add attendees to an existing calendar event. Invitations will be sent via email.
 
+    Identify the event by event_id, or by its title and date if the ID is not known.
+
     Args:
-        event_id: The ID of the event to add attendees to (required).
-                  Can be obtained from get_calendar_events().
+        event_id: The ID of the event to add attendees to.
+                  Can be obtained from get_calendar_events() or search_events().
         attendees: List of email addresses to invite to the event (required).
         calendar_id: Calendar ID where the event exists (default: 'primary')
+        event_summary: Title of the event, instead of event_id (e.g., 'Design review')
+        event_date: Date (e.g., '2025-01-15') or time (e.g., '2025-01-15T10:00:00') of the event named by event_summary
+        timezone: Timezone for event_date (default: system timezone)
 
     Returns:
         dict: Dictionary containing:
@@ -490,8 +1170,24 @@ def invite_to_event(
             event_id="abc123def456",
             attendees=["colleague@example.com", "manager@example.com"]
         )
+        invite_to_event(event_summary="Design review", event_date="2025-01-15", attendees=["colleague@example.com"])
     """
     try:
+        if not attendees:
+            raise ValueError('attendees is required')
+        event_id, _ = _resolve_event(calendar_id, event_id, event_summary, event_date, timezone)
+
+        if _write_queue is not None:
+            _write_queue.enqueue(write_queue.INVITE, calendar_id, event_id, {'attendees': attendees})
+            return _with_sync_errors({
+                'success': True,
+                'event_id': event_id,
+                'calendar_id': calendar_id,
+                'attendees_added': attendees,
+                'provisional': True,
+                'message': 'Invitations will be sent once the change is synced to Google Calendar in the background'
+            })
+
         service = get_calendar_service()
 
         # Get the existing event
@@ -525,6 +1221,8 @@ def invite_to_event(
             body=event,
             sendUpdates='all'  # Send email invitations to new attendees
         ).execute()
+        _cache.invalidate(calendar_id)
+        event_resolver.current().remember([Event.from_api(updated_event, calendar_id)])
 
         return {
             'success': True,
@@ -552,14 +1250,366 @@ def invite_to_event(
         }
 
 
+# Event search index (see search_index.py), created on the first search_events() call
+SEARCH_SYNC_INTERVAL = float(os.getenv('SEARCH_SYNC_INTERVAL', '30'))
+_search_index = None
+_search_lock = threading.Lock()
+
+
+def _get_search_index() -> SearchIndex:
+    global _search_index
+    with _search_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(os.getenv('SEARCH_INDEX', 'search_index.db'))
+        return _search_index
+
+
+@instrument_tool
+def search_events(
+    query: str,
+    calendar_id: str = 'primary',
+    time_min: Optional[str] = None,
+    time_max: Optional[str] = None,
+    max_results: int = 10,
+    timezone: Optional[str] = None
+) -> dict:
+    """
+    Search events by keywords in their title, description, location or attendees.
+
+    Use this to find a specific event by name (e.g. "the dentist appointment") instead of
+    listing events with get_calendar_events().
+
+    Args:
+        query: Keywords to look for (e.g., 'dentist', 'design review', 'sarah@example.com')
+        calendar_id: Calendar ID to search (default: 'primary')
+        time_min: Only events ending after this time, in ISO format (default: no limit)
+        time_max: Only events starting before this time, in ISO format (default: no limit)
+        max_results: Maximum number of events to return (default: 10)
+        timezone: Timezone for time_min/time_max and the returned times (default: system timezone)
+
+    Returns:
+        dict: Dictionary containing:
+            - success: Boolean indicating if the search was successful
+            - events: Matching events with their details and a relevance score, best match first
+            - count: Number of events returned
+            - calendar_id: The calendar that was searched
+
+    Example:
+        search_events(query="dentist")
+        search_events(query="project kickoff", calendar_id="work@example.com", time_min="2025-01-01T00:00:00")
+    """
+    try:
+        if timezone is None:
+            timezone = get_system_timezone()
+
+        start = int(to_utc(time_min, timezone).timestamp()) if time_min else None
+        end = int(to_utc(time_max, timezone).timestamp()) if time_max else None
+
+        # The index syncs incrementally, and again straight away after the agent changes the calendar
+        index = _get_search_index()
+        generation = _cache.generation(calendar_id)
+        if not index.is_fresh(calendar_id, generation, SEARCH_SYNC_INTERVAL):
+            index.sync(get_calendar_service(), calendar_id, generation)
+
+        results = index.search(query, calendar_id, start, end, max_results)
+        event_resolver.current().remember(event for event, _ in results)
+
+        zone = get_zone(timezone)
+        formatted_events = []
+        for event, score in results:
+            formatted_event = event.to_dict()
+            if not event.all_day:
+                formatted_event['start'] = from_epoch(event.start).astimezone(zone).isoformat()
+                formatted_event['end'] = from_epoch(event.end).astimezone(zone).isoformat()
+            if event.attendees:
+                formatted_event['attendees'] = list(event.attendees)
+            formatted_event['score'] = score
+            formatted_events.append(formatted_event)
+
+        return _with_sync_errors({
+            'success': True,
+            'events': formatted_events,
+            'count': len(formatted_events),
+            'calendar_id': calendar_id
+        })
+
+    except HttpError as error:
+        return {
+            'success': False,
+            'error': f'An error occurred: {error}',
+            'events': [],
+            'count': 0
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'An error occurred: {str(e)}',
+            'events': [],
+            'count': 0
+        }
+
+
+_PREFERRED_HOURS = {'morning': (9, 12), 'afternoon': (12, 17)}
+
+
+@instrument_tool
+def find_meeting_times(
+    attendees: list[str],
+    duration_minutes: int = 30,
+    time_min: Optional[str] = None,
+    time_max: Optional[str] = None,
+    timezone: Optional[str] = None,
+    optional_attendees: Optional[list[str]] = None,
+    working_hours_start: int = 9,
+    working_hours_end: int = 17,
+    include_weekends: bool = False,
+    preferred_time: Optional[str] = None,
+    max_results: int = 5
+) -> dict:
+    """
+    Find meeting times that work for a group of attendees, using their free/busy information.
+    Use this before add_calendar_event() or invite_to_event() when the user wants a time that suits everyone.
+
+    Args:
+        attendees: Email addresses of the required attendees (required). The user is always included.
+        duration_minutes: Meeting length in minutes (default: 30)
+        time_min: Earliest start in ISO format (default: now)
+        time_max: Latest end in ISO format (default: 7 days after time_min)
+        timezone: Timezone for the times and working hours (default: system timezone)
+        optional_attendees: Email addresses of attendees who are nice to have but not required
+        working_hours_start: First hour of the working day (default: 9)
+        working_hours_end: Hour the working day ends (default: 17)
+        include_weekends: Whether Saturday and Sunday are allowed (default: False)
+        preferred_time: 'morning' or 'afternoon' to favour slots in that part of the day
+        max_results: Maximum number of suggestions (default: 5)
+
+    Returns:
+        dict: Dictionary containing:
+            - success: Boolean indicating if the search was successful
+            - slots: Suggested times, best first, each with start, end, score (share of
+                     attendees available, weighted) and unavailable (who cannot make it)
+            - unknown_attendees: Attendees whose availability could not be read
+            - count: Number of slots returned
+
+    Example:
+        find_meeting_times(
+            attendees=["alice@example.com", "bob@example.com"],
+            duration_minutes=60,
+            time_min="2025-01-20T00:00:00",
+            time_max="2025-01-25T00:00:00",
+            preferred_time="morning"
+        )
+    """
+    try:
+        if timezone is None:
+            timezone = get_system_timezone()
+
+        start = to_epoch(time_min, timezone) if time_min else int(datetime.now(UTC).timestamp())
+        end = to_epoch(time_max, timezone) if time_max else start + 7 * 86400
+        optional_attendees = [a for a in optional_attendees or [] if a not in attendees]
+        weights = {a: availability.OPTIONAL_WEIGHT for a in optional_attendees}
+        calendars = ['primary'] + list(attendees) + optional_attendees
+
+        busy, errors = availability.fetch_busy(get_calendar_service, calendars, start, end)
+        slots = _compute.run_with_intervals(
+            availability.find_slots, busy, start, end, duration_minutes * 60, timezone,
+            weights=weights,
+            working_hours=(working_hours_start, working_hours_end),
+            weekdays=range(7) if include_weekends else range(5),
+            preferred_hours=_PREFERRED_HOURS.get(preferred_time),
+            max_results=max_results
+        )
+
+        zone = get_zone(timezone)
+        return {
+            'success': True,
+            'slots': [{
+                'start': from_epoch(slot['start']).astimezone(zone).isoformat(),
+                'end': from_epoch(slot['end']).astimezone(zone).isoformat(),
+                'score': slot['score'],
+                'unavailable': ['you' if a == 'primary' else a for a in slot['busy']],
+            } for slot in slots],
+            'unknown_attendees': sorted(errors),
+            'count': len(slots)
+        }
+
+    except HttpError as error:
+        return {
+            'success': False,
+            'error': f'An error occurred: {error}',
+            'slots': [],
+            'count': 0
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'An error occurred: {str(e)}',
+            'slots': [],
+            'count': 0
+        }
+
+
+# The import and export tools only read and write files in this folder
+FILES_DIR = os.path.abspath(os.path.expanduser(os.getenv('CALENDAR_FILES_DIR', 'calendar_files')))
+
+
+def _file_name(path: str) -> str:
+    """A path inside FILES_DIR as the tools take and return it: relative, without the folder's location."""
+    return os.path.relpath(path, os.path.realpath(FILES_DIR)).replace(os.sep, '/')
+
+
+def _file_error(error: Exception) -> str:
+    """An error message for the import/export tools, without the folder's location (e.g. from OSError)."""
+    message = str(error)
+    for root in {os.path.realpath(FILES_DIR), FILES_DIR}:
+        message = message.replace(root + os.sep, '')
+    return message
+
+
+@instrument_tool
+def import_calendar_events(
+    file_path: str,
+    calendar_id: str = 'primary',
+    timezone: Optional[str] = None
+) -> dict:
+    """
+    Import events from an .ics or .csv file in the import/export folder into a calendar. Events
+    that already exist (same UID, or same title and times) are skipped, so importing a file twice
+    is safe.
+
+    Args:
+        file_path: Name of the .ics or .csv file in the import/export folder, e.g. 'semester.ics' (required).
+                   Subfolders are allowed; absolute paths and '..' are not.
+                   CSV files need a start column and may have summary, end, description, location and uid.
+        calendar_id: Calendar ID to import into (default: 'primary')
+        timezone: Timezone for times without an offset (default: system timezone)
+
+    Returns:
+        dict: Dictionary containing:
+            - success: Boolean indicating if the import finished
+            - processed: Number of events read from the file
+            - imported: Number of events added to the calendar
+            - skipped: Number of duplicates skipped
+            - failed: Number of events the API rejected
+            - errors: Up to 20 error messages
+
+    Example:
+        import_calendar_events(file_path="semester.ics")
+    """
+    if timezone is None:
+        timezone = get_system_timezone()
+    try:
+        path = bulk_io.resolve_file(FILES_DIR, file_path, ('.ics', '.csv'))
+        result = bulk_io.import_events(
+            path, calendar_id, get_calendar_service, tz=timezone,
+            checkpoint_path=f'{path}.checkpoint.json', pool=_compute
+        )
+        _cache.invalidate(calendar_id)
+        return dict(success=True, calendar_id=calendar_id, **result)
+
+    except deadlines.DeadlineExceeded as exceeded:
+        _cache.invalidate(calendar_id)
+        return dict(
+            exceeded.partial, success=False, calendar_id=calendar_id,
+            error=f'Stopped before the import finished: {exceeded}. Run the import again to resume it.'
+        )
+    except HttpError as error:
+        _cache.invalidate(calendar_id)
+        return {
+            'success': False,
+            'calendar_id': calendar_id,
+            'error': f'An error occurred: {error}'
+        }
+    except Exception as e:
+        _cache.invalidate(calendar_id)
+        return {
+            'success': False,
+            'calendar_id': calendar_id,
+            'error': f'An error occurred: {_file_error(e)}'
+        }
+
+
+@instrument_tool
+def export_calendar_events(
+    file_path: str,
+    calendar_id: str = 'primary',
+    time_min: Optional[str] = None,
+    time_max: Optional[str] = None,
+    timezone: Optional[str] = None,
+    overwrite: bool = False
+) -> dict:
+    """
+    Export events from a calendar to an .ics file in the import/export folder.
+
+    Args:
+        file_path: Name of the .ics file to write in the import/export folder, e.g. 'calendar-2025.ics' (required).
+                   Subfolders are allowed; absolute paths and '..' are not.
+        calendar_id: Calendar ID to export (default: 'primary')
+        time_min: Start of the range in ISO format (default: no lower bound)
+        time_max: End of the range in ISO format (default: no upper bound)
+        timezone: Timezone for time_min/time_max without an offset (default: system timezone)
+        overwrite: Replace the file if it already exists (default: False). Only set this when
+                   the user has asked to replace that file.
+
+    Returns:
+        dict: Dictionary containing:
+            - success: Boolean indicating if the export finished
+            - file_path: The file that was written, relative to the import/export folder
+            - exported: Number of events written
+
+    Example:
+        export_calendar_events(
+            file_path="calendar-2025.ics",
+            time_min="2025-01-01T00:00:00",
+            time_max="2026-01-01T00:00:00"
+        )
+    """
+    if timezone is None:
+        timezone = get_system_timezone()
+    try:
+        path = bulk_io.resolve_file(FILES_DIR, file_path, ('.ics',))
+        if os.path.exists(path) and not overwrite:
+            return {
+                'success': False,
+                'calendar_id': calendar_id,
+                'file_path': file_path,
+                'error': f'{file_path} already exists. Export to another file name, or pass overwrite=True if the user asked to replace it.'
+            }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        exported = bulk_io.export_events(path, calendar_id, get_calendar_service, time_min, time_max, timezone)
+        return {
+            'success': True,
+            'calendar_id': calendar_id,
+            'file_path': _file_name(path),
+            'exported': exported
+        }
+
+    except deadlines.DeadlineExceeded as exceeded:
+        return dict(
+            exceeded.partial, success=False, calendar_id=calendar_id, file_path=_file_name(path),
+            error=f'Stopped before the export finished, the file holds the first events only: {exceeded}'
+        )
+    except HttpError as error:
+        return {
+            'success': False,
+            'calendar_id': calendar_id,
+            'error': f'An error occurred: {error}'
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'calendar_id': calendar_id,
+            'error': f'An error occurred: {_file_error(e)}'
+        }
+
+
 # Helper functions for prompt
 def get_system_timezone():
-    return str(get_localzone())
+    return local_zone_name()
 
 def get_time_info():
     now = datetime.now()
-    local_timezone = get_localzone()
-    timezone_name = str(local_timezone)
+    timezone_name = local_zone_name()
 
     current_date = now.strftime('%Y-%m-%d')
     current_day = now.strftime('%A')
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+
+class Prefetcher:
+    """
+    Warms a CalendarCache in the background.
+
+    The prompts have the model call list_calendars() and get_calendar_events() before most
+    changes. prefetch() starts those fetches on worker threads at session start and when a
+    user message arrives, so by the time the model asks for the data it is already cached
+    (or in flight, in which case the tool waits for it instead of issuing its own request).
+
+    Args:
+        cache: The CalendarCache the tools read from.
+        fetch_calendars: Fetches the calendar list and stores it in the cache.
+        fetch_window: fetch_window(calendar_id, start, end, timezone) fetches every event in
+                      the epoch range [start, end) and stores the window in the cache.
+        window: Returns (start, end, timezone) for the near-term window to prefetch.
+        calendar_ids: Calendars whose near-term window is prefetched.
+    """
+
+    def __init__(
+        self,
+        cache,
+        fetch_calendars: Callable[[], object],
+        fetch_window: Callable[[str, int, int, str], object],
+        window: Callable[[], tuple],
+        calendar_ids: Iterable[str] = ('primary',),
+        max_workers: int = 2
+    ):
+        self.cache = cache
+        self.fetch_calendars = fetch_calendars
+        self.fetch_window = fetch_window
+        self.window = window
+        self.calendar_ids = tuple(calendar_ids)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='calendar-prefetch')
+
+    def prefetch(self) -> list:
+        """Start fetches for anything that is not already cached or in flight. Returns the new futures."""
+        if not self.cache.enabled:
+            return []
+
+        futures = []
+        key = ('calendars',)
+        if not self.cache.has_calendars() and self.cache.pending(key) is None:
+            future = self._executor.submit(self.fetch_calendars)
+            self.cache.track(key, future)
+            futures.append(future)
+
+        start, end, timezone = self.window()
+        for calendar_id in self.calendar_ids:
+            key = ('events', calendar_id, timezone)
+            if self.cache.has_window(calendar_id, timezone, start, end) or self.cache.pending(key) is not None:
+                continue
+            future = self._executor.submit(self.fetch_window, calendar_id, start, end, timezone)
+            self.cache.track(key, future)
+            futures.append(future)
+
+        return futures
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,162 @@
+"""
+Window and page sizes for get_calendar_events() queries that leave them open.
+
+The model cannot tell how busy a calendar is. Asked what is on a day, it takes the default
+page for a range that may hold more events and has to call again; asked what is next, it
+leaves the range open-ended. The planner fills in what the query leaves out, by question type:
+- range: a time range without max_results gets a page large enough for every event expected
+  in it, and a larger one if that page comes back full
+- upcoming: an open-ended query for the next N events (default 10). With the calendar cache
+  on, it is run as a bounded window expected to hold them, widened fourfold until it does or
+  reaches a year, then open-ended. Each window is fetched whole, so it can be cached (see
+  calendar_cache.py) and later questions about the days in it need no request, and windows
+  already cached answer it without one. With the cache off, it is sent as given.
+- limited: a time range with max_results is run as given
+
+Expected counts come from the calendar's event density in events per day: learned from the
+results of earlier queries (observe()), or taken from the calendar cache before any are seen.
+"""
+import math
+import threading
+from typing import Callable, Optional, Tuple
+
+from instrumentation import count
+
+
+DAY = 86400
+DEFAULT_EVENTS = 10  # Events returned by an open-ended query without max_results
+DEFAULT_DENSITY = 4.0  # Events per day assumed for a calendar nothing is known about
+HEADROOM = 1.5  # Pages and windows are sized for this many times the expected events
+PAGE_LIMIT = 250  # Largest page the planner asks for; the model can still ask for up to 2500
+GROWTH = 4
+HORIZON = 366 * DAY  # Beyond this an upcoming query is left open-ended
+
+RANGE = 'range'
+UPCOMING = 'upcoming'
+LIMITED = 'limited'
+
+
+def question_type(end: Optional[int], max_results: Optional[int]) -> str:
+    """RANGE, UPCOMING or LIMITED for a query ending at end (None: open-ended) with max_results (None: unset)."""
+    if end is None:
+        return UPCOMING
+    return RANGE if max_results is None else LIMITED
+
+
+class QueryPlanner:
+    """
+    Chooses windows and page sizes from per-calendar event densities.
+
+    Args:
+        cached_density: cached_density(calendar_id) returns the events per day in cached
+            windows, or None; consulted for calendars no result has been observed for
+        windows: Run upcoming queries as growing bounded windows (for the calendar cache)
+        smoothing: Weight of a new observation in the running density
+    """
+
+    def __init__(
+        self,
+        cached_density: Optional[Callable[[str], Optional[float]]] = None,
+        windows: bool = False,
+        smoothing: float = 0.3
+    ):
+        self.cached_density = cached_density
+        self.windows = windows
+        self.smoothing = smoothing
+        self._densities = {}  # calendar_id -> events per day
+        self._lock = threading.Lock()
+
+    def density(self, calendar_id: str) -> float:
+        """Expected events per day on a calendar."""
+        with self._lock:
+            density = self._densities.get(calendar_id)
+        if density is None and self.cached_density is not None:
+            density = self.cached_density(calendar_id)
+        return density if density is not None else DEFAULT_DENSITY
+
+    def observe(self, calendar_id: str, start: int, end: Optional[int], found: int, complete: bool):
+        """
+        Learn from a query result: found events overlapping [start, end). complete is False if
+        the page was full, in which case the result only bounds the density from below.
+        """
+        if end is None or end <= start:
+            return
+        sample = found * DAY / (end - start)
+        with self._lock:
+            current = self._densities.get(calendar_id)
+            if current is None:
+                self._densities[calendar_id] = sample
+            elif complete:
+                self._densities[calendar_id] = current + self.smoothing * (sample - current)
+            elif sample > current:
+                self._densities[calendar_id] = sample
+
+    def page_size(self, calendar_id: str, start: int, end: int) -> int:
+        """Page size for every event expected in [start, end), with headroom."""
+        expected = self.density(calendar_id) * (end - start) / DAY
+        return min(PAGE_LIMIT, max(DEFAULT_EVENTS, math.ceil(expected * HEADROOM)))
+
+    def fetch(
+        self,
+        query: Callable[[int, Optional[int], int], list],
+        calendar_id: str,
+        start: int,
+        end: Optional[int],
+        max_results: Optional[int]
+    ) -> Tuple[list, Optional[int], int]:
+        """
+        Run a get_calendar_events() query, choosing what it leaves open.
+
+        Args:
+            query: query(start, end, max_results) returns up to max_results events overlapping
+                the epoch range [start, end) (end None: open-ended), ordered by start
+            calendar_id: The calendar queried
+            start: Epoch start of the query
+            end: Epoch end, or None for an open-ended query
+            max_results: Events asked for, or None to let the planner choose
+
+        Returns:
+            tuple: (events, end, max_results), where end and max_results fetch the same events
+            again in a single query
+        """
+        kind = question_type(end, max_results)
+        if kind == LIMITED:
+            return query(start, end, max_results), end, max_results
+        if kind == RANGE:
+            return self._fetch_range(query, calendar_id, start, end)
+        wanted = max_results or DEFAULT_EVENTS
+        if not self.windows:
+            return query(start, None, wanted), None, wanted
+        return self._fetch_upcoming(query, calendar_id, start, wanted)
+
+    def _fetch_range(self, query, calendar_id, start, end):
+        page = self.page_size(calendar_id, start, end)
+        while True:
+            events = query(start, end, page)
+            if len(events) < page or page >= PAGE_LIMIT:
+                return events, end, page
+            # Full page: the range holds more events than expected
+            count('query_planner_refetches')
+            page = min(PAGE_LIMIT, page * GROWTH)
+
+    def _fetch_upcoming(self, query, calendar_id, start, wanted):
+        density = self.density(calendar_id)
+        span = max(DAY, math.ceil(wanted * HEADROOM * DAY / density)) if density > 0 else HORIZON
+        events, seen = [], set()
+        window_start, window_end = start, start + span
+        while True:
+            end = window_end if window_end - start < HORIZON else None
+            # Events running across window_start were returned for the previous window as well,
+            # and come back first in this one
+            carried = sum(1 for event in events if event.end > window_start)
+            page = wanted - len(events) + carried
+            if end is not None:
+                page = max(page, self.page_size(calendar_id, window_start, end))
+            for event in query(window_start, end, page):
+                if event.id not in seen:
+                    seen.add(event.id)
+                    events.append(event)
+            if len(events) >= wanted or end is None:
+                return events[:wanted], end, wanted
+            count('query_planner_expansions')
+            window_start, window_end = window_end, start + (window_end - start) * GROWTH
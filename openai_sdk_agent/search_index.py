@@ -0,0 +1,210 @@
+"""
+Full-text search over calendar events.
+
+Events are kept in a local SQLite database with an FTS5 index over summary, description,
+location and attendees. The first sync of a calendar lists all of its events; after that
+each sync sends the stored syncToken, so only events changed since the last sync are
+fetched (cancelled ones are removed). Searches are ranked with BM25, weighting a match in
+the summary above one in the location, attendees or description.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from event_record import Event
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    rowid INTEGER PRIMARY KEY,
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    UNIQUE (calendar_id, event_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS event_text USING fts5(
+    summary, description, location, attendees, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    calendar_id TEXT PRIMARY KEY,
+    token TEXT,
+    generation INTEGER,
+    synced REAL
+);
+"""
+
+# BM25 column weights: summary, description, location, attendees
+_WEIGHTS = (10.0, 1.0, 3.0, 2.0)
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(query: str, any_term: bool = False) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word as a quoted prefix term, so user input
+    cannot inject FTS syntax. Terms are combined with AND, or with OR when any_term is set.
+    """
+    words = _WORD_RE.findall(query.lower())
+    if not words:
+        return None
+    return (' OR ' if any_term else ' ').join(f'"{word}"*' for word in words)
+
+
+def list_changes(service, calendar_id: str, token: Optional[str]) -> Tuple[list, Optional[str]]:
+    """
+    Return (items, next sync token): every event of calendar_id, or with a token only those
+    changed since it was issued, cancelled ones included.
+    """
+    items = []
+    page_token = None
+    while True:
+        # A sync token cannot be combined with time bounds or ordering, only with singleEvents
+        result = service.events().list(
+            calendarId=calendar_id,
+            maxResults=2500,
+            singleEvents=True,
+            syncToken=token,
+            showDeleted=token is not None,
+            pageToken=page_token
+        ).execute(num_retries=3)
+        items.extend(result.get('items', []))
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return items, result.get('nextSyncToken')
+
+
+class SearchIndex:
+    """
+    Local full-text index of one or more calendars, kept current by incremental sync.
+
+    Args:
+        path: SQLite file for the index (':memory:' for a throwaway index)
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    # Sync
+
+    def is_fresh(self, calendar_id: str, generation: int, max_age: float) -> bool:
+        """True if calendar_id was synced less than max_age seconds ago at the given cache generation."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT generation, synced FROM sync_state WHERE calendar_id = ?', (calendar_id,)
+            ).fetchone()
+        return row is not None and row[0] == generation and time.time() - row[1] < max_age
+
+    def sync(self, service, calendar_id: str, generation: int = 0) -> int:
+        """
+        Bring calendar_id up to date. Uses the stored syncToken when there is one, and falls
+        back to a full sync if the server has expired it (410 Gone).
+
+        Returns:
+            int: Number of events added, changed or removed
+        """
+        with self._lock:
+            row = self._db.execute('SELECT token FROM sync_state WHERE calendar_id = ?', (calendar_id,)).fetchone()
+        token = row[0] if row else None
+        try:
+            items, next_token = list_changes(service, calendar_id, token)
+        except HttpError as error:
+            if token is None or error.resp.status != 410:
+                raise
+            token = None
+            items, next_token = list_changes(service, calendar_id, None)
+
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                if token is None:
+                    self._clear(calendar_id)
+                for item in items:
+                    self._remove(calendar_id, item['id'])
+                    if item.get('status') != 'cancelled':
+                        self._add(Event.from_api(item, calendar_id))
+                self._db.execute(
+                    'INSERT OR REPLACE INTO sync_state (calendar_id, token, generation, synced) VALUES (?, ?, ?, ?)',
+                    (calendar_id, next_token, generation, time.time())
+                )
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+        return len(items)
+
+    def _clear(self, calendar_id: str):
+        self._db.execute(
+            'DELETE FROM event_text WHERE rowid IN (SELECT rowid FROM events WHERE calendar_id = ?)', (calendar_id,)
+        )
+        self._db.execute('DELETE FROM events WHERE calendar_id = ?', (calendar_id,))
+
+    def _remove(self, calendar_id: str, event_id: str):
+        row = self._db.execute(
+            'SELECT rowid FROM events WHERE calendar_id = ? AND event_id = ?', (calendar_id, event_id)
+        ).fetchone()
+        if row is not None:
+            self._db.execute('DELETE FROM event_text WHERE rowid = ?', row)
+            self._db.execute('DELETE FROM events WHERE rowid = ?', row)
+
+    def _add(self, event: Event):
+        cursor = self._db.execute(
+            'INSERT INTO events (calendar_id, event_id, start, end, record) VALUES (?, ?, ?, ?, ?)',
+            (event.calendar_id, event.id, event.start, event.end, json.dumps(event.to_record(), separators=(',', ':')))
+        )
+        self._db.execute(
+            'INSERT INTO event_text (rowid, summary, description, location, attendees) VALUES (?, ?, ?, ?, ?)',
+            (cursor.lastrowid, event.summary, event.description or '', event.location or '', ' '.join(event.attendees or ()))
+        )
+
+    # Search
+
+    def search(
+        self,
+        query: str,
+        calendar_id: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        limit: int = 10
+    ) -> List[Tuple[Event, float]]:
+        """
+        Return up to `limit` (event, score) pairs for events in calendar_id overlapping
+        [start, end) that match every word of the query, best first. If no event matches
+        every word, events matching any word are returned instead. Higher scores are better.
+        """
+        for any_term in (False, True):
+            expression = match_expression(query, any_term)
+            if expression is None:
+                return []
+            with self._lock:
+                rows = self._db.execute(
+                    f"""
+                    SELECT e.record, -bm25(event_text, {', '.join(map(str, _WEIGHTS))}) AS score
+                    FROM event_text JOIN events e ON e.rowid = event_text.rowid
+                    WHERE event_text MATCH ? AND e.calendar_id = ? AND e.end > ? AND (? IS NULL OR e.start < ?)
+                    ORDER BY score DESC, e.start
+                    LIMIT ?
+                    """,
+                    (expression, calendar_id, start if start is not None else -2 ** 62, end, end, limit)
+                ).fetchall()
+            if rows:
+                return [(Event.from_record(json.loads(record)), round(score, 4)) for record, score in rows]
+        return []
+
+    def count(self, calendar_id: Optional[str] = None) -> int:
+        with self._lock:
+            if calendar_id is None:
+                return self._db.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+            return self._db.execute('SELECT COUNT(*) FROM events WHERE calendar_id = ?', (calendar_id,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,272 @@
+"""
+Key-value stores for state shared between agent worker processes.
+
+CALENDAR_STORE selects the backend:
+    memory://                  per-process (default; nothing is shared)
+    sqlite:///path/to/store.db SQLite in WAL mode, shared by processes on one host
+    redis://host:6379/0        Redis or any server speaking its protocol (requires the redis package)
+
+Every backend offers the same small API: get/set with an optional TTL, add (set only if
+absent), delete, an atomic incr, and take_token() for token-bucket rate limits. Values are
+strings.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+
+class MemoryStore:
+    """In-process store. The default, and the local stand-in for the shared backends."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._live(key)
+            return item[0] if item else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Set key only if it does not exist. Returns True if it was set."""
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            item = self._live(key)
+            value = int(item[0]) + amount if item else amount
+            self._data[key] = (str(value), item[1] if item else None)
+            return value
+
+    def take_token(self, bucket: str, rate: float, capacity: float) -> float:
+        """Take one token from a bucket refilled at `rate` per second. Returns 0, or seconds to wait."""
+        with self._lock:
+            item = self._live(bucket)
+            return _take(self._data, bucket, item[0] if item else None, rate, capacity)
+
+
+def _take(data, bucket, state, rate, capacity) -> float:
+    now = time.time()
+    tokens, updated = (float(v) for v in state.split(',')) if state else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+    if not wait:
+        tokens -= 1
+    data[bucket] = (f'{tokens},{now}', None)
+    return wait
+
+
+class SQLiteStore:
+    """
+    Store in a SQLite database in WAL mode, so any number of processes on the same host
+    can read concurrently while writes are serialized by SQLite's lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, so keep one per thread
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            'SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)',
+            (key, value, time.time() + ttl if ttl else None)
+        )
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        cursor = self._connect().execute(
+            'INSERT INTO kv (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE kv.expires IS NOT NULL AND kv.expires <= ?',
+            (key, value, now + ttl if ttl else None, now)
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        self._connect().execute('DELETE FROM kv WHERE key = ?', (key,))
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            value = int(self.get(key) or 0) + amount
+            db.execute('INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, NULL)', (key, str(value)))
+            db.execute('COMMIT')
+            return value
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def take_token(self, bucket: str, rate: float, capacity: float) -> float:
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            updates = {}
+            wait = _take(updates, bucket, self.get(bucket), rate, capacity)
+            db.execute('INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, NULL)', (bucket, updates[bucket][0]))
+            db.execute('COMMIT')
+            return wait
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+
+# Token bucket as one atomic server-side step: KEYS[1]=bucket, ARGV=rate, capacity, now
+_TAKE_TOKEN_SCRIPT = """
+local state = redis.call('GET', KEYS[1])
+local rate, capacity, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens, updated = capacity, now
+if state then
+    local sep = string.find(state, ',')
+    tokens, updated = tonumber(string.sub(state, 1, sep - 1)), tonumber(string.sub(state, sep + 1))
+end
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('SET', KEYS[1], tostring(tokens) .. ',' .. tostring(now))
+return tostring(wait)
+"""
+
+
+class RedisStore:
+    """Store on a Redis-protocol server, shared by workers on any number of hosts."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError(f'CALENDAR_STORE={url} requires the redis package (pip install redis)') from e
+        self.url = url
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._take_token = self._redis.register_script(_TAKE_TOKEN_SCRIPT)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._redis.get(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self._redis.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(self._redis.set(key, value, nx=True, px=int(ttl * 1000) if ttl else None))
+
+    def delete(self, key: str):
+        self._redis.delete(key)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return self._redis.incrby(key, amount)
+
+    def take_token(self, bucket: str, rate: float, capacity: float) -> float:
+        return float(self._take_token(keys=[bucket], args=[rate, capacity, time.time()]))
+
+
+def sqlite_path(url: str) -> str:
+    """Path from a sqlite:///relative.db or sqlite:////absolute.db URL."""
+    return url[len('sqlite:///'):]
+
+
+def open_store(url: Optional[str] = None):
+    """Open the store named by a URL (default: CALENDAR_STORE, else memory://)."""
+    url = url or os.getenv('CALENDAR_STORE', 'memory://')
+    if url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith('sqlite://'):
+        return SQLiteStore(sqlite_path(url))
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f'Unsupported CALENDAR_STORE {url!r}; use memory://, sqlite:///path or redis://host')
+
+
+def is_shared(store) -> bool:
+    return not isinstance(store, MemoryStore)
+
+
+class RateLimiter:
+    """
+    Token bucket shared through a store, so all workers together stay under one quota.
+
+    Args:
+        store: Store holding the bucket
+        name: Bucket key
+        rate: Tokens added per second
+        capacity: Maximum burst
+    """
+
+    def __init__(self, store, name: str, rate: float, capacity: Optional[float] = None):
+        self.store = store
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+
+    def acquire(self, sleep: Callable[[float], object] = time.sleep):
+        """Block until a token is available. sleep waits between attempts (deadlines.sleep() stops at the deadline)."""
+        while True:
+            wait = self.store.take_token(self.name, self.rate, self.capacity)
+            if not wait:
+                return
+            sleep(wait)
+
+
+class StoreLock:
+    """
+    Mutual exclusion between workers sharing a store. The lock is a lease that expires after
+    `ttl` seconds, so a worker that dies while holding it does not block the others for good.
+    """
+
+    def __init__(self, store, name: str, ttl: float = 60.0, poll: float = 0.05):
+        self.store = store
+        self.name = name
+        self.ttl = ttl
+        self.poll = poll
+        self._owner = None
+
+    def __enter__(self):
+        owner = uuid.uuid4().hex
+        while not self.store.add(self.name, owner, ttl=self.ttl):
+            time.sleep(self.poll)
+        self._owner = owner
+        return self
+
+    def __exit__(self, *exc):
+        if self.store.get(self.name) == self._owner:
+            self.store.delete(self.name)
+        self._owner = None
@@ -0,0 +1,437 @@
+"""
+Binary on-disk snapshots of cached event windows, for a warm start after a restart.
+
+A snapshot is read through mmap: opening one reads the header and the table of contents,
+and each section is checked against its CRC32 when first used. Events are stored as
+separate records behind an interval index (start and end times plus a running maximum of
+end times), so a query decodes only the records overlapping its range.
+
+Layout (integers little-endian, arrays in the byte order recorded in the header):
+
+    header    magic, version, flags, section count, created (epoch seconds), CRC32 of header and TOC
+    TOC       per section: offset, length, CRC32
+    section   window start and end, saved (epoch seconds), event count, lengths of calendar_id,
+              timezone and sync token, the three strings, then 8-byte aligned arrays
+              starts[n], ends[n], max_ends[n] (int64), offsets[n + 1] (uint64) and the records
+              (Event.to_record() as UTF-8 JSON), ordered by start
+
+Anything that does not check out raises SnapshotError; the caller then fetches from the API
+as if there were no snapshot.
+"""
+import atexit
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from event_record import Event, wall_epoch
+from instrumentation import count
+from time_utils import get_zone
+
+
+MAGIC = b'SACACHE\0'
+VERSION = 1
+OPEN_END = 2 ** 63 - 1  # Stored window end for windows without one
+
+_HEADER = struct.Struct('<8sHHIdI4x')
+_TOC_ENTRY = struct.Struct('<QQI4x')
+_SECTION = struct.Struct('<qqdIIII')
+_BIG_ENDIAN = 1  # Header flag: arrays are big-endian
+
+
+class SnapshotError(Exception):
+    """The snapshot is missing, truncated, corrupt or from an incompatible version."""
+
+
+class WindowSnapshot(NamedTuple):
+    """One cached event window as written to a snapshot."""
+    calendar_id: str
+    timezone: str
+    start: int
+    end: Optional[int]
+    saved: float
+    sync_token: Optional[str]
+    events: List[Event]
+
+
+def _pad(length: int) -> bytes:
+    return b'\0' * (-length % 8)
+
+
+def _encode_section(window: WindowSnapshot) -> bytes:
+    events = sorted(window.events, key=lambda event: (event.start, event.id))
+    strings = [value.encode('utf-8') for value in (window.calendar_id, window.timezone, window.sync_token or '')]
+    records = [json.dumps(event.to_record(), separators=(',', ':')).encode('utf-8') for event in events]
+
+    starts = array('q', (event.start for event in events))
+    ends = array('q', (event.end for event in events))
+    max_ends = array('q')
+    running = -OPEN_END
+    for end in ends:
+        running = max(running, end)
+        max_ends.append(running)
+    offsets = array('Q', [0])
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    head = _SECTION.pack(
+        window.start, OPEN_END if window.end is None else window.end, window.saved, len(events), *map(len, strings)
+    ) + b''.join(strings)
+    return b''.join([
+        head, _pad(len(head)),
+        starts.tobytes(), ends.tobytes(), max_ends.tobytes(), offsets.tobytes(),
+        *records,
+    ])
+
+
+def write_snapshot(path: str, windows: Iterable[WindowSnapshot]) -> int:
+    """
+    Write windows to path, replacing any previous snapshot atomically.
+
+    Returns:
+        int: Size of the snapshot in bytes
+    """
+    sections = [_encode_section(window) for window in windows]
+    offset = _HEADER.size + _TOC_ENTRY.size * len(sections)
+    toc = []
+    for section in sections:
+        toc.append(_TOC_ENTRY.pack(offset, len(section), zlib.crc32(section)))
+        offset += len(section) + len(_pad(len(section)))
+    flags = _BIG_ENDIAN if sys.byteorder == 'big' else 0
+    fields = (MAGIC, VERSION, flags, len(sections), time.time())
+    header = _HEADER.pack(*fields, zlib.crc32(_HEADER.pack(*fields, 0) + b''.join(toc)))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.writelines(toc)
+            for section in sections:
+                f.write(section)
+                f.write(_pad(len(section)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return offset
+
+
+class SectionView:
+    """
+    One window of a Snapshot. Events are decoded on access; len(), iteration and between()
+    behave like the sorted event list of a cache window.
+    """
+
+    def __init__(self, snapshot: 'Snapshot', offset: int, length: int):
+        self._snapshot = snapshot
+        self.nbytes = length  # Mapped, not copied; counted against the cache memory budget all the same
+        view = snapshot._view
+        start, end, self.saved, self._count, *lengths = _SECTION.unpack_from(view, offset)
+        self.start = start
+        self.end = None if end == OPEN_END else end
+
+        position = offset + _SECTION.size
+        strings = []
+        for string_length in lengths:
+            strings.append(bytes(view[position:position + string_length]).decode('utf-8'))
+            position += string_length
+        self.calendar_id, self.timezone, token = strings
+        self.sync_token = token or None
+        position += -position % 8
+
+        n = self._count
+        self._starts = view[position:position + 8 * n].cast('q')
+        self._ends = view[position + 8 * n:position + 16 * n].cast('q')
+        self._max_ends = view[position + 16 * n:position + 24 * n].cast('q')
+        self._offsets = view[position + 24 * n:position + 32 * n + 8].cast('Q')
+        self._records = position + 32 * n + 8
+        if self._records + self._offsets[n] > offset + length:
+            raise SnapshotError('Section records run past the end of the section')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def event(self, index: int) -> Event:
+        begin = self._records + self._offsets[index]
+        record = bytes(self._snapshot._view[begin:self._records + self._offsets[index + 1]])
+        return Event.from_record(json.loads(record))
+
+    def __iter__(self) -> Iterator[Event]:
+        return (self.event(i) for i in range(self._count))
+
+    def between(self, start: int, end: Optional[int] = None, tz=None) -> List[Event]:
+        """
+        Events overlapping the epoch range [start, end), ordered by start. With tz, all-day
+        events are matched by their dates in that zone (see Event.overlaps()).
+        """
+        low, high = start, end
+        if tz is not None:
+            # All-day events are indexed by UTC midnights: search the range read in either zone
+            low = min(start, wall_epoch(start, tz))
+            high = None if end is None else max(end, wall_epoch(end, tz))
+        # max_ends never decreases, so every event before `first` ends by `low`
+        first = bisect_right(self._max_ends, low)
+        last = self._count if high is None else bisect_left(self._starts, high)
+        events = [self.event(i) for i in range(first, last) if self._ends[i] > low]
+        if tz is None:
+            return events
+        return [event for event in events if event.overlaps(start, end, tz)]
+
+
+class Snapshot:
+    """
+    A snapshot file mapped into memory.
+
+    Example:
+        with Snapshot('cache.snapshot') as snapshot:
+            for section in snapshot:
+                events = section.between(start, end)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:
+            # ValueError: an empty file cannot be mapped
+            raise SnapshotError(f'Cannot map {path}: {error}') from error
+        self._view = memoryview(self._mmap)
+        try:
+            self._read_header()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_header(self):
+        if len(self._view) < _HEADER.size:
+            raise SnapshotError('Truncated header')
+        magic, version, flags, count, self.created, crc = _HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            raise SnapshotError('Not a cache snapshot')
+        if version != VERSION:
+            raise SnapshotError(f'Unsupported snapshot version {version}')
+        toc_end = _HEADER.size + _TOC_ENTRY.size * count
+        if len(self._view) < toc_end:
+            raise SnapshotError('Truncated table of contents')
+        expected = zlib.crc32(_HEADER.pack(magic, version, flags, count, self.created, 0) + self._view[_HEADER.size:toc_end])
+        if crc != expected:
+            raise SnapshotError('Header checksum mismatch')
+        if bool(flags & _BIG_ENDIAN) != (sys.byteorder == 'big'):
+            raise SnapshotError('Snapshot written on a machine with a different byte order')
+        self._toc = [_TOC_ENTRY.unpack_from(self._view, _HEADER.size + i * _TOC_ENTRY.size) for i in range(count)]
+        self._sections = {}
+
+    def __len__(self) -> int:
+        return len(self._toc)
+
+    def section(self, index: int) -> SectionView:
+        """Return a section, checking it against its checksum the first time."""
+        section = self._sections.get(index)
+        if section is None:
+            offset, length, crc = self._toc[index]
+            if offset + length > len(self._view):
+                raise SnapshotError(f'Section {index} is truncated')
+            if zlib.crc32(self._view[offset:offset + length]) != crc:
+                raise SnapshotError(f'Section {index} checksum mismatch')
+            try:
+                section = SectionView(self, offset, length)
+            except (struct.error, TypeError, ValueError, UnicodeDecodeError) as error:
+                raise SnapshotError(f'Section {index} is malformed: {error}') from error
+            self._sections[index] = section
+        return section
+
+    def __iter__(self) -> Iterator[SectionView]:
+        return (self.section(i) for i in range(len(self._toc)))
+
+    def close(self):
+        self._sections = {}
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            pass  # Sections handed out earlier still use the mapping; it closes when they are gone
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CacheSnapshots:
+    """
+    Saves a CalendarCache's windows to a snapshot and restores them at startup.
+
+    Windows still within the cache TTL are restored as they are. Older ones are brought up
+    to date with one incremental sync per calendar (events.list with the sync token saved
+    next to them) instead of being fetched again; a calendar whose token has expired, or
+    whose sections fail their checksum, is fetched from the API as usual.
+
+    A window is saved with its calendar's sync token only if the token was issued before
+    the window was fetched, so replaying the changes since the token always covers every
+    change the window might have missed. Restored windows hand their token on to the windows
+    saved next; a calendar with no token is listed once in full to get one, at the first
+    periodic save rather than at startup.
+
+    Args:
+        cache: The CalendarCache to save and restore
+        path: Snapshot file
+        list_changes: list_changes(calendar_id, token) returns (changed items, next sync
+                      token), or every event and a first token when token is None
+    """
+
+    def __init__(self, cache, path: str, list_changes: Callable[[str, Optional[str]], Tuple[list, Optional[str]]]):
+        self.cache = cache
+        self.path = path
+        self.list_changes = list_changes
+        self._tokens = {}  # calendar_id -> (sync token, wall-clock time the token request was sent)
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def load(self) -> int:
+        """Restore the snapshot into the cache. Returns the number of windows restored."""
+        try:
+            snapshot = Snapshot(self.path)
+        except SnapshotError:
+            if os.path.exists(self.path):
+                count('snapshot_errors')
+            return 0
+
+        sections = defaultdict(list)
+        for index in range(len(snapshot)):
+            try:
+                section = snapshot.section(index)
+            except SnapshotError:
+                count('snapshot_errors')
+                continue
+            sections[section.calendar_id].append(section)
+
+        restored = 0
+        for calendar_id, calendar_sections in sections.items():
+            stale = []
+            for section in calendar_sections:
+                if self.cache.restore_window(calendar_id, section.timezone, section.start, section.end, section, section.saved):
+                    restored += 1
+                elif section.sync_token is not None:
+                    stale.append(section)
+            restored += self._revalidate(calendar_id, stale)
+            if not stale:
+                # Revalidating stale sections gets a new token; otherwise keep the saved one
+                self._reuse_token(calendar_id, calendar_sections)
+        count('snapshot_windows_restored', restored)
+        return restored
+
+    def _reuse_token(self, calendar_id: str, sections: List[SectionView]):
+        # Each section was fetched after its token was issued, so the earliest save time among
+        # the sections holding a token is a bound on when it was issued. The restored windows'
+        # fetch times can come back a little earlier (wall clock to monotonic and back), hence the slack.
+        issued = {}
+        for section in sections:
+            if section.sync_token is not None:
+                issued[section.sync_token] = min(issued.get(section.sync_token, section.saved), section.saved)
+        if issued:
+            token = max(issued, key=issued.get)  # The latest has the fewest changes to replay
+            self._remember_token(calendar_id, token, issued[token] - 1.0)
+
+    def _revalidate(self, calendar_id: str, sections: List[SectionView]) -> int:
+        """Bring stale sections up to date from the changes since the oldest of their sync tokens."""
+        if not sections:
+            return 0
+        oldest = min(sections, key=lambda section: section.saved)
+        requested = time.time()
+        try:
+            items, token = self.list_changes(calendar_id, oldest.sync_token)
+        except Exception:
+            count('snapshot_resyncs')  # Token expired (410 Gone) or the API failed: fetch as usual
+            return 0
+        self._remember_token(calendar_id, token, requested)
+
+        changed = {item['id'] for item in items}
+        updated = [Event.from_api(item, calendar_id) for item in items if item.get('status') != 'cancelled']
+        for section in sections:
+            events = section
+            if changed:
+                events = [event for event in section if event.id not in changed]
+                tz = get_zone(section.timezone)
+                events.extend(event for event in updated if event.overlaps(section.start, section.end, tz))
+                events.sort(key=lambda event: (event.start, event.id))
+            self.cache.restore_window(calendar_id, section.timezone, section.start, section.end, events, requested)
+        return len(sections)
+
+    def _remember_token(self, calendar_id: str, token: Optional[str], requested: float):
+        if token is not None:
+            with self._lock:
+                self._tokens[calendar_id] = (token, requested)
+
+    def acquire_tokens(self, calendar_ids: Iterable[str]):
+        """Get a first sync token for calendars without one. This lists every event of the calendar once."""
+        for calendar_id in calendar_ids:
+            with self._lock:
+                if calendar_id in self._tokens:
+                    continue
+            requested = time.time()
+            try:
+                _, token = self.list_changes(calendar_id, None)
+            except Exception:
+                count('snapshot_errors')
+                continue
+            self._remember_token(calendar_id, token, requested)
+
+    def save(self) -> int:
+        """Write the cache's fresh windows to the snapshot. Returns the snapshot size in bytes."""
+        windows = []
+        for calendar_id, timezone, start, end, events, fetched in self.cache.snapshot_windows():
+            with self._lock:
+                token, requested = self._tokens.get(calendar_id, (None, None))
+            windows.append(WindowSnapshot(
+                calendar_id, timezone, start, end, fetched, token if token is not None and requested <= fetched else None, list(events)
+            ))
+        size = write_snapshot(self.path, windows)
+        count('snapshot_saves')
+        return size
+
+    def start(self, interval: float):
+        """
+        Restore the snapshot in the background, then save every interval seconds and once more
+        at exit. Periodic saves first get sync tokens for cached calendars that have none.
+        """
+        threading.Thread(target=self.load, name='cache-snapshot', daemon=True).start()
+        atexit.register(self._save_quietly)
+        self._schedule(interval)
+
+    def _schedule(self, interval: float):
+        if interval > 0:
+            self._timer = threading.Timer(interval, self._periodic_save, args=(interval,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _periodic_save(self, interval: float):
+        # Windows fetched after this can be saved with the token and revalidated after a restart
+        self.acquire_tokens({window[0] for window in self.cache.snapshot_windows()})
+        self._save_quietly()
+        self._schedule(interval)
+
+    def _save_quietly(self):
+        try:
+            self.save()
+        except Exception:
+            count('snapshot_errors')  # Kept from the previous save; the next one tries again
+
+    def shutdown(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
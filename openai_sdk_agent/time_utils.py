@@ -0,0 +1,168 @@
+import re
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from typing import Optional, Union
+from zoneinfo import ZoneInfo
+
+from tzlocal import get_localzone
+
+
+UTC = dt_timezone.utc
+
+# Accepts 'YYYY-MM-DD', 'YYYY-MM-DDTHH:MM[:SS[.ffffff]]' and an optional 'Z' or '+HH:MM' suffix
+_RFC3339_RE = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?'
+    r'\s*(Z|z|[+-]\d{2}:?\d{2})?)?$'
+)
+
+
+@lru_cache(maxsize=1)
+def local_zone():
+    """Return the system timezone, looked up once per process."""
+    return get_localzone()
+
+
+@lru_cache(maxsize=1)
+def local_zone_name() -> str:
+    return str(local_zone())
+
+
+@lru_cache(maxsize=64)
+def get_zone(name: Optional[str] = None):
+    """
+    Return a tzinfo for an IANA timezone name, reusing zone objects between calls.
+
+    Args:
+        name: IANA timezone name (e.g., 'America/New_York'). Defaults to the system timezone.
+    """
+    if name is None or name == local_zone_name():
+        return local_zone()
+    if name in ('UTC', 'Z', 'Etc/UTC'):
+        return UTC
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=64)
+def _parse_offset(offset: str):
+    if offset in ('Z', 'z'):
+        return UTC
+    sign = -1 if offset[0] == '-' else 1
+    digits = offset[1:].replace(':', '')
+    delta = timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+    return dt_timezone(sign * delta) if delta else UTC
+
+
+def localize(dt: datetime, tz: Optional[str] = None) -> datetime:
+    """
+    Attach a timezone to a naive datetime, treating it as wall-clock time in that zone.
+
+    Wall times that fall in a DST gap are moved forward past the gap, and ambiguous
+    times during a DST fall-back resolve to the first occurrence.
+    """
+    if dt.tzinfo is not None:
+        return dt
+    zone = get_zone(tz)
+    return dt.replace(tzinfo=zone).astimezone(UTC).astimezone(zone)
+
+
+def parse_time(value: Union[str, date, datetime], tz: Optional[str] = None) -> Union[date, datetime]:
+    """
+    Parse an ISO 8601 / RFC 3339 timestamp.
+
+    Args:
+        value: Timestamp string, date or datetime.
+        tz: Timezone used for values without an offset (default: system timezone)
+
+    Returns:
+        A `date` for date-only values (all-day events), otherwise a timezone-aware `datetime`.
+
+    Example:
+        parse_time("2025-01-15T10:00:00", "America/New_York")
+        parse_time("2025-01-15T15:00:00Z")
+        parse_time("2025-01-15")
+    """
+    if isinstance(value, datetime):
+        return localize(value, tz)
+    if isinstance(value, date):
+        return value
+
+    value = value.strip()
+    if len(value) > 10:
+        # Fast path: the C parser handles most inputs (and 'Z' on Python 3.11+)
+        try:
+            return localize(datetime.fromisoformat(value), tz)
+        except ValueError:
+            pass
+
+    match = _RFC3339_RE.match(value)
+    if match is None:
+        raise ValueError(f"Unrecognized time format: {value!r}. Use ISO format (YYYY-MM-DDTHH:MM:SS).")
+
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    if hour is None:
+        return date(int(year), int(month), int(day))
+
+    microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+    dt = datetime(
+        int(year), int(month), int(day),
+        int(hour), int(minute), int(second or 0), microsecond,
+        tzinfo=_parse_offset(offset) if offset else None
+    )
+    return localize(dt, tz)
+
+
+def to_utc(value: Union[str, date, datetime], tz: Optional[str] = None) -> datetime:
+    """Return a value as an aware UTC datetime. Dates map to local midnight in `tz`."""
+    parsed = parse_time(value, tz)
+    if not isinstance(parsed, datetime):
+        parsed = localize(datetime(parsed.year, parsed.month, parsed.day), tz)
+    return parsed.astimezone(UTC)
+
+
+def to_rfc3339(value: Union[str, date, datetime], tz: Optional[str] = None) -> str:
+    """Format a value as a UTC RFC 3339 string, as expected by timeMin/timeMax."""
+    return to_utc(value, tz).replace(tzinfo=None).isoformat() + 'Z'
+
+
+def now_rfc3339() -> str:
+    return to_rfc3339(datetime.now(UTC))
+
+
+def to_epoch(value: Union[str, date, datetime], tz: Optional[str] = None) -> int:
+    """Return a value as integer seconds since the Unix epoch."""
+    return int(to_utc(value, tz).timestamp())
+
+
+def from_epoch(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, UTC)
+
+
+def local_midnight(tz: Optional[str] = None, days: int = 0) -> datetime:
+    """Return the start of today (plus `days`) in the given timezone."""
+    now = datetime.now(get_zone(tz))
+    return localize(datetime(now.year, now.month, now.day) + timedelta(days=days), tz)
+
+
+def default_end(start: Union[date, datetime]) -> Union[date, datetime]:
+    """Default event end: one hour after a timed start, or the next day for all-day events."""
+    if isinstance(start, datetime):
+        # In UTC: adding to the wall-clock time would give an hour of 0 or 2 across a DST change
+        return (start.astimezone(UTC) + timedelta(hours=1)).astimezone(start.tzinfo)
+    return start + timedelta(days=1)
+
+
+def event_time(value: Union[date, datetime], tz: Optional[str] = None) -> dict:
+    """
+    Build a Calendar API start/end object.
+
+    Returns {'date': ...} for all-day values and {'dateTime': ..., 'timeZone': ...} otherwise.
+    """
+    if not isinstance(value, datetime):
+        return {'date': value.isoformat()}
+    if tz is None:
+        tz = local_zone_name()
+    return {
+        'dateTime': value.astimezone(get_zone(tz)).isoformat(),
+        'timeZone': tz,
+    }
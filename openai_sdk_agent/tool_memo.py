@@ -0,0 +1,147 @@
+import contextvars
+import functools
+import inspect
+import json
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from instrumentation import count
+
+
+_current_run = contextvars.ContextVar('current_memo_run', default=None)
+
+
+class MemoRun:
+    """Results of read tools for one agent run, keyed by tool name and canonical arguments."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._token = None
+        self._depth = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return True, self._results[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result, generation: int):
+        with self._lock:
+            # A write finished while this read was running, so its result may be stale
+            if generation == self.generation:
+                self._results[key] = result
+
+    def invalidate(self):
+        with self._lock:
+            self._results.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def summary(self) -> dict:
+        return {'saved_calls': self.hits, 'executed_calls': self.misses, 'invalidations': self.invalidations}
+
+
+def begin_run() -> MemoRun:
+    """Start memoizing tool results. Pair with end_run(). Reuses an active run, like instrumentation.begin_turn()."""
+    run = _current_run.get()
+    if run is not None:
+        run._depth += 1
+        return run
+    run = MemoRun()
+    run._token = _current_run.set(run)
+    return run
+
+
+def end_run(run: MemoRun) -> dict:
+    if run._depth:
+        run._depth -= 1
+        return run.summary()
+    try:
+        _current_run.reset(run._token)
+    except ValueError:
+        _current_run.set(None)
+    return run.summary()
+
+
+@contextmanager
+def memo_run():
+    """
+    Memoize read tools for the duration of one agent run.
+
+    Example:
+        with tool_memo.memo_run() as memo:
+            result = await Runner.run(agent, input=user_query, session=session)
+        print(memo.summary())
+    """
+    run = begin_run()
+    try:
+        yield run
+    finally:
+        end_run(run)
+
+
+def current_run() -> Optional[MemoRun]:
+    return _current_run.get()
+
+
+def _canonical(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def _key(func, signature, args, kwargs) -> tuple:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return func.__name__, json.dumps(_canonical(bound.arguments), sort_keys=True, default=str)
+
+
+def memoize(func):
+    """
+    Decorator for read-only tools. Inside a memo_run(), a repeated call with the same
+    arguments (after applying defaults) returns the earlier result instead of calling the
+    API again. Failed results are not memoized. Outside a run, calls pass straight through.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        run = _current_run.get()
+        if run is None:
+            return func(*args, **kwargs)
+        key = _key(func, signature, args, kwargs)
+        found, result = run.get(key)
+        if found:
+            count('tool_memo_hits')
+            return result
+        generation = run.generation
+        result = func(*args, **kwargs)
+        if not (isinstance(result, dict) and result.get('success') is False):
+            run.put(key, result, generation)
+        return result
+    return wrapper
+
+
+def invalidates(func):
+    """Decorator for tools that change calendar data. Clears the active run's memo after every call."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            run = _current_run.get()
+            if run is not None:
+                run.invalidate()
+    return wrapper
@@ -0,0 +1,133 @@
+"""
+Conversation recording for replay load tests (benchmarks/replay.py).
+
+With RECORD_CONVERSATIONS=path set, every user turn is appended to path as one JSON line:
+
+    {"conversation": "...", "agent": "openai", "message": "...",
+     "steps": [[[tool_name, arguments, output], ...], ...], "reply": "...",
+     "seconds": 1.9, "model_calls": 3, "tool_calls": 2, "tokens": 4210, "recorded": 1736150400.0}
+
+steps groups the tool calls by the model response that requested them, in order. A path
+ending in .gz is written gzip-compressed, one gzip member per turn.
+"""
+import contextvars
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+import instrumentation
+
+
+_current = contextvars.ContextVar('current_transcript', default=None)
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode + 't', encoding='utf-8') if path.endswith('.gz') else open(path, mode, encoding='utf-8')
+
+
+def _plain(value):
+    """JSON-compatible copy of a tool argument or result."""
+    return json.loads(json.dumps(value, default=str))
+
+
+class Transcript:
+    """The tool calls and reply of one user turn, collected while the turn runs."""
+
+    def __init__(self, conversation: str, message: str, stats: Optional[instrumentation.TurnStats] = None):
+        self.conversation = conversation
+        self.message = message
+        self.stats = stats
+        self.reply = None
+        self.started = time.perf_counter()
+        self._calls = []
+        self._lock = threading.Lock()
+        self._token = None
+
+    def add_tool_call(self, name: str, arguments, output):
+        """Record a finished tool call. arguments may be a dict or its JSON encoding."""
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments or '{}')
+        # Every call issued by one model response sees the same number of finished model calls
+        step = self.stats.calls.get(instrumentation.LLM, 0) if self.stats is not None else 0
+        with self._lock:
+            self._calls.append((step, name, _plain(arguments), _plain(output)))
+
+    def steps(self) -> list:
+        grouped = {}
+        with self._lock:
+            for step, name, arguments, output in self._calls:
+                grouped.setdefault(step, []).append([name, arguments, output])
+        return list(grouped.values())
+
+
+class ConversationRecorder:
+    """
+    Appends finished turns to a JSONL file, safe to share between threads.
+
+    Args:
+        path: File to append to (gzip-compressed if it ends in .gz)
+        agent: Name of the agent implementation, stored with every turn
+    """
+
+    def __init__(self, path: str, agent: str):
+        self.path = path
+        self.agent = agent
+        self._lock = threading.Lock()
+
+    def begin(self, conversation: str, message: str, stats: Optional[instrumentation.TurnStats] = None) -> Transcript:
+        """Start recording a turn; tool calls reported through record_tool_call() in this context join it."""
+        transcript = Transcript(conversation, message, stats)
+        transcript._token = _current.set(transcript)
+        return transcript
+
+    def finish(self, transcript: Transcript, reply: Optional[str] = None):
+        if reply is not None:
+            transcript.reply = reply
+        try:
+            _current.reset(transcript._token)
+        except ValueError:
+            # Finished from a different context than it was started in (framework callbacks)
+            _current.set(None)
+
+        steps = transcript.steps()
+        stats = transcript.stats
+        record = {
+            'conversation': transcript.conversation,
+            'agent': self.agent,
+            'message': transcript.message,
+            'steps': steps,
+            'reply': transcript.reply,
+            'seconds': round(time.perf_counter() - transcript.started, 4),
+            'model_calls': stats.calls.get(instrumentation.LLM, 0) if stats is not None else None,
+            'tool_calls': sum(len(step) for step in steps),
+            'tokens': stats.tokens if stats is not None else None,
+            'recorded': time.time(),
+        }
+        line = json.dumps(record, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            with _open(self.path, 'a') as f:
+                f.write(line)
+
+
+def record_tool_call(name: str, arguments, output):
+    """Add a tool call to the turn being recorded in the current context, if any."""
+    transcript = _current.get()
+    if transcript is not None:
+        transcript.add_tool_call(name, arguments, output)
+
+
+def read_transcripts(path: str) -> Iterator[dict]:
+    """Yield the recorded turns in path in the order they were written."""
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def open_recorder(agent: str) -> Optional[ConversationRecorder]:
+    """Recorder writing to RECORD_CONVERSATIONS, or None when recording is off."""
+    path = os.getenv('RECORD_CONVERSATIONS')
+    return ConversationRecorder(path, agent) if path else None
@@ -0,0 +1,42 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# google_adk_agent is a package; openai_sdk_agent's modules import each other by their bare names.
+# benchmarks holds the fake Calendar API.
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'openai_sdk_agent'), os.path.join(ROOT, 'benchmarks')]
+
+
+@pytest.fixture(params=['', 'google_adk_agent.'], ids=['openai', 'adk'])
+def agent(request):
+    """Imports modules from each agent's copy in turn, e.g. agent('time_utils')."""
+    return lambda module: importlib.import_module(request.param + module)
+
+
+@pytest.fixture
+def time_utils(agent):
+    return agent('time_utils')
+
+
+@pytest.fixture
+def bulk_io(agent):
+    return agent('bulk_io')
+
+
+@pytest.fixture
+def fake():
+    """An empty fake Calendar API."""
+    from fake_calendar import FakeCalendar
+    return FakeCalendar()
+
+
+@pytest.fixture
+def tools(agent, request, fake, monkeypatch):
+    """The agent's tools module running against the fake Calendar API, with an empty cache."""
+    module = agent('adk_tools' if request.node.callspec.params['agent'] else 'openai_tools')
+    monkeypatch.setattr(module, 'get_calendar_service', fake.service)
+    module._cache.invalidate()
+    return module
@@ -0,0 +1,96 @@
+ICS_HEADER = 'BEGIN:VCALENDAR\nVERSION:2.0\n'
+ICS_FOOTER = 'END:VCALENDAR\n'
+
+
+def vevent(uid, start, summary, *extra):
+    lines = ['BEGIN:VEVENT', f'UID:{uid}', f'DTSTART;TZID=Europe/Berlin:{start}', 'DURATION:PT30M', f'SUMMARY:{summary}', *extra, 'END:VEVENT']
+    return '\n'.join(lines) + '\n'
+
+
+def write_ics(tmp_path, *events):
+    path = tmp_path / 'import.ics'
+    path.write_text(ICS_HEADER + ''.join(events) + ICS_FOOTER)
+    return str(path)
+
+
+def events_by_uid(fake):
+    result = {}
+    for event in fake.events['primary'].values():
+        result.setdefault(event['iCalUID'], []).append(event)
+    return result
+
+
+def test_series_is_imported_with_its_recurrence(bulk_io, fake, tmp_path):
+    path = write_ics(tmp_path, vevent(
+        'standup', '20260105T090000', 'Standup',
+        'RRULE:FREQ=WEEKLY;BYDAY=MO',
+        'EXDATE;TZID=W. Europe Standard Time:20260119T090000',
+    ))
+    result = bulk_io.import_events(path, 'primary', fake.service)
+    assert (result['processed'], result['imported'], result['failed']) == (1, 1, 0)
+    [series] = events_by_uid(fake)['standup']
+    assert series['start'] == {'dateTime': '2026-01-05T09:00:00+01:00', 'timeZone': 'Europe/Berlin'}
+    assert series['recurrence'] == ['RRULE:FREQ=WEEKLY;BYDAY=MO', 'EXDATE:20260119T080000Z']
+
+
+def test_cancelled_occurrence_in_a_later_chunk(bulk_io, fake, tmp_path):
+    fillers = [vevent(f'filler-{i}', f'202601{i + 10:02d}T140000', f'Filler {i}') for i in range(5)]
+    path = write_ics(
+        tmp_path,
+        vevent('standup', '20260105T090000', 'Standup', 'RRULE:FREQ=WEEKLY;COUNT=60'),
+        *fillers,
+        vevent('standup', '20260112T090000', 'Standup', 'RECURRENCE-ID;TZID=Europe/Berlin:20260112T090000', 'STATUS:CANCELLED'),
+    )
+    result = bulk_io.import_events(path, 'primary', fake.service, chunk_size=2)
+    assert (result['processed'], result['imported'], result['skipped'], result['failed']) == (7, 7, 0, 0)
+
+    series, cancelled = sorted(events_by_uid(fake)['standup'], key=lambda e: 'originalStartTime' in e)
+    assert series['recurrence'] == ['RRULE:FREQ=WEEKLY;COUNT=60']
+    assert cancelled['status'] == 'cancelled'
+    assert cancelled['recurringEventId'] == series['id']
+    assert cancelled['originalStartTime']['dateTime'] == '2026-01-12T09:00:00+01:00'
+
+
+def test_exception_before_its_series_waits_for_it(bulk_io, fake, tmp_path):
+    path = write_ics(
+        tmp_path,
+        vevent('review', '20260107T160000', 'Review (moved)', 'RECURRENCE-ID;TZID=Europe/Berlin:20260107T150000'),
+        vevent('filler', '20260106T120000', 'Lunch'),
+        vevent('review', '20260107T150000', 'Review', 'RRULE:FREQ=WEEKLY'),
+    )
+    checkpoint = tmp_path / 'import.checkpoint.json'
+    result = bulk_io.import_events(path, 'primary', fake.service, checkpoint_path=str(checkpoint), chunk_size=1)
+    assert (result['imported'], result['failed']) == (3, 0)
+    assert not checkpoint.exists()
+    series, moved = sorted(events_by_uid(fake)['review'], key=lambda e: 'originalStartTime' in e)
+    assert moved['recurringEventId'] == series['id']
+    assert moved['summary'] == 'Review (moved)'
+
+
+def test_exception_without_series_becomes_its_own_event(bulk_io, fake, tmp_path):
+    path = write_ics(
+        tmp_path,
+        vevent('gone', '20260107T160000', 'Moved', 'RECURRENCE-ID:20260107T140000Z'),
+        vevent('gone', '20260114T150000', 'Cancelled', 'RECURRENCE-ID:20260114T140000Z', 'STATUS:CANCELLED'),
+    )
+    result = bulk_io.import_events(path, 'primary', fake.service)
+    assert (result['imported'], result['skipped']) == (1, 1)
+    [moved] = events_by_uid(fake)['gone_20260107T140000Z']
+    assert 'recurringEventId' not in moved and moved['status'] == 'confirmed'
+
+
+def test_export_round_trip_keeps_the_series(bulk_io, fake, tmp_path):
+    path = write_ics(
+        tmp_path,
+        vevent('standup', '20260105T090000', 'Standup', 'RRULE:FREQ=DAILY;COUNT=20'),
+        vevent('standup', '20260112T090000', 'Standup', 'RECURRENCE-ID;TZID=Europe/Berlin:20260112T090000', 'STATUS:CANCELLED'),
+    )
+    bulk_io.import_events(path, 'primary', fake.service)
+    exported = tmp_path / 'export.ics'
+    assert bulk_io.export_events(str(exported), 'primary', fake.service, '2026-01-01', '2026-02-01', 'UTC') == 2
+
+    events = list(bulk_io.open_events(str(exported)))
+    series, cancelled = sorted(events, key=lambda e: 'recurrence_id' in e)
+    assert series['recurrence'] == ['RRULE:FREQ=DAILY;COUNT=20']
+    assert series['timezone'] == 'Europe/Berlin'
+    assert cancelled['cancelled'] and cancelled['uid'] == 'standup'
@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+
+NEW_YORK = 'America/New_York'
+
+
+def test_all_day_events_are_matched_by_local_date(agent, time_utils):
+    Event = agent('event_record').Event
+    events = [
+        Event.from_api({
+            'id': f'day-{day}',
+            'start': {'date': date(2026, 1, day).isoformat()},
+            'end': {'date': (date(2026, 1, day) + timedelta(days=1)).isoformat()},
+        }, 'primary')
+        for day in (14, 15, 16)
+    ]
+    events.append(Event.from_api({
+        'id': 'late',
+        'start': {'dateTime': '2026-01-15T22:00:00-05:00'},
+        'end': {'dateTime': '2026-01-15T23:00:00-05:00'},
+    }, 'primary'))
+    cache = agent('calendar_cache').CalendarCache(ttl=60)
+    week = time_utils.to_epoch('2026-01-12T00:00:00', NEW_YORK)
+    cache.put_events('primary', NEW_YORK, week, week + 7 * 86400, events)
+
+    # Jan 15 in New York (UTC-5) runs from 05:00 UTC to 05:00 UTC on Jan 16
+    day = time_utils.to_epoch('2026-01-15T00:00:00', NEW_YORK)
+    assert [event.id for event in cache.get_events('primary', NEW_YORK, day, day + 86400, 50)] == ['day-15', 'late']
+
+    evening = time_utils.to_epoch('2026-01-15T20:00:00', NEW_YORK)
+    assert [event.id for event in cache.get_events('primary', NEW_YORK, evening, evening + 3600, 50)] == ['day-15']
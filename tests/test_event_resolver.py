@@ -0,0 +1,107 @@
+import pytest
+
+DAY = 86400
+START = 1768435200  # 2026-01-15 in UTC
+
+
+@pytest.fixture
+def event_resolver(agent):
+    return agent('event_resolver')
+
+
+def _event(agent, event_id, summary, day=15, hour=9, calendar_id='primary'):
+    return agent('event_record').Event.from_api({
+        'id': event_id, 'summary': summary,
+        'start': {'dateTime': f'2026-01-{day}T{hour:02d}:00:00Z'}, 'end': {'dateTime': f'2026-01-{day}T{hour + 1:02d}:00:00Z'},
+    }, calendar_id)
+
+
+def _ids(events):
+    return [event.id for event in events]
+
+
+def test_find_matches_every_word_of_the_title(agent, event_resolver):
+    resolver = event_resolver.EventResolver()
+    resolver.remember([
+        _event(agent, 'dentist', 'Dentist appointment'),
+        _event(agent, 'review', 'Design review', hour=11),
+        _event(agent, 'other', 'Dentist appointment', calendar_id='work'),
+    ])
+    assert _ids(resolver.find('primary', 'my dentist')) == ['dentist']  # filler words are ignored
+    assert _ids(resolver.find('primary', 'the Design-Review')) == ['review']
+    assert resolver.find('primary', 'dentist review') == []
+    assert resolver.find('primary', 'the') == []
+    assert _ids(resolver.find('work', 'dentist appointment')) == ['other']
+
+
+def test_exact_title_wins_over_partial_matches(agent, event_resolver):
+    resolver = event_resolver.EventResolver()
+    resolver.remember([_event(agent, 'sync', 'Team sync', hour=10), _event(agent, 'planning', 'Team sync planning', hour=9)])
+    assert _ids(resolver.find('primary', 'team sync')) == ['sync']
+    assert _ids(resolver.find('primary', 'sync')) == ['planning', 'sync']  # ordered by start
+
+
+def test_ambiguous_title_is_narrowed_by_date(agent, event_resolver):
+    resolver = event_resolver.EventResolver()
+    resolver.remember([_event(agent, f'standup-{day}', 'Standup', day=day) for day in (15, 16, 17)])
+    assert _ids(resolver.find('primary', 'standup')) == ['standup-15', 'standup-16', 'standup-17']
+    assert _ids(resolver.find('primary', 'standup', START + DAY, START + 2 * DAY)) == ['standup-16']
+    assert resolver.find('primary', 'standup', START + DAY + 12 * 3600, START + 2 * DAY) == []
+
+
+def test_least_recently_seen_events_are_dropped(agent, event_resolver):
+    resolver = event_resolver.EventResolver(max_events=2)
+    first, second, third = (_event(agent, f'e{i}', f'Meeting {i}') for i in range(3))
+    resolver.remember([first, second])
+    resolver.remember([first])  # seen again
+    resolver.remember([third])
+    assert (resolver.get('primary', 'e0'), resolver.get('primary', 'e1')) == (first, None)
+    resolver.forget('primary', 'e0')
+    assert len(resolver) == 1
+
+
+def test_sessions_are_kept_apart(agent, event_resolver):
+    with event_resolver.session('a') as resolver:
+        assert event_resolver.current() is resolver
+        resolver.remember([_event(agent, 'e0', 'Standup')])
+    with event_resolver.session('b'):
+        assert event_resolver.current().find('primary', 'standup') == []
+    with event_resolver.session('a'):
+        assert _ids(event_resolver.current().find('primary', 'standup')) == ['e0']
+
+
+def _insert(service, summary, day, hour):
+    return service.events().insert(calendarId='primary', body={
+        'summary': summary,
+        'start': {'dateTime': f'2026-01-{day}T{hour:02d}:00:00Z'},
+        'end': {'dateTime': f'2026-01-{day}T{hour + 1:02d}:00:00Z'},
+    }).execute()
+
+
+def test_tools_ask_which_event_an_ambiguous_title_means(tools, fake, event_resolver, request):
+    service = fake.service()
+    monday, tuesday = _insert(service, 'Standup', 15, 9), _insert(service, 'Standup', 16, 9)
+    with event_resolver.session(request.node.nodeid):
+        listed = tools.get_calendar_events(time_min='2026-01-15T00:00:00', time_max='2026-01-17T00:00:00', timezone='UTC')
+        assert listed['count'] == 2
+        lookups = fake.requests_by_method['calendar.events.list']
+
+        result = tools.delete_calendar_event(event_summary='standup', timezone='UTC')
+        assert result['success'] is False
+        assert monday['id'] in result['error'] and tuesday['id'] in result['error']
+
+        result = tools.delete_calendar_event(event_summary='standup', event_date='2026-01-16', timezone='UTC')
+        assert (result['success'], result['event_id']) == (True, tuesday['id'])
+        assert fake.requests_by_method['calendar.events.list'] == lookups  # resolved from the listed events
+
+        # Deleted events are forgotten, so the title now means Monday's standup
+        result = tools.delete_calendar_event(event_summary='standup', timezone='UTC')
+        assert (result['success'], result['event_id']) == (True, monday['id'])
+
+
+def test_tools_look_up_titles_not_seen_in_the_session(tools, fake, event_resolver, request):
+    event = _insert(fake.service(), 'Dentist appointment', 15, 14)
+    with event_resolver.session(request.node.nodeid):
+        result = tools.delete_calendar_event(event_summary='dentist', event_date='2026-01-15', timezone='UTC')
+    assert (result['success'], result['event_id']) == (True, event['id'])
+    assert fake.requests_by_method['calendar.events.list'] == 1
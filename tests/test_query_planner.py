@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+
+import pytest
+
+DAY = 86400
+START = 1768435200  # 2026-01-15 in UTC
+
+
+@pytest.fixture
+def query_planner(agent):
+    return agent('query_planner')
+
+
+class Calendar:
+    """events.list over `per_day` one-hour events a day from START, recording each request."""
+
+    def __init__(self, agent, per_day, days=60):
+        Event = agent('event_record').Event
+        self.events = [
+            Event.from_api({
+                'id': f'e{day}-{i}',
+                'start': {'dateTime': _iso(START + day * DAY + 8 * 3600 + i * 3600)},
+                'end': {'dateTime': _iso(START + day * DAY + 9 * 3600 + i * 3600)},
+            }, 'primary')
+            for day in range(days) for i in range(per_day)
+        ]
+        self.requests = []
+
+    def query(self, start, end, max_results):
+        self.requests.append((start, end, max_results))
+        return [event for event in self.events if event.end > start and (end is None or event.start < end)][:max_results]
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def test_question_type(query_planner):
+    assert query_planner.question_type(None, None) == query_planner.UPCOMING
+    assert query_planner.question_type(None, 5) == query_planner.UPCOMING
+    assert query_planner.question_type(START + DAY, None) == query_planner.RANGE
+    assert query_planner.question_type(START + DAY, 5) == query_planner.LIMITED
+
+
+def test_limited_query_is_run_as_given(agent, query_planner):
+    calendar = Calendar(agent, per_day=8)
+    events, end, max_results = query_planner.QueryPlanner().fetch(calendar.query, 'primary', START, START + DAY, 3)
+    assert (len(events), end, max_results) == (3, START + DAY, 3)
+    assert calendar.requests == [(START, START + DAY, 3)]
+
+
+def test_range_page_is_sized_from_the_observed_density(agent, query_planner):
+    planner = query_planner.QueryPlanner()
+    planner.observe('primary', START, START + 2 * DAY, 40, complete=True)  # 20 events a day
+    calendar = Calendar(agent, per_day=16)
+    events, end, page = planner.fetch(calendar.query, 'primary', START, START + 7 * DAY, None)
+    assert len(events) == 7 * 16
+    assert page == 7 * 20 * query_planner.HEADROOM
+    assert calendar.requests == [(START, START + 7 * DAY, page)]
+
+
+def test_full_range_page_is_fetched_again_with_a_larger_one(agent, query_planner):
+    planner = query_planner.QueryPlanner()  # assumes DEFAULT_DENSITY before any observation
+    calendar = Calendar(agent, per_day=12)
+    events, end, page = planner.fetch(calendar.query, 'primary', START, START + 2 * DAY, None)
+    assert len(events) == 24
+    assert [request[2] for request in calendar.requests] == [
+        planner.page_size('primary', START, START + 2 * DAY),
+        planner.page_size('primary', START, START + 2 * DAY) * query_planner.GROWTH,
+    ]
+    assert page == calendar.requests[-1][2]
+
+    # A full page only raises the estimate
+    planner.observe('primary', START, START + 2 * DAY, 12, complete=False)
+    assert planner.density('primary') == 6
+    planner.observe('primary', START, START + 2 * DAY, 48, complete=False)
+    assert planner.density('primary') == 24
+
+
+def test_upcoming_query_is_open_ended_without_windows(agent, query_planner):
+    calendar = Calendar(agent, per_day=4)
+    events, end, wanted = query_planner.QueryPlanner().fetch(calendar.query, 'primary', START, None, None)
+    assert (len(events), end, wanted) == (query_planner.DEFAULT_EVENTS, None, query_planner.DEFAULT_EVENTS)
+    assert calendar.requests == [(START, None, query_planner.DEFAULT_EVENTS)]
+
+
+def test_upcoming_query_runs_as_a_window_expected_to_hold_the_events(agent, query_planner):
+    planner = query_planner.QueryPlanner(cached_density=lambda calendar_id: 5.0, windows=True)
+    calendar = Calendar(agent, per_day=5)
+    events, end, wanted = planner.fetch(calendar.query, 'primary', START, None, 10)
+    assert [event.id for event in events] == [event.id for event in calendar.events[:10]]
+    assert (end, wanted) == (START + 3 * DAY, 10)  # 10 events at 5 a day, with headroom
+    assert len(calendar.requests) == 1
+
+
+def test_upcoming_window_widens_until_it_holds_the_events(agent, query_planner):
+    planner = query_planner.QueryPlanner(cached_density=lambda calendar_id: 10.0, windows=True)
+    calendar = Calendar(agent, per_day=1)
+    events, end, wanted = planner.fetch(calendar.query, 'primary', START, None, 10)
+    assert [event.id for event in events] == [event.id for event in calendar.events[:10]]
+    span = 1.5 * DAY  # 10 events at 10 a day, with headroom
+    assert [request[:2] for request in calendar.requests] == [
+        (START, START + span), (START + span, START + 4 * span), (START + 4 * span, START + 16 * span),
+    ]
+    assert end == START + 16 * span
+
+
+def test_upcoming_window_is_left_open_beyond_the_horizon(agent, query_planner):
+    planner = query_planner.QueryPlanner(cached_density=lambda calendar_id: 10.0, windows=True)
+    calendar = Calendar(agent, per_day=0)
+    events, end, wanted = planner.fetch(calendar.query, 'primary', START, None, 10)
+    assert (events, end) == ([], None)
+    assert calendar.requests[-1][1] is None
+    assert all(request[1] - START < query_planner.HORIZON for request in calendar.requests[:-1])
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+import pytest
+
+
+@pytest.fixture
+def result_shaping(agent):
+    return agent('result_shaping')
+
+
+def _formatted(count, description_length=400):
+    return [
+        {
+            'id': f'e{i}', 'summary': f'Meeting {i}', 'start': f'2026-01-{15 + i // 4}T{9 + i % 4:02d}:00:00+00:00',
+            'end': f'2026-01-{15 + i // 4}T{10 + i % 4:02d}:00:00+00:00', 'description': 'x' * description_length,
+            'link': f'https://calendar.example.com/event?eid=e{i}',
+        }
+        for i in range(count)
+    ]
+
+
+def _shape(result_shaping, events, budget):
+    page = {'calendar_id': 'primary', 'start': 0, 'end': None, 'timezone': 'UTC', 'max_results': 250, 'offset': 0}
+    return result_shaping.shape_events({'success': True, 'calendar_id': 'primary'}, events, dict, page, budget=budget)
+
+
+def test_result_within_budget_is_untouched(result_shaping):
+    events = _formatted(3)
+    assert _shape(result_shaping, events, budget=10000) == {'success': True, 'calendar_id': 'primary', 'events': events, 'count': 3}
+    assert _shape(result_shaping, _formatted(100), budget=0)['count'] == 100  # shaping disabled
+
+
+def test_large_result_is_truncated_to_the_budget(result_shaping):
+    events = _formatted(40)
+    shaped = _shape(result_shaping, events, budget=1000)
+
+    assert result_shaping.estimate_tokens(shaped) <= 1000
+    assert shaped['truncated'] is True
+    assert (shaped['total'], shaped['count']) == (40, len(shaped['events']))
+    assert 0 < shaped['count'] < 40
+    # Events are kept in start order, without links and with shortened descriptions
+    assert [event['id'] for event in shaped['events']] == [event['id'] for event in events[:shaped['count']]]
+    assert all('link' not in event for event in shaped['events'])
+    assert all(len(event['description']) == result_shaping.DESCRIPTION_CHARS + 3 for event in shaped['events'])
+    # Every day is summarized, including those with no event shown
+    assert [day['date'] for day in shaped['days']] == [f'2026-01-{day}' for day in range(15, 25)]
+    assert sum(day['count'] for day in shaped['days']) == 40
+    assert sum(day['shown'] for day in shaped['days']) == shaped['count']
+
+    cursor = result_shaping.decode_page_token(shaped['next_page_token'])
+    assert cursor['offset'] == shaped['count']
+    assert 'next_page_token' in shaped['note']
+
+
+def test_compacted_result_that_fits_has_no_page_token(result_shaping):
+    shaped = _shape(result_shaping, _formatted(6, description_length=2000), budget=1000)
+    assert shaped['truncated'] is True
+    assert shaped['count'] == shaped['total'] == 6
+    assert 'next_page_token' not in shaped and 'note' not in shaped
+
+
+def test_first_event_is_kept_even_if_it_does_not_fit(result_shaping):
+    shaped = _shape(result_shaping, _formatted(2), budget=1)
+    assert [event['id'] for event in shaped['events']] == ['e0']
+
+
+@pytest.mark.parametrize('token', ['not base64!', 'bm90IGpzb24', 'eyJvZmZzZXQiOjB9'])  # garbage, "not json", {"offset":0}
+def test_foreign_page_tokens_are_rejected(result_shaping, token):
+    with pytest.raises(ValueError, match='Invalid page_token'):
+        result_shaping.decode_page_token(token)
+
+
+def test_pages_cover_every_event_once(tools, fake, monkeypatch):
+    monkeypatch.setattr(tools.result_shaping, 'TOKEN_BUDGET', 1500)
+    created = fake.seed_events('primary', 60, datetime(2026, 1, 12, tzinfo=timezone.utc), days=5)
+    for event in created:
+        event['description'] = 'Agenda: ' + 'status, blockers, next steps. ' * 20
+
+    result = tools.get_calendar_events(time_min='2026-01-12T00:00:00', time_max='2026-01-17T00:00:00', timezone='UTC')
+    pages = [result]
+    while 'next_page_token' in pages[-1]:
+        pages.append(tools.get_calendar_events(page_token=pages[-1]['next_page_token']))
+    assert all(page['success'] for page in pages)
+    assert len(pages) > 1
+    shown = [event['id'] for page in pages for event in page['events']]
+    assert sorted(shown) == sorted(event['id'] for event in created)  # none repeated or left out
+
+    assert tools.get_calendar_events(page_token='not-a-token')['success'] is False
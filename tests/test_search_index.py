@@ -0,0 +1,93 @@
+import pytest
+
+
+@pytest.fixture
+def search_index(agent):
+    return agent('search_index')
+
+
+def _insert(service, summary, day, hour, **fields):
+    body = {
+        'summary': summary,
+        'start': {'dateTime': f'2026-01-{day}T{hour:02d}:00:00Z'},
+        'end': {'dateTime': f'2026-01-{day}T{hour + 1:02d}:00:00Z'},
+    }
+    body.update(fields)
+    return service.events().insert(calendarId='primary', body=body).execute()
+
+
+def _ids(results):
+    return [event.id for event, score in results]
+
+
+def test_match_expression_quotes_every_word(search_index):
+    assert search_index.match_expression('Team "sync" OR NEAR(x)') == '"team"* "sync"* "or"* "near"* "x"*'
+    assert search_index.match_expression('team sync', any_term=True) == '"team"* OR "sync"*'
+    assert search_index.match_expression(' -*- ') is None
+
+
+def test_sync_indexes_every_field_and_ranks_summary_matches_first(search_index, fake):
+    service = fake.service()
+    described = _insert(service, 'Planning', 15, 9, description='Budget review for the quarter')
+    titled = _insert(service, 'Budget review', 16, 9)
+    located = _insert(service, 'Lunch', 17, 12, location='Café Rouge')
+    invited = _insert(service, 'Interview', 18, 15, attendees=[{'email': 'dana@example.com'}])
+
+    index = search_index.SearchIndex()
+    assert index.sync(service, 'primary') == 4
+    assert index.count('primary') == 4
+    assert _ids(index.search('budget reviews', 'primary')) == [titled['id'], described['id']]  # porter stemming
+    assert _ids(index.search('cafe', 'primary')) == [located['id']]  # diacritics are folded
+    assert _ids(index.search('dana', 'primary')) == [invited['id']]
+    assert _ids(index.search('budget', 'primary', start=1768521600)) == [titled['id']]  # from 2026-01-16
+    assert _ids(index.search('lunch interview', 'primary')) == [located['id'], invited['id']]  # no event has both words
+    assert index.search('offsite', 'primary') == []
+    assert index.search('budget', 'other') == []
+
+
+def test_incremental_sync_applies_changes_and_deletes(search_index, fake):
+    service = fake.service()
+    kept = _insert(service, 'Standup', 15, 9)
+    renamed = _insert(service, 'Retro', 15, 10)
+    deleted = _insert(service, 'Offsite planning', 15, 11)
+    index = search_index.SearchIndex()
+    index.sync(service, 'primary')
+
+    service.events().patch(calendarId='primary', eventId=renamed['id'], body={'summary': 'Demo'}).execute()
+    service.events().delete(calendarId='primary', eventId=deleted['id']).execute()
+    added = _insert(service, 'Planning poker', 16, 9)
+    listed = fake.requests_by_method['calendar.events.list']
+    assert index.sync(service, 'primary') == 3  # only the changed events are fetched
+    assert fake.requests_by_method['calendar.events.list'] == listed + 1
+
+    assert index.count('primary') == 3
+    assert index.search('retro', 'primary') == []
+    assert _ids(index.search('demo', 'primary')) == [renamed['id']]
+    assert _ids(index.search('planning', 'primary')) == [added['id']]
+    assert index.search('offsite', 'primary') == []
+    assert _ids(index.search('standup', 'primary')) == [kept['id']]
+    assert index.sync(service, 'primary') == 0
+
+
+def test_expired_sync_token_falls_back_to_a_full_sync(search_index, fake):
+    service = fake.service()
+    _insert(service, 'Standup', 15, 9)
+    index = search_index.SearchIndex()
+    index.sync(service, 'primary')
+    removed = _insert(service, 'Retro', 15, 10)
+    index.sync(service, 'primary')
+    fake.events['primary'].pop(removed['id'])  # gone without a trace, as after the token has expired
+
+    fake.fail_next(410)
+    assert index.sync(service, 'primary') == 1
+    assert index.count('primary') == 1
+    assert index.search('retro', 'primary') == []
+
+
+def test_index_is_fresh_for_the_generation_it_was_synced_at(search_index, fake):
+    index = search_index.SearchIndex()
+    assert not index.is_fresh('primary', 0, 60)
+    index.sync(fake.service(), 'primary', generation=3)
+    assert index.is_fresh('primary', 3, 60)
+    assert not index.is_fresh('primary', 4, 60)
+    assert not index.is_fresh('primary', 3, 0)
@@ -0,0 +1,138 @@
+import struct
+import time
+
+import pytest
+
+NEW_YORK = 'America/New_York'
+DAY = 1768435200  # 2026-01-15 in UTC
+
+
+@pytest.fixture
+def snapshot(agent):
+    return agent('snapshot')
+
+
+def _events(agent):
+    Event = agent('event_record').Event
+    events = [
+        Event.from_api({
+            'id': f'e{hour}', 'summary': f'Meeting {hour}',
+            'start': {'dateTime': f'2026-01-15T{hour:02d}:00:00Z'}, 'end': {'dateTime': f'2026-01-15T{hour + 1:02d}:00:00Z'},
+            'attendees': [{'email': 'a@example.com'}], 'description': 'Ünïcode',
+        }, 'primary')
+        for hour in (14, 9, 11)
+    ]
+    events.append(Event.from_api({
+        'id': 'long', 'start': {'dateTime': '2026-01-15T08:00:00Z'}, 'end': {'dateTime': '2026-01-15T18:00:00Z'},
+    }, 'primary'))
+    return events
+
+
+def _write(snapshot, agent, path, end=DAY + 86400):
+    windows = [
+        snapshot.WindowSnapshot('primary', NEW_YORK, DAY, end, 1768400000.5, 'token-1', _events(agent)),
+        snapshot.WindowSnapshot('other', 'UTC', DAY, None, 1768400001.0, None, []),
+    ]
+    return snapshot.write_snapshot(str(path), windows)
+
+
+def test_round_trip(agent, snapshot, tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    assert _write(snapshot, agent, path) == path.stat().st_size
+
+    with snapshot.Snapshot(str(path)) as loaded:
+        assert len(loaded) == 2
+        first, second = loaded
+        assert (first.calendar_id, first.timezone, first.start, first.end, first.saved, first.sync_token) == (
+            'primary', NEW_YORK, DAY, DAY + 86400, 1768400000.5, 'token-1'
+        )
+        assert (second.calendar_id, second.end, second.sync_token, len(second)) == ('other', None, None, 0)
+
+        expected = sorted(_events(agent), key=lambda event: event.start)
+        assert [event.to_record() for event in first] == [event.to_record() for event in expected]
+        assert [event.id for event in first.between(DAY + 10 * 3600, DAY + 12 * 3600)] == ['long', 'e11']
+        # The long event is still found although events starting after it end earlier
+        assert [event.id for event in first.between(DAY + 16 * 3600)] == ['long']
+        assert second.between(DAY) == []
+
+
+def test_between_matches_all_day_events_by_local_date(agent, snapshot, time_utils, tmp_path):
+    Event = agent('event_record').Event
+    events = [
+        Event.from_api({'id': f'day-{day}', 'start': {'date': f'2026-01-{day}'}, 'end': {'date': f'2026-01-{day + 1}'}}, 'primary')
+        for day in (14, 15, 16)
+    ]
+    path = str(tmp_path / 'cache.snapshot')
+    snapshot.write_snapshot(path, [snapshot.WindowSnapshot('primary', NEW_YORK, DAY - 86400, None, 0.0, None, events)])
+
+    evening = time_utils.to_epoch('2026-01-15T20:00:00', NEW_YORK)  # 01:00 UTC on Jan 16
+    with snapshot.Snapshot(path) as loaded:
+        assert [event.id for event in loaded.section(0).between(evening, evening + 3600, time_utils.get_zone(NEW_YORK))] == ['day-15']
+
+
+def _rewrite(path, offset, data):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+
+def _truncate(path, size):
+    with open(path, 'r+b') as f:
+        f.truncate(size)
+
+
+def test_version_mismatch_is_rejected(agent, snapshot, tmp_path):
+    path = str(tmp_path / 'cache.snapshot')
+    _write(snapshot, agent, path)
+    _rewrite(path, len(snapshot.MAGIC), struct.pack('<H', snapshot.VERSION + 1))
+    with pytest.raises(snapshot.SnapshotError, match='Unsupported snapshot version'):
+        snapshot.Snapshot(path)
+
+
+@pytest.mark.parametrize('damage, message', [
+    (lambda path, size: _rewrite(path, 0, b'NOTCACHE'), 'Not a cache snapshot'),
+    (lambda path, size: _truncate(path, 16), 'Truncated header'),
+    (lambda path, size: _truncate(path, 0), 'Cannot map'),
+    (lambda path, size: _rewrite(path, 20, b'\xff'), 'Header checksum mismatch'),
+    (lambda path, size: _rewrite(path, 100, b'\xff'), 'Section 0 checksum mismatch'),
+    (lambda path, size: _truncate(path, size - 100), 'Section 0 is truncated'),
+], ids=['magic', 'short', 'empty', 'header', 'section', 'truncated'])
+def test_damaged_snapshot_is_rejected(agent, snapshot, tmp_path, damage, message):
+    path = str(tmp_path / 'cache.snapshot')
+    size = _write(snapshot, agent, path)
+    damage(path, size)
+    with pytest.raises(snapshot.SnapshotError, match=message):
+        with snapshot.Snapshot(path) as loaded:
+            list(loaded)
+
+
+def test_missing_snapshot_is_rejected(snapshot, tmp_path):
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.Snapshot(str(tmp_path / 'missing.snapshot'))
+
+
+def test_stale_windows_are_revalidated_with_their_sync_token(agent, snapshot, tmp_path):
+    path = str(tmp_path / 'cache.snapshot')
+    events = _events(agent)
+    saved = time.time() - 3600
+    snapshot.write_snapshot(path, [snapshot.WindowSnapshot('primary', NEW_YORK, DAY, DAY + 86400, saved, 'token-1', events)])
+    requests = []
+
+    def list_changes(calendar_id, token):
+        requests.append((calendar_id, token))
+        return [
+            {'id': 'e9', 'status': 'cancelled'},
+            {'id': 'e11', 'summary': 'Moved', 'start': {'dateTime': '2026-01-15T12:00:00Z'}, 'end': {'dateTime': '2026-01-15T13:00:00Z'}},
+        ], 'token-2'
+
+    cache = agent('calendar_cache').CalendarCache(ttl=60)
+    snapshots = snapshot.CacheSnapshots(cache, path, list_changes)
+    assert snapshots.load() == 1
+    assert requests == [('primary', 'token-1')]
+    restored = cache.get_events('primary', NEW_YORK, DAY, DAY + 86400, 50)
+    assert [(event.id, event.summary) for event in restored] == [('long', 'No title'), ('e11', 'Moved'), ('e14', 'Meeting 14')]
+
+    # The window is saved again with the token it was brought up to date with
+    snapshots.save()
+    with snapshot.Snapshot(path) as loaded:
+        assert [section.sync_token for section in loaded] == ['token-2']
@@ -0,0 +1,142 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+NEW_YORK = 'America/New_York'
+
+
+def test_wall_time_in_dst_gap_moves_forward(time_utils):
+    # 2025-03-09 02:00-03:00 does not exist in New York
+    value = time_utils.localize(datetime(2025, 3, 9, 2, 30), NEW_YORK)
+    assert value.isoformat() == '2025-03-09T03:30:00-04:00'
+    assert time_utils.parse_time('2025-03-09T02:30:00', NEW_YORK) == value
+
+
+def test_ambiguous_wall_time_resolves_to_first_occurrence(time_utils):
+    # 01:30 happens twice on 2025-11-02: first in EDT (-04:00), then in EST (-05:00)
+    value = time_utils.parse_time('2025-11-02T01:30:00', NEW_YORK)
+    assert value.utcoffset() == timedelta(hours=-4)
+    assert time_utils.to_rfc3339(value) == '2025-11-02T05:30:00Z'
+
+
+def test_explicit_offset_selects_either_side_of_fold(time_utils):
+    first = time_utils.to_epoch('2025-11-02T01:30:00-04:00')
+    second = time_utils.to_epoch('2025-11-02T01:30:00-05:00')
+    assert second - first == 3600
+
+
+@pytest.mark.parametrize('value', [
+    '2025-01-15T10:00:00-05:00',
+    '2025-07-01T23:59:59+02:00',
+    '2025-03-09T07:00:00Z',
+    '2025-11-02T06:30:00.250000Z',
+])
+def test_round_trips(time_utils, value):
+    parsed = time_utils.parse_time(value)
+    assert time_utils.parse_time(time_utils.to_rfc3339(parsed)) == parsed
+    assert time_utils.from_epoch(time_utils.to_epoch(parsed)) == parsed.replace(microsecond=0)
+    assert time_utils.parse_time(time_utils.event_time(parsed, NEW_YORK)['dateTime']) == parsed
+
+
+def test_event_time_uses_the_zone_it_names(time_utils):
+    value = time_utils.parse_time('2025-01-15T15:00:00Z')
+    assert time_utils.event_time(value, NEW_YORK) == {'dateTime': '2025-01-15T10:00:00-05:00', 'timeZone': NEW_YORK}
+
+
+def test_offset_and_fraction_parsing(time_utils):
+    value = time_utils.parse_time('2025-01-15T10:00:00.1234567+05:30')
+    assert value.microsecond == 123456
+    assert value.utcoffset() == timedelta(hours=5, minutes=30)
+
+
+def test_date_only_values_are_all_day(time_utils):
+    value = time_utils.parse_time('2025-01-15')
+    assert type(value) is date
+    assert time_utils.default_end(value) == date(2025, 1, 16)
+    assert time_utils.event_time(value, NEW_YORK) == {'date': '2025-01-15'}
+
+
+def test_all_day_dates_start_at_local_midnight(time_utils):
+    assert time_utils.to_rfc3339(date(2025, 1, 15), NEW_YORK) == '2025-01-15T05:00:00Z'
+    assert time_utils.to_rfc3339(date(2025, 7, 15), NEW_YORK) == '2025-07-15T04:00:00Z'
+
+
+def test_all_day_length_across_dst_changes(time_utils):
+    def day_length(day):
+        return time_utils.to_epoch(day + timedelta(days=1), NEW_YORK) - time_utils.to_epoch(day, NEW_YORK)
+
+    assert day_length(date(2025, 3, 9)) == 23 * 3600
+    assert day_length(date(2025, 11, 2)) == 25 * 3600
+    assert day_length(date(2025, 6, 1)) == 24 * 3600
+
+
+@pytest.mark.parametrize('value', ['2025-03-09T01:30:00', '2025-11-02T01:30:00', '2025-11-02T00:45:00'])
+def test_default_end_of_timed_start_is_one_hour_later(time_utils, value):
+    # Subtracting datetimes that share a tzinfo ignores their offsets, so compare epochs
+    start = time_utils.parse_time(value, NEW_YORK)
+    end = time_utils.default_end(start)
+    assert time_utils.to_epoch(end) - time_utils.to_epoch(start) == 3600
+    assert end.tzinfo is start.tzinfo
+
+
+# Property checks over every quarter hour of days with a DST change, in zones that move their
+# clocks forward or back, in either hemisphere, by an hour or half an hour, or not at all
+TRANSITIONS = [
+    ('America/New_York', date(2025, 3, 9)),
+    ('America/New_York', date(2025, 11, 2)),
+    ('Europe/Berlin', date(2025, 3, 30)),
+    ('Europe/Berlin', date(2025, 10, 26)),
+    ('Australia/Sydney', date(2025, 4, 6)),
+    ('Australia/Sydney', date(2025, 10, 5)),
+    ('Australia/Lord_Howe', date(2025, 4, 6)),
+    ('Australia/Lord_Howe', date(2025, 10, 5)),
+    ('Asia/Kolkata', date(2025, 3, 9)),
+]
+
+
+def quarter_hours(day):
+    start = datetime(day.year, day.month, day.day)
+    return [start + timedelta(minutes=15 * i) for i in range(4 * 24)]
+
+
+@pytest.mark.parametrize('zone, day', TRANSITIONS, ids=[f'{zone}-{day}' for zone, day in TRANSITIONS])
+def test_dst_day_properties(time_utils, zone, day):
+    tz = time_utils.get_zone(zone)
+    previous = None
+    for wall in quarter_hours(day):
+        value = time_utils.localize(wall, zone)
+        epoch = time_utils.to_epoch(value)
+        local = value.replace(tzinfo=None)
+
+        # Existing wall times are kept and a gap moves them forward by its length
+        assert timedelta(0) <= local - wall <= timedelta(hours=1)
+        if local != wall:
+            assert time_utils.localize(local, zone) == value
+        # Ambiguous wall times take their first occurrence, with the larger (pre-transition) offset
+        offsets = {tz.utcoffset(wall.replace(fold=fold)) for fold in (0, 1)}
+        if local == wall and len(offsets) == 2:
+            assert value.utcoffset() == max(offsets)
+        # Later existing wall times never map to earlier instants
+        if local == wall:
+            assert previous is None or epoch > previous
+            previous = epoch
+
+        # Compared as epochs: Python never finds an ambiguous wall time equal to one in another zone
+        assert time_utils.to_epoch(time_utils.parse_time(time_utils.to_rfc3339(value))) == epoch
+        assert time_utils.to_epoch(time_utils.from_epoch(epoch).astimezone(value.tzinfo)) == epoch
+        assert time_utils.to_epoch(time_utils.parse_time(wall.isoformat(), zone)) == epoch
+        assert time_utils.to_epoch(time_utils.default_end(value)) - epoch == 3600
+
+
+@pytest.mark.parametrize('zone, day', TRANSITIONS, ids=[f'{zone}-{day}' for zone, day in TRANSITIONS])
+def test_dst_day_length_matches_offset_change(time_utils, zone, day):
+    length = time_utils.to_epoch(day + timedelta(days=1), zone) - time_utils.to_epoch(day, zone)
+    tz = time_utils.get_zone(zone)
+    before = tz.utcoffset(datetime(day.year, day.month, day.day))
+    after = tz.utcoffset(datetime(day.year, day.month, day.day) + timedelta(days=1))
+    assert length == 86400 - (after - before).total_seconds()
+
+
+def test_unrecognized_format_raises(time_utils):
+    with pytest.raises(ValueError):
+        time_utils.parse_time('next tuesday')
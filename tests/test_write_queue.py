@@ -0,0 +1,186 @@
+import json
+import socket
+import sqlite3
+import threading
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+
+def http_error(status, reason):
+    content = json.dumps({'error': {'code': status, 'errors': [{'reason': reason}]}}).encode()
+    return HttpError(httplib2.Response({'status': status}), content)
+
+
+def rows(path):
+    with sqlite3.connect(path) as db:
+        return db.execute('SELECT kind, event_id, status, attempts FROM operations ORDER BY seq').fetchall()
+
+
+@pytest.fixture
+def write_queue(agent):
+    return agent('write_queue')
+
+
+@pytest.fixture
+def open_queue(write_queue, tmp_path):
+    """Opens WriteQueues on one file and closes them after the test."""
+    queues = []
+
+    def open_queue(commit, **kwargs):
+        queue = write_queue.WriteQueue(str(tmp_path / 'queue.db'), commit, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield open_queue
+    for queue in queues:
+        queue.close()
+
+
+@pytest.mark.parametrize('error, retried', [
+    (http_error(429, 'rateLimitExceeded'), True),
+    (http_error(403, 'rateLimitExceeded'), True),
+    (http_error(403, 'userRateLimitExceeded'), True),
+    (http_error(503, 'backendError'), True),
+    (socket.timeout('timed out'), True),
+    (ConnectionResetError(), True),
+    (httplib2.ServerNotFoundError('no host'), True),
+    (http_error(403, 'forbidden'), False),
+    (http_error(400, 'invalid'), False),
+    (http_error(404, 'notFound'), False),
+    (KeyError('id'), False),
+    (TypeError('bad payload'), False),
+])
+def test_retryable_errors(write_queue, error, retried):
+    assert write_queue._retryable(error) is retried
+
+
+@pytest.mark.parametrize('error', [http_error(403, 'forbidden'), KeyError('id')], ids=['forbidden', 'bug'])
+def test_permanent_error_fails_at_once(write_queue, open_queue, tmp_path, error):
+    attempts = []
+    committed = []
+
+    def commit(op):
+        attempts.append(op.seq)
+        raise error
+
+    queue = open_queue(commit, on_commit=committed.append)
+    queue.enqueue(write_queue.DELETE, 'primary', 'e1')
+    assert queue.wait(timeout=5)
+    assert len(attempts) == 1 and len(committed) == 1
+    [failure] = queue.failures()
+    assert (failure['operation'], failure['event_id']) == ('delete', 'e1')
+    assert queue.failures() == []
+    assert rows(tmp_path / 'queue.db') == [('delete', 'e1', 'failed', 0)]
+
+
+def test_rate_limited_operation_is_retried(write_queue, open_queue, tmp_path):
+    errors = [http_error(403, 'rateLimitExceeded')]
+
+    def commit(op):
+        if errors:
+            raise errors.pop()
+
+    queue = open_queue(commit)
+    queue.enqueue(write_queue.DELETE, 'primary', 'e1')
+    assert queue.wait(timeout=10)
+    assert queue.failures() == []
+    assert rows(tmp_path / 'queue.db') == []
+
+
+def test_retries_stop_after_max_attempts(write_queue, open_queue):
+    def unavailable(op):
+        raise http_error(503, 'backendError')
+
+    queue = open_queue(unavailable, max_attempts=1)
+    queue.enqueue(write_queue.DELETE, 'primary', 'e1')
+    assert queue.wait(timeout=5)
+    assert len(queue.failures()) == 1
+
+
+def test_restart_replays_pending_operations(write_queue, open_queue, tmp_path):
+    tried = threading.Event()
+
+    def unavailable(op):
+        tried.set()
+        raise http_error(503, 'backendError')
+
+    first = open_queue(unavailable)
+    first.enqueue(write_queue.INSERT, 'primary', 'e1', {'body': {'summary': 'Kept'}})
+    first.enqueue(write_queue.DELETE, 'primary', 'e2')
+    assert tried.wait(5)
+    first.close()  # stops while the insert waits out its backoff
+
+    replayed = []
+    second = open_queue(lambda op: replayed.append((op.kind, op.event_id, op.payload, op.attempts)))
+    assert second.wait(timeout=5)
+    assert replayed[0] == ('insert', 'e1', {'body': {'summary': 'Kept'}}, 1)
+    assert sorted(item[1] for item in replayed) == ['e1', 'e2']
+    assert rows(tmp_path / 'queue.db') == []
+
+
+def test_operations_on_one_event_commit_in_order(write_queue, open_queue):
+    order = []
+    release = threading.Event()
+
+    def commit(op):
+        if op.event_id == 'e1' and not order:
+            release.wait(5)  # hold the first operation while the others queue up
+        order.append((op.event_id, op.payload['n']))
+
+    queue = open_queue(commit)
+    for n in range(3):
+        queue.enqueue(write_queue.DELETE, 'primary', 'e1', {'n': n})
+    queue.enqueue(write_queue.DELETE, 'primary', 'e2', {'n': 0})
+    assert queue.wait(event_id='e2', timeout=5)  # another event does not wait for e1
+    assert order == [('e2', 0)]
+    release.set()
+    assert queue.wait(timeout=5)
+    assert [n for event_id, n in order if event_id == 'e1'] == [0, 1, 2]
+
+
+def test_overlay_applies_pending_writes(agent, write_queue, open_queue):
+    Event = agent('event_record').Event
+    release = threading.Event()
+    queue = open_queue(lambda op: release.wait(5))
+    existing = [
+        Event.from_api({'id': f'e{i}', 'start': {'dateTime': f'2026-01-15T{9 + i:02d}:00:00Z'},
+                        'end': {'dateTime': f'2026-01-15T{10 + i:02d}:00:00Z'}}, 'primary')
+        for i in range(2)
+    ]
+    queue.enqueue(write_queue.DELETE, 'primary', 'e0')
+    queue.enqueue(write_queue.INSERT, 'primary', 'new', {'body': {
+        'summary': 'Added', 'start': {'dateTime': '2026-01-15T08:00:00Z'}, 'end': {'dateTime': '2026-01-15T08:30:00Z'},
+    }})
+    start, end = 1768435200, 1768521600  # 2026-01-15 in UTC
+    try:
+        assert [event.id for event in queue.overlay('primary', existing, start, end)] == ['new', 'e1']
+        assert queue.overlay('primary', [], end, end + 3600) == []  # the insert is outside this range
+    finally:
+        release.set()
+    assert queue.wait(timeout=5)
+    assert [event.id for event in queue.overlay('primary', existing, start, end)] == ['e0', 'e1']
+
+
+def test_overlay_patches_pending_updates(agent, write_queue, open_queue):
+    Event = agent('event_record').Event
+    release = threading.Event()
+    queue = open_queue(lambda op: release.wait(5))
+    existing = [Event.from_api({
+        'id': 'e0', 'summary': 'Standup', 'start': {'dateTime': '2026-01-15T09:00:00Z'},
+        'end': {'dateTime': '2026-01-15T10:00:00Z'}, 'attendees': [{'email': 'a@example.com'}],
+    }, 'primary')]
+    queue.enqueue(write_queue.UPDATE, 'primary', 'e0', {'body': {'summary': 'Sync'}})
+    start, end = 1768435200, 1768521600  # 2026-01-15 in UTC
+    try:
+        [event] = queue.overlay('primary', existing, start, end)
+        assert (event.id, event.summary, event.start_iso) == ('e0', 'Sync', existing[0].start_iso)
+        assert event.attendees == existing[0].attendees  # fields not in the update are left alone
+        queue.enqueue(write_queue.UPDATE, 'primary', 'e0', {'body': {
+            'start': {'dateTime': '2026-01-16T09:00:00Z'}, 'end': {'dateTime': '2026-01-16T10:00:00Z'},
+        }})
+        assert queue.overlay('primary', existing, start, end) == []  # moved to the next day
+    finally:
+        release.set()
+    assert queue.wait(timeout=5)